@@ -0,0 +1,237 @@
+"""
+===============================================================================
+                    ⏱️ 排版智能体基准测试 (Formatter Benchmark)
+===============================================================================
+生成 1k ~ 50k 字符的合成长文（中英混排、表格、多语言代码块、图片、TODO 标记），
+按风格分别计时 convert_md_to_html / highlight_code / inline_css，
+输出 p50/p95 耗时与峰值内存，结果写入 JSON，便于版本间对比回归。
+
+用法：
+    python benchmarks/bench_formatter.py
+    python benchmarks/bench_formatter.py --sizes 1000 10000 50000 --repeat 20
+    python benchmarks/bench_formatter.py --styles green livid --out bench_new.json
+    python benchmarks/bench_formatter.py --baseline bench_old.json   # 与旧结果对比
+===============================================================================
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+for p in (PROJECT_ROOT / "src", PROJECT_ROOT):
+    if str(p) not in sys.path:
+        sys.path.insert(0, str(p))
+
+from agents import formatter
+
+
+DEFAULT_SIZES = [1000, 5000, 10000, 20000, 50000]
+
+# ================= 合成语料 =================
+
+CN_SENTENCES = [
+    "昨天我试着把整个项目丢给 DeepSeek，结果它十分钟就理清了所有依赖关系。",
+    "**Cursor 的 Rules 文件**才是控制 AI 行为的核心，很多人根本没打开过。",
+    "如果你还在手动整理周报，这套工作流能帮你每周省下至少 2 小时。",
+    "别急着 Accept All，先看看它改了哪些文件，`git diff` 是你最好的朋友。",
+    "本地部署 Ollama 之后，敏感数据再也不用上传到云端了。",
+    "实测下来，开启 MCP 联网后回答的时效性明显提升，但响应速度慢了 30%。",
+    "这类付费套壳工具本质是信息差，底层模型和官方 API 没有任何区别。",
+    "**(TODO: 补一张设置界面截图)** 放在这里效果最好。",
+]
+
+CODE_SNIPPETS = {
+    "python": 'def fetch(url: str) -> str:\n    with httpx.Client(timeout=30) as client:\n        resp = client.get(url)\n        resp.raise_for_status()\n        return resp.text\n',
+    "javascript": 'async function main() {\n  const res = await fetch("https://api.example.com");\n  const data = await res.json();\n  console.log(data.items.map(i => i.name));\n}\n',
+    "bash": 'pip install -r requirements.txt\nollama pull qwen2.5:7b\npython main.py hunt -t "Cursor 技巧" && echo "done" > /tmp/out.txt\n',
+    "json": '{\n  "model": "deepseek-chat",\n  "messages": [{"role": "user", "content": "<hello & world>"}],\n  "stream": true\n}\n',
+    "yaml": 'watchlist:\n  - "DeepSeek"\n  - "Cursor"\nconcurrency:\n  max_fetches: 5\n',
+    "go": 'package main\n\nimport "fmt"\n\nfunc main() {\n\tfor i := 0; i < 3; i++ {\n\t\tfmt.Println("hello", i)\n\t}\n}\n',
+    "": 'plain text block without language\n<tag> & entity\n',
+}
+
+
+def _block_table(rng: random.Random) -> str:
+    rows = ["| 工具 | 价格 | 上手难度 | 推荐指数 |", "|------|------|----------|----------|"]
+    for _ in range(rng.randint(3, 8)):
+        rows.append(f"| {rng.choice(['DeepSeek', 'Kimi', 'Cursor', 'Claude', '秘塔'])} | "
+                    f"{rng.choice(['免费', '$20/月', '按量计费'])} | {rng.choice(['低', '中', '高'])} | "
+                    f"{'⭐' * rng.randint(1, 5)} |")
+    return "\n".join(rows)
+
+
+def _block_code(rng: random.Random) -> str:
+    lang = rng.choice(list(CODE_SNIPPETS.keys()))
+    return f"```{lang}\n{CODE_SNIPPETS[lang] * rng.randint(1, 3)}```"
+
+
+def _block_paragraph(rng: random.Random) -> str:
+    return "".join(rng.choice(CN_SENTENCES) for _ in range(rng.randint(2, 5)))
+
+
+def _block_misc(rng: random.Random) -> str:
+    return rng.choice([
+        f"![配图{rng.randint(1, 99)}](../5_assets/material_{rng.randint(100000, 999999)}.png)",
+        f"> TODO: [界面截图 {rng.randint(1, 9)}] (搜索关键词: Cursor, 设置)",
+        "> 引用：真正的高阶玩法只有 API、本地部署和提示词迭代。",
+        "- 第一步：打开设置\n- 第二步：开启 **隐私模式**\n- 第三步：重启编辑器",
+        "---",
+    ])
+
+
+def generate_article(target_chars: int, seed: int = 42) -> str:
+    """生成约 target_chars 字符的合成文章（结果可复现）"""
+    rng = random.Random(seed + target_chars)
+    parts = [f"# 合成基准文章 {target_chars} 字", _block_paragraph(rng)]
+    size = sum(len(p) for p in parts)
+    section = 0
+    while size < target_chars:
+        if rng.random() < 0.15:
+            section += 1
+            block = f"## 🔥 第 {section} 节：实测与避坑"
+        else:
+            block = rng.choices(
+                [_block_paragraph, _block_code, _block_table, _block_misc],
+                weights=[5, 3, 1, 2],
+            )[0](rng)
+        parts.append(block)
+        size += len(block) + 2
+    return "\n\n".join(parts)
+
+
+def iter_code_blocks(md: str):
+    """从合成文章中提取 (code, lang)，用于单独测 highlight_code"""
+    for chunk in md.split("```")[1::2]:
+        lang, _, code = chunk.partition("\n")
+        yield code, (lang.strip() or "text")
+
+# ================= 计时 =================
+
+def _percentile(samples, pct: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    k = (len(ordered) - 1) * pct / 100
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def measure(fn, repeat: int) -> dict:
+    """重复执行 fn，返回耗时分位数 (ms) 与单次峰值内存 (KB)"""
+    fn()  # 预热：lexer 注册、premailer/cssutils 首次解析
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - t0) * 1000)
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "p50_ms": round(_percentile(timings, 50), 3),
+        "p95_ms": round(_percentile(timings, 95), 3),
+        "min_ms": round(min(timings), 3),
+        "peak_kb": round(peak / 1024, 1),
+        "runs": repeat,
+    }
+
+
+def run_benchmark(sizes, styles, repeat: int) -> dict:
+    results = {
+        "meta": {
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "render_revision": getattr(formatter, "RENDER_REVISION", None),
+            "repeat": repeat,
+        },
+        "cases": [],
+    }
+
+    for size in sizes:
+        md = generate_article(size)
+        code_blocks = list(iter_code_blocks(md))
+        print(f"\n📄 合成文章 {size} 字 (实际 {len(md)} 字符, {len(code_blocks)} 个代码块)")
+
+        convert = measure(lambda: formatter.convert_md_to_html(md), repeat)
+        results["cases"].append({"size": size, "chars": len(md), "func": "convert_md_to_html", "style": None, **convert})
+        print(f"   convert_md_to_html      p50={convert['p50_ms']:>9.2f}ms  p95={convert['p95_ms']:>9.2f}ms  peak={convert['peak_kb']:>8.1f}KB")
+
+        highlight = measure(lambda: [formatter.highlight_code(c, l) for c, l in code_blocks], repeat)
+        results["cases"].append({"size": size, "chars": len(md), "func": "highlight_code", "style": None,
+                                 "blocks": len(code_blocks), **highlight})
+        print(f"   highlight_code (x{len(code_blocks):<3})   p50={highlight['p50_ms']:>9.2f}ms  p95={highlight['p95_ms']:>9.2f}ms  peak={highlight['peak_kb']:>8.1f}KB")
+
+        html = formatter.convert_md_to_html(md)
+        for style in styles:
+            inline = measure(lambda: formatter.inline_css(html, style_name=style), repeat)
+            results["cases"].append({"size": size, "chars": len(md), "func": "inline_css", "style": style, **inline})
+            print(f"   inline_css [{style:<10}] p50={inline['p50_ms']:>9.2f}ms  p95={inline['p95_ms']:>9.2f}ms  peak={inline['peak_kb']:>8.1f}KB")
+
+    return results
+
+
+def compare_with_baseline(current: dict, baseline: dict, threshold: float = 0.10) -> list:
+    """对比两次结果，返回 p50 变慢超过阈值的用例"""
+    def key(c):
+        return (c["size"], c["func"], c.get("style"))
+
+    old = {key(c): c for c in baseline.get("cases", [])}
+    regressions = []
+    print(f"\n📈 与基线对比 ({baseline.get('meta', {}).get('timestamp', '?')})：")
+    for case in current["cases"]:
+        prev = old.get(key(case))
+        if not prev or not prev.get("p50_ms"):
+            continue
+        delta = (case["p50_ms"] - prev["p50_ms"]) / prev["p50_ms"]
+        flag = "🔴" if delta > threshold else ("🟢" if delta < -threshold else "  ")
+        label = f"{case['func']}[{case['style']}]" if case.get("style") else case["func"]
+        print(f"   {flag} {case['size']:>6} {label:<24} {prev['p50_ms']:>9.2f}ms -> {case['p50_ms']:>9.2f}ms ({delta:+.1%})")
+        if delta > threshold:
+            regressions.append({"size": case["size"], "func": case["func"], "style": case.get("style"), "delta": round(delta, 4)})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="排版智能体基准测试")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="合成文章字符数")
+    parser.add_argument("--styles", nargs="+", default=list(formatter.STYLE_TEMPLATES.keys()), help="参与测试的风格")
+    parser.add_argument("--repeat", type=int, default=10, help="每个用例重复次数")
+    parser.add_argument("--out", default="bench_formatter.json", help="结果 JSON 输出路径")
+    parser.add_argument("--baseline", help="旧版本结果 JSON，用于对比回归")
+    parser.add_argument("--threshold", type=float, default=0.10, help="回归判定阈值 (p50 变慢比例)")
+    args = parser.parse_args()
+
+    unknown = [s for s in args.styles if s not in formatter.STYLE_TEMPLATES]
+    if unknown:
+        parser.error(f"未知风格: {', '.join(unknown)}")
+
+    results = run_benchmark(args.sizes, args.styles, args.repeat)
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        results["regressions"] = compare_with_baseline(results, baseline, args.threshold)
+        if results["regressions"]:
+            print(f"\n⚠️ 发现 {len(results['regressions'])} 个回归用例 (阈值 {args.threshold:.0%})")
+            exit_code = 1
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 结果已保存: {args.out}")
+    return exit_code
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,14 +1,24 @@
+"""
+根目录入口：python main.py <command> [...]
+
+默认在当前进程内分发到 src/run.py 的 entrypoint()，只需一次解释器启动与 config 导入，
+Ctrl+C 会协作式取消正在进行的 HTTP 请求与 LLM 流。
+如需旧的子进程模式（单独启动 src/run.py），加 --subprocess 参数。
+"""
 import subprocess
 import sys
 from pathlib import Path
 
 
-if __name__ == "__main__":
-    root = Path(__file__).resolve().parent
-    cmd = [sys.executable, str(root / "src" / "run.py"), *sys.argv[1:]]
+ROOT = Path(__file__).resolve().parent
+SRC_DIR = ROOT / "src"
+
+
+def run_subprocess(argv) -> int:
+    cmd = [sys.executable, str(SRC_DIR / "run.py"), *argv]
     proc = subprocess.Popen(cmd)
     try:
-        raise SystemExit(proc.wait())
+        return proc.wait()
     except KeyboardInterrupt:
         try:
             proc.terminate()
@@ -21,4 +31,22 @@ if __name__ == "__main__":
                 proc.kill()
             except Exception:
                 pass
-        raise SystemExit(130)
+        return 130
+
+
+def run_in_process(argv) -> int:
+    for p in (SRC_DIR, ROOT):
+        if str(p) not in sys.path:
+            sys.path.insert(0, str(p))
+    # run.main() 直接读取 sys.argv，保持与子进程模式一致的参数视图
+    sys.argv = [str(SRC_DIR / "run.py"), *argv]
+    import run
+    return run.entrypoint()
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if "--subprocess" in args:
+        args.remove("--subprocess")
+        raise SystemExit(run_subprocess(args))
+    raise SystemExit(run_in_process(args))
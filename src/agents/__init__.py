@@ -8,24 +8,45 @@
 - formatter: 排版智能体，Markdown 转微信 HTML
 - todo_extractor: TODO 提取器，列出需补充的内容
 - refiner: 润色智能体，定向修改文章
+
+所有智能体均为懒加载：只有在首次访问时才导入对应模块，
+避免 `run.py help` / `todo` 等轻量命令被 playwright、premailer、openai 等重依赖拖慢。
 """
 
-from .trend_hunter import main as run_trend_hunter
-from .researcher import ResearcherAgent
-from .drafter import main as run_drafter
-from .formatter import main as run_formatter
-from .todo_extractor import main as run_todo_extractor
-from .refiner import refine_article as run_refiner
-from .screenshotter import capture_homepage
-from .auditor import audit_article as run_auditor
-
-__all__ = [
-    'run_trend_hunter',
-    'ResearcherAgent',
-    'run_drafter', 
-    'run_formatter',
-    'run_todo_extractor',
-    'run_refiner',
-    'capture_homepage',
-    'run_auditor'
-]
+import importlib
+
+# 导出名 -> (子模块, 属性名)
+_LAZY_EXPORTS = {
+    'run_trend_hunter': ('trend_hunter', 'main'),
+    'ResearcherAgent': ('researcher', 'ResearcherAgent'),
+    'run_drafter': ('drafter', 'main'),
+    'run_formatter': ('formatter', 'main'),
+    'run_todo_extractor': ('todo_extractor', 'main'),
+    'run_refiner': ('refiner', 'refine_article'),
+    'capture_homepage': ('screenshotter', 'capture_homepage'),
+    'run_auditor': ('auditor', 'audit_article'),
+}
+
+# 可通过 `agents.<name>` 直接懒加载的子模块
+_AGENT_MODULES = {
+    'trend_hunter', 'researcher', 'drafter', 'formatter', 'todo_extractor',
+    'refiner', 'screenshotter', 'auditor', 'illustrator',
+}
+
+__all__ = list(_LAZY_EXPORTS)
+
+
+def __getattr__(name):
+    if name in _AGENT_MODULES:
+        return importlib.import_module(f".{name}", __name__)
+    target = _LAZY_EXPORTS.get(name)
+    if target is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module_name, attr = target
+    value = getattr(importlib.import_module(f".{module_name}", __name__), attr)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_EXPORTS) | _AGENT_MODULES)
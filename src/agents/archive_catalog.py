@@ -0,0 +1,304 @@
+"""
+🗃️ 归档目录 (Archive Catalog)
+
+data/archive_catalog.sqlite 记录归档中每个产物的元数据，替代“glob + stat + 读全文”：
+- artifacts 表：日期、阶段、类型、路径、哈希、大小、标题、关键词、生成耗时；
+- artifacts_fts 全文索引：选题报告、笔记、草稿、终稿等正文（trigram 分词，中英文子串均可检索）；
+- 各智能体写文件后调用 record_artifact() 增量更新；已有归档用 `python run.py catalog rebuild` 补建。
+
+SQLite 不支持 FTS5 / trigram 时自动降级为 LIKE 查询，功能不变，仅速度变慢。
+"""
+import os
+import re
+import hashlib
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional
+
+import config
+from config import STAGE_DIRS, get_logger
+
+logger = get_logger(__name__)
+
+SCHEMA_VERSION = 1
+
+# 文件名 -> 产物类型；未列出的文件不入库
+_KIND_PATTERNS = [
+    (re.compile(r"^report_\d+\.md$"), "report"),
+    (re.compile(r"^FINAL_DECISION\.md$"), "decision"),
+    (re.compile(r"^notes\.txt$"), "notes"),
+    (re.compile(r"^draft\.md$"), "draft"),
+    (re.compile(r"^final\.md$"), "final"),
+    (re.compile(r"^audit_report\.md$"), "audit"),
+    (re.compile(r"^todo_list\.txt$"), "todo"),
+    (re.compile(r"^imitate_\w+\.md$"), "imitate"),
+    (re.compile(r"^output\.html$"), "html"),
+    (re.compile(r"^hot_keywords\.jsonl$"), "hotlist"),
+]
+# 这些类型的正文进入全文索引（HTML 与终稿 Markdown 重复，不再索引）
+_FTS_KINDS = {"report", "decision", "notes", "draft", "final", "audit", "imitate"}
+
+_STAGE_NAMES = {v: k for k, v in STAGE_DIRS.items()}
+_TITLE_RE = re.compile(r"\*\*标题\*\*\s*[：:]\s*(.+)|^#\s+(.+)$", re.MULTILINE)
+
+_local = threading.local()
+
+
+def get_catalog_file() -> str:
+    return os.path.join(config.DATA_DIR, "archive_catalog.sqlite")
+
+
+def artifact_kind(path: str) -> Optional[str]:
+    name = os.path.basename(path)
+    for pattern, kind in _KIND_PATTERNS:
+        if pattern.match(name):
+            return kind
+    return None
+
+
+# ================= 连接与表结构 =================
+
+def _create_schema(conn: sqlite3.Connection) -> str:
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS artifacts (
+            path TEXT PRIMARY KEY,
+            date TEXT NOT NULL,
+            stage TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            sha1 TEXT,
+            size INTEGER,
+            mtime REAL,
+            title TEXT,
+            keywords TEXT,
+            duration_ms REAL,
+            recorded_at TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_artifacts_date ON artifacts(date);
+        CREATE INDEX IF NOT EXISTS idx_artifacts_kind_date ON artifacts(kind, date);
+        CREATE INDEX IF NOT EXISTS idx_artifacts_stage_mtime ON artifacts(stage, mtime);
+        CREATE TABLE IF NOT EXISTS catalog_meta (key TEXT PRIMARY KEY, value TEXT);
+    """)
+    row = conn.execute("SELECT value FROM catalog_meta WHERE key = 'fts_mode'").fetchone()
+    if row:
+        return row[0]
+    # 按能力依次尝试：FTS5 trigram -> FTS5 unicode61 -> 普通表 + LIKE
+    for mode, ddl in (
+        ("trigram", "CREATE VIRTUAL TABLE artifacts_fts USING fts5(path UNINDEXED, title, body, tokenize='trigram')"),
+        ("unicode61", "CREATE VIRTUAL TABLE artifacts_fts USING fts5(path UNINDEXED, title, body)"),
+        ("like", "CREATE TABLE artifacts_fts (path TEXT PRIMARY KEY, title TEXT, body TEXT)"),
+    ):
+        try:
+            conn.execute(ddl)
+        except sqlite3.OperationalError:
+            continue
+        conn.execute("INSERT OR REPLACE INTO catalog_meta VALUES ('fts_mode', ?)", (mode,))
+        conn.execute("INSERT OR REPLACE INTO catalog_meta VALUES ('schema_version', ?)", (str(SCHEMA_VERSION),))
+        if mode != "trigram":
+            logger.info("🗃️ 当前 SQLite 不支持 FTS5 trigram，全文检索降级为 %s", mode)
+        return mode
+    return "like"
+
+
+@contextmanager
+def _connect() -> Iterator[sqlite3.Connection]:
+    """每个线程复用一个连接（WAL 模式，CLI 与 Streamlit 可并发读写）"""
+    path = get_catalog_file()
+    conn = getattr(_local, "conn", None)
+    if conn is None or getattr(_local, "path", None) != path:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        conn = sqlite3.connect(path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        _local.conn, _local.path = conn, path
+        _local.fts_mode = _create_schema(conn)
+        conn.commit()
+    try:
+        yield conn
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+# ================= 写入 =================
+
+def _split_archive_path(path: str):
+    """data/archive/<date>/<stage_dir>/<file> -> (相对路径, date, stage)"""
+    rel = os.path.relpath(os.path.abspath(path), os.path.abspath(config.ARCHIVE_DIR))
+    parts = rel.replace("\\", "/").split("/")
+    if rel.startswith("..") or len(parts) < 2:
+        return None
+    date = parts[0]
+    stage = _STAGE_NAMES.get(parts[1], "root") if len(parts) > 2 else "root"
+    return "/".join(parts), date, stage
+
+
+def _extract_title(kind: str, text: str) -> str:
+    if kind == "html":
+        return ""
+    m = _TITLE_RE.search(text)
+    if not m:
+        return ""
+    return (m.group(1) or m.group(2) or "").strip()[:200]
+
+
+def _extract_keywords(text: str, top: int = 8) -> str:
+    from agents.keyword_automaton import get_keyword_catalog
+    ranked = get_keyword_catalog().score(text, top=top)
+    return ",".join(ranked.keys())
+
+
+def _upsert(conn: sqlite3.Connection, path: str, duration_ms: Optional[float] = None, title: Optional[str] = None) -> bool:
+    split = _split_archive_path(path)
+    kind = artifact_kind(path)
+    if split is None or kind is None or not os.path.exists(path):
+        return False
+    rel, date, stage = split
+    with open(path, "rb") as f:
+        data = f.read()
+    text = data.decode("utf-8-sig", errors="ignore")
+    st = os.stat(path)
+    title = title or _extract_title(kind, text)
+    if duration_ms is None:
+        # 重新登记时保留此前记录的生成耗时
+        row = conn.execute("SELECT duration_ms FROM artifacts WHERE path = ?", (rel,)).fetchone()
+        duration_ms = row["duration_ms"] if row else None
+    conn.execute(
+        "INSERT OR REPLACE INTO artifacts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (rel, date, stage, kind, hashlib.sha1(data).hexdigest(), st.st_size, st.st_mtime, title,
+         _extract_keywords(text) if kind in _FTS_KINDS else "", duration_ms,
+         datetime.now().strftime("%Y-%m-%d %H:%M:%S")),
+    )
+    conn.execute("DELETE FROM artifacts_fts WHERE path = ?", (rel,))
+    if kind in _FTS_KINDS:
+        conn.execute("INSERT INTO artifacts_fts (path, title, body) VALUES (?, ?, ?)", (rel, title, text))
+    return True
+
+
+def record_artifact(path: str, duration_ms: Optional[float] = None, title: Optional[str] = None) -> None:
+    """智能体写文件后调用：登记/更新该产物。目录失败只告警，不影响主流程"""
+    try:
+        with _connect() as conn:
+            _upsert(conn, path, duration_ms=duration_ms, title=title)
+    except Exception as e:
+        logger.warning("⚠️ 归档目录登记失败 %s: %s", os.path.basename(path), e)
+
+
+def rebuild(full: bool = False) -> Dict[str, int]:
+    """
+    扫描整个归档补建目录：新增/变化（mtime 或大小不同）的文件重新登记，已删除的文件移出目录。
+    full=True 时全部重新登记。
+    """
+    stats = {"added": 0, "updated": 0, "unchanged": 0, "removed": 0}
+    archive = config.ARCHIVE_DIR
+    with _connect() as conn:
+        known = {r["path"]: (r["mtime"], r["size"]) for r in conn.execute("SELECT path, mtime, size FROM artifacts")}
+        seen = set()
+        for root, _, files in os.walk(archive):
+            for name in files:
+                path = os.path.join(root, name)
+                split = _split_archive_path(path)
+                if split is None or artifact_kind(path) is None:
+                    continue
+                rel = split[0]
+                seen.add(rel)
+                st = os.stat(path)
+                if not full and known.get(rel) == (st.st_mtime, st.st_size):
+                    stats["unchanged"] += 1
+                    continue
+                if _upsert(conn, path):
+                    stats["updated" if rel in known else "added"] += 1
+        for rel in set(known) - seen:
+            conn.execute("DELETE FROM artifacts WHERE path = ?", (rel,))
+            conn.execute("DELETE FROM artifacts_fts WHERE path = ?", (rel,))
+            stats["removed"] += 1
+    return stats
+
+
+# ================= 查询 =================
+
+def _row_to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+    item = dict(row)
+    item["abs_path"] = os.path.join(config.ARCHIVE_DIR, *item["path"].split("/"))
+    return item
+
+
+def recent(kind: Optional[str] = None, stage: Optional[str] = None, date: Optional[str] = None, limit: int = 5) -> List[Dict[str, Any]]:
+    """按 mtime 倒序列出产物（替代 glob + stat 排序）"""
+    clauses, params = [], []
+    for col, value in (("kind", kind), ("stage", stage), ("date", date)):
+        if value:
+            clauses.append(f"{col} = ?")
+            params.append(value)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    with _connect() as conn:
+        rows = conn.execute(f"SELECT * FROM artifacts {where} ORDER BY mtime DESC LIMIT ?", (*params, limit)).fetchall()
+    return [_row_to_dict(r) for r in rows]
+
+
+def list_artifacts(kind: Optional[str] = None, since: Optional[str] = None, until: Optional[str] = None) -> List[Dict[str, Any]]:
+    """按日期范围列出某类产物（日期升序），供趋势分析等批量读取"""
+    clauses, params = [], []
+    if kind:
+        clauses.append("kind = ?")
+        params.append(kind)
+    if since:
+        clauses.append("date >= ?")
+        params.append(since)
+    if until:
+        clauses.append("date <= ?")
+        params.append(until)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    with _connect() as conn:
+        rows = conn.execute(f"SELECT * FROM artifacts {where} ORDER BY date, path", params).fetchall()
+    return [_row_to_dict(r) for r in rows]
+
+
+def search(
+    query: str,
+    kind: Optional[str] = None,
+    stage: Optional[str] = None,
+    days: Optional[int] = None,
+    limit: int = 20,
+) -> List[Dict[str, Any]]:
+    """
+    全文检索，例如 search("Cursor", kind="final", days=90)。
+    返回按日期倒序的产物列表，每项含 snippet（命中附近的片段）。
+    """
+    query = (query or "").strip()
+    if not query:
+        return []
+    clauses, params = [], []
+    for col, value in (("a.kind", kind), ("a.stage", stage)):
+        if value:
+            clauses.append(f"{col} = ?")
+            params.append(value)
+    if days:
+        clauses.append("a.date >= ?")
+        params.append((datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d"))
+
+    with _connect() as conn:
+        mode = getattr(_local, "fts_mode", "like")
+        # trigram 需要至少 3 个字符；更短的词（如两个汉字）走 LIKE
+        if mode == "like" or (mode == "trigram" and len(query) < 3):
+            clauses.append("(f.body LIKE ? OR f.title LIKE ?)")
+            params.extend([f"%{query}%"] * 2)
+            match_sql, match_params = "", []
+        else:
+            match_sql = "artifacts_fts MATCH ? AND "
+            match_params = ['"' + query.replace('"', '""') + '"']
+        where = " AND ".join(clauses) or "1"
+        t0 = time.perf_counter()
+        rows = conn.execute(
+            f"""SELECT a.*, substr(f.body, max(1, instr(lower(f.body), lower(?)) - 40), 120) AS snippet
+                FROM artifacts_fts f JOIN artifacts a ON a.path = f.path
+                WHERE {match_sql}{where}
+                ORDER BY a.date DESC, a.mtime DESC LIMIT ?""",
+            (query, *match_params, *params, limit),
+        ).fetchall()
+        logger.debug("catalog search %r: %d rows in %.1fms", query, len(rows), (time.perf_counter() - t0) * 1000)
+    return [_row_to_dict(r) for r in rows]
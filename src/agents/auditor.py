@@ -10,6 +10,8 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import httpx
 from openai import OpenAI
+from agents.archive_catalog import record_artifact
+from agents.stream_sink import stream_chat
 from config import (
     DEEPSEEK_API_KEY, DEEPSEEK_BASE_URL, PROXY_URL, REQUEST_TIMEOUT,
     get_research_notes_file, get_final_file, get_today_file, get_logger, retryable, track_cost
@@ -92,31 +94,21 @@ def audit_article():
             
             @retryable
             @track_cost(context="audit_article")
-            def _chat_create():
+            def _chat_create(request_messages):
                 return client.chat.completions.create(
                     model="deepseek-chat", # 使用 chat 模型即可，reasoner 可能过慢且昂贵
-                    messages=[
-                        {"role": "system", "content": SYSTEM_PROMPT},
-                        {"role": "user", "content": user_prompt}
-                    ],
+                    messages=request_messages,
                     stream=True
                 )
             
-            response = _chat_create()
-            
-            # 流式接收
-            collected = []
+            # 流式接收（v5.1: 边生成边写 .partial，中断时续写）
             print("\n" + "="*20 + " 审计报告 " + "="*20)
-            for chunk in response:
-                content = chunk.choices[0].delta.content
-                if content:
-                    sys.stdout.write(content)
-                    sys.stdout.flush()
-                    collected.append(content)
+            report_content = stream_chat("audit", _chat_create, [
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": user_prompt}
+            ])
             print("\n" + "="*50 + "\n")
             
-            report_content = "".join(collected)
-            
             # 3. 保存报告
             # 保存到 publish 目录
             report_file = get_today_file("audit_report.md", "publish")
@@ -124,6 +116,7 @@ def audit_article():
                 f.write(report_content)
                 
             logger.info(f"📄 审计报告已保存: {report_file}")
+            record_artifact(report_file)
             
             # 简单判断结果
             if "✅" in report_content:
@@ -0,0 +1,74 @@
+"""
+🛑 协作式取消 (Cooperative Cancellation)
+
+Ctrl+C 时设置进程级取消标志：
+- 主线程照常收到 KeyboardInterrupt，正在进行的 HTTP 读取立即中断；
+- 线程池中的搜索/抓取任务在下一个检查点 (check_cancelled) 主动退出，不再发起新请求；
+- LLM 流式读取 (iter_stream) 在下一个 chunk 处停止并关闭底层连接。
+再次按 Ctrl+C 则立即强制退出。
+"""
+import os
+import signal
+import threading
+from typing import Iterable, Iterator, TypeVar
+
+T = TypeVar("T")
+
+_CANCEL_EVENT = threading.Event()
+
+
+class CancelledError(KeyboardInterrupt):
+    """工作流被用户取消。继承 KeyboardInterrupt，不会被各智能体的 `except Exception` 吞掉。"""
+
+
+def request_cancel() -> None:
+    _CANCEL_EVENT.set()
+
+
+def reset() -> None:
+    _CANCEL_EVENT.clear()
+
+
+def is_cancelled() -> bool:
+    return _CANCEL_EVENT.is_set()
+
+
+def check_cancelled() -> None:
+    """检查点：已取消则抛出 CancelledError（供线程池任务和循环调用）"""
+    if _CANCEL_EVENT.is_set():
+        raise CancelledError("用户已取消")
+
+
+def iter_stream(response: Iterable[T]) -> Iterator[T]:
+    """
+    包装 LLM 流式响应：每个 chunk 之前检查取消标志，
+    取消或异常退出时关闭底层 HTTP 连接，避免继续为已放弃的生成付费。
+    """
+    finished = False
+    try:
+        for chunk in response:
+            check_cancelled()
+            yield chunk
+        finished = True
+    finally:
+        if not finished:
+            close = getattr(response, "close", None)
+            if close is not None:
+                try:
+                    close()
+                except Exception:
+                    pass
+
+
+def install_sigint_handler() -> None:
+    """
+    安装 SIGINT 处理器（仅主线程可调用）：
+    第一次 Ctrl+C 设置取消标志并抛出 KeyboardInterrupt；第二次直接退出 (130)。
+    """
+    def _handler(signum, frame):
+        if _CANCEL_EVENT.is_set():
+            os._exit(130)
+        request_cancel()
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGINT, _handler)
@@ -0,0 +1,189 @@
+"""
+💾 阶段检查点 (Crash-safe Checkpoints)
+
+run_all / research 中途崩溃（爬取到一半、推理流跑了 3 分钟）时，搜索结果、已爬正文、已生成的长文本都只在内存里，
+重跑要把网络与 token 成本全部再付一遍。这里把各阶段的中间状态随时写入当日归档：
+
+    {当日目录}/.checkpoints/<stage>.json   # 各步骤结果，原子写入（tmp + os.replace）
+    {当日目录}/.checkpoints/run.json       # 正在运行的命令；正常结束即删除，残留即表示上次中断
+    {DATA_DIR}/last_run.json               # 指向最近一次运行标记所在的日期目录（-d 指定日期、跨零点的运行也能找到）
+
+- 检查点带输入指纹（选题、查询、策划书……），输入变了旧检查点自动作废；可设置有效期（如 hunt 只复用 3 小时内的搜索）；
+- 阶段产出写盘后 clear()，检查点只在“中断”与“完成”之间存在；
+- `python run.py resume` 读取 run.json，按原参数重新执行命令，各阶段从检查点续跑。
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import config
+from config import get_logger
+
+logger = get_logger(__name__)
+
+CHECKPOINT_DIRNAME = ".checkpoints"
+CHECKPOINT_VERSION = 1
+RUN_MARKER = "run.json"
+LAST_RUN_POINTER = "last_run.json"
+
+_MISSING = object()
+
+
+def get_checkpoint_dir(day_dir: Optional[str] = None) -> str:
+    return os.path.join(day_dir or config.get_today_dir(), CHECKPOINT_DIRNAME)
+
+
+def _atomic_dump(path: str, payload: Any) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def fingerprint(*parts: Any) -> str:
+    raw = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+class Checkpoint:
+    """
+    单个阶段的检查点。
+
+    Args:
+        stage: 阶段名（文件名）
+        key: 输入指纹，与已保存的不一致时丢弃旧检查点
+        max_age: 有效期（秒），超过则不复用；None 表示当天内一直有效
+    """
+
+    def __init__(self, stage: str, key: str, max_age: Optional[float] = None, day_dir: Optional[str] = None):
+        self.stage = stage
+        self.key = key
+        self.path = os.path.join(get_checkpoint_dir(day_dir), f"{stage}.json")
+        self._lock = threading.Lock()
+        self.steps: Dict[str, Any] = self._load(max_age)
+        if self.steps:
+            logger.info("💾 [%s] 发现上次中断的检查点: %s", stage, ", ".join(self.steps))
+
+    def _load(self, max_age: Optional[float]) -> Dict[str, Any]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if data.get("version") != CHECKPOINT_VERSION or data.get("key") != self.key:
+            return {}
+        if max_age is not None and time.time() - data.get("updated", 0) > max_age:
+            logger.info("💾 [%s] 检查点已过期，重新执行", self.stage)
+            return {}
+        return data.get("steps", {})
+
+    def get(self, step: str, default: Any = None) -> Any:
+        with self._lock:
+            return self.steps.get(step, default)
+
+    def put(self, step: str, value: Any) -> None:
+        """保存一个步骤的结果（可反复覆盖，如爬取进度）"""
+        with self._lock:
+            self.steps[step] = value
+            payload = {"version": CHECKPOINT_VERSION, "key": self.key, "updated": time.time(), "steps": self.steps}
+            try:
+                _atomic_dump(self.path, payload)
+            except (OSError, TypeError, ValueError) as e:
+                logger.warning("⚠️ [%s] 检查点写入失败: %s", self.stage, e)
+
+    def step(self, name: str, fn: Callable[[], Any], keep: Callable[[Any], bool] = bool) -> Any:
+        """已有检查点时直接返回，否则执行 fn() 并保存（keep(result) 为假时不保存，如空结果/失败）"""
+        cached = self.get(name, _MISSING)
+        if cached is not _MISSING:
+            logger.info("♻️ [%s] 从检查点恢复: %s", self.stage, name)
+            return cached
+        result = fn()
+        if keep(result):
+            self.put(name, result)
+        return result
+
+    def clear(self) -> None:
+        """阶段产出已落盘，检查点不再需要"""
+        with self._lock:
+            self.steps = {}
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+
+# ================= 运行标记 (resume) =================
+
+def _pointer_path() -> str:
+    return os.path.join(config.DATA_DIR, LAST_RUN_POINTER)
+
+
+def mark_running(command: str, argv: List[str]) -> str:
+    """
+    命令开始：记录原始参数，中断后 resume 据此重跑。
+    返回标记所在的日期目录，结束时原样传给 mark_finished()（运行可能跨零点，届时“今天”已变）。
+    """
+    day_dir = config.get_today_dir()
+    _atomic_dump(os.path.join(get_checkpoint_dir(day_dir), RUN_MARKER), {
+        "command": command,
+        "argv": list(argv),
+        "started_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    })
+    try:
+        _atomic_dump(_pointer_path(), {"day_dir": day_dir})
+    except OSError as e:
+        logger.warning("⚠️ 运行标记指针写入失败: %s", e)
+    return day_dir
+
+
+def mark_finished(day_dir: Optional[str] = None) -> None:
+    """命令正常结束：删除 day_dir（mark_running 的返回值，缺省为当前日期）下的标记及指向它的指针"""
+    day_dir = day_dir or config.get_today_dir()
+    try:
+        os.remove(os.path.join(get_checkpoint_dir(day_dir), RUN_MARKER))
+    except OSError:
+        pass
+    if _read_pointer() == day_dir:
+        try:
+            os.remove(_pointer_path())
+        except OSError:
+            pass
+
+
+def _read_pointer() -> Optional[str]:
+    try:
+        with open(_pointer_path(), "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return data.get("day_dir") if isinstance(data, dict) else None
+
+
+def _read_marker(day_dir: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(os.path.join(get_checkpoint_dir(day_dir), RUN_MARKER), "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or not data.get("command"):
+        return None
+    data["day_dir"] = day_dir
+    return data
+
+
+def load_interrupted_run(follow_pointer: bool = True) -> Optional[Dict[str, Any]]:
+    """
+    上次未正常结束的命令 {command, argv, started_at, day_dir}；没有则返回 None。
+    先查当前工作日期；follow_pointer 时再按 last_run.json 查最近一次运行所在的日期
+    （以 -d 指定日期启动、或跨零点崩溃的运行）。
+    """
+    run = _read_marker(config.get_today_dir())
+    if run or not follow_pointer:
+        return run
+    day_dir = _read_pointer()
+    return _read_marker(day_dir) if day_dir and os.path.isdir(day_dir) else None
@@ -0,0 +1,130 @@
+"""
+⚡ 服务商熔断 (Circuit Breaker)
+
+Perplexity 或 Jina 宕机时，一次 hunt 的 ~40 个查询会各自等满 30–45 秒超时、
+再被 retryable 重试，之后才降级到下一个服务商。熔断器让一次故障只付一次超时的代价：
+- closed：正常放行，连续失败（含超时）达到 failure_threshold 次即跳闸；
+- open：冷却期内直接跳过该服务商，调用方立即走下一级（WebSearchTool.search / _fetch_with_fallback）；
+- half-open：冷却结束后只放行一个探测请求，成功则恢复 closed，失败则重新 open；
+  探测被取消（Ctrl+C 等）未记录结果时由 release() 释放，超过一个冷却期仍无结果的探测也视为作废。
+
+settings.yaml 配置（可选）：
+    circuit_breaker:
+      failure_threshold: 3
+      cooldown: 60
+"""
+import threading
+import time
+from typing import Dict, Optional
+
+import config
+from config import get_logger
+
+logger = get_logger(__name__)
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+DEFAULT_FAILURE_THRESHOLD = 3
+DEFAULT_COOLDOWN = 60.0
+
+
+class CircuitOpenError(RuntimeError):
+    """服务商处于熔断状态，请求未发出"""
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD, cooldown: float = DEFAULT_COOLDOWN):
+        self.name = name
+        self.failure_threshold = max(int(failure_threshold), 1)
+        self.cooldown = float(cooldown)
+        self.state = CLOSED
+        self.failures = 0
+        self.skipped = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._probe_started = 0.0
+        self._probe_thread: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """是否放行本次请求；open 状态冷却结束后转 half-open 并只放行一个探测"""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            now = time.monotonic()
+            if self.state == OPEN and now - self._opened_at >= self.cooldown:
+                self.state = HALF_OPEN
+                self._probing = False
+            if self.state == HALF_OPEN and self._probing and now - self._probe_started >= self.cooldown:
+                # 探测请求超过一个冷却期仍无结果（被取消后未 release、线程卡死），放行新的探测
+                self._probing = False
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                self._probe_started = now
+                self._probe_thread = threading.get_ident()
+                logger.info("⚡ %s 冷却结束，发送探测请求", self.name)
+                return True
+            self.skipped += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state != CLOSED:
+                logger.info("✅ %s 探测成功，熔断解除", self.name)
+            self.state = CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    logger.warning("⚡ %s 连续失败 %d 次，熔断 %.0fs（期间直接降级）", self.name, self.failures, self.cooldown)
+                self.state = OPEN
+                self._opened_at = time.monotonic()
+                self._probing = False
+
+    def release(self) -> None:
+        """
+        请求结束后调用（finally）：本线程的探测没有记录结果就退出时（CancelledError 等 BaseException），
+        释放探测名额，避免熔断器卡在 half-open 拒绝之后的所有请求。已记录结果时无操作。
+        """
+        with self._lock:
+            if self._probing and self._probe_thread == threading.get_ident():
+                self._probing = False
+
+    def record(self, ok: bool) -> None:
+        if ok:
+            self.record_success()
+        else:
+            self.record_failure()
+
+
+_BREAKERS: Dict[str, CircuitBreaker] = {}
+_BREAKERS_LOCK = threading.Lock()
+
+
+def get_breaker_settings() -> dict:
+    raw = config.SETTINGS.get("circuit_breaker") or {}
+    return raw if isinstance(raw, dict) else {}
+
+
+def get_circuit_breaker(provider: str) -> CircuitBreaker:
+    """进程级单例：同一服务商共享熔断状态"""
+    with _BREAKERS_LOCK:
+        breaker = _BREAKERS.get(provider)
+        if breaker is None:
+            settings = get_breaker_settings()
+            breaker = _BREAKERS[provider] = CircuitBreaker(
+                provider,
+                failure_threshold=settings.get("failure_threshold", DEFAULT_FAILURE_THRESHOLD),
+                cooldown=settings.get("cooldown", DEFAULT_COOLDOWN),
+            )
+        return breaker
+
+
+def skipped_summary() -> Optional[str]:
+    """本进程内因熔断跳过的请求数，供运行结束时汇总"""
+    with _BREAKERS_LOCK:
+        parts = [f"{b.name} {b.skipped} 次" for b in _BREAKERS.values() if b.skipped]
+    return "、".join(parts) if parts else None
@@ -15,14 +15,22 @@ import json
 import httpx
 import shutil
 from openai import OpenAI
+from agents.checkpoints import Checkpoint, fingerprint
+from agents.stream_sink import stream_chat
 from config import DEEPSEEK_API_KEY, DEEPSEEK_BASE_URL, PROXY_URL, REQUEST_TIMEOUT, get_research_notes_file, get_draft_file, get_final_file, get_today_dir, get_stage_dir, get_logger, retryable, track_cost
-from agents.illustrator import IllustratorAgent
+from agents.archive_catalog import record_artifact
 
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 
 
 import time
-from agents import screenshotter
+import uuid
+
+# illustrator / screenshotter 依赖较重 (playwright)，仅在真正需要配图/截图时才导入
+if TYPE_CHECKING:
+    from agents.illustrator import IllustratorAgent
 
 logger = get_logger(__name__)
 
@@ -240,6 +248,118 @@ def get_system_prompt(topic: str = None, strategic_intent: str = None, visual_sc
 ```
 """
 
+# ================= v5.1: 流式预取配图/截图 =================
+
+AUTO_IMG_LINE = re.compile(r'>\s*AUTO_IMG:\s*(.+)')
+COVER_PROMPT_LINE = re.compile(r'>\s*COVER_PROMPT:\s*(.+)')
+TODO_LINE = re.compile(r'>\s*TODO:\s*\[(.*?)\]\s*\((.*?)\)')
+PREFETCH_WORKERS = 3
+
+_MISSING = object()
+
+
+def _screenshot_url(params_str: str) -> Optional[str]:
+    """TODO 参数中 type="screenshot" 且带 url 时返回 url"""
+    if 'type="screenshot"' not in params_str and "type='screenshot'" not in params_str:
+        return None
+    url_match = re.search(r'url=["\'](.*?)["\']', params_str)
+    return url_match.group(1) if url_match else None
+
+
+def _capture_screenshot(url: str) -> Optional[str]:
+    """截取官网首页存入 5_assets，返回 Markdown 中的相对路径；失败返回 None"""
+    # url 哈希 + 随机后缀：并发预取时同一秒内多张截图不会互相覆盖
+    filename = f"screenshot_{int(time.time())}_{abs(hash(url)) % 10000}_{uuid.uuid4().hex[:4]}.png"
+    output_path = os.path.join(get_stage_dir('assets'), filename)
+    from agents import screenshotter
+    if screenshotter.capture_homepage(url, output_path):
+        # draft 在 3_drafts，引用 5_assets 用相对路径
+        return f"../5_assets/{filename}"
+    return None
+
+
+class AssetPrefetcher:
+    """
+    边生成边派发配图/截图任务。
+
+    Reasoner 一篇初稿要流几分钟，以前等全文结束才串行生成封面、素材图、截图，每张又是几十秒。
+    这里挂在 stream_chat 的 echo 上逐行扫描：`> AUTO_IMG:`、`> COVER_PROMPT:`、
+    `> TODO: [...] (type="screenshot", url=...)` 行一完整就提交到线程池，与剩余正文的生成并行；
+    后处理阶段按占位符 take() 取结果，没有预取到的（检查点恢复、.partial 续写前的部分）照旧同步生成。
+
+    Args:
+        illustrator: 已启用的 IllustratorAgent；None 表示不预取配图
+        screenshots: 是否预取截图
+        workers: 并发任务数
+    """
+
+    def __init__(self, illustrator: Optional["IllustratorAgent"] = None, screenshots: bool = True, workers: int = PREFETCH_WORKERS):
+        self.illustrator = illustrator
+        self.screenshots = screenshots
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="draft-assets")
+        self._jobs: Dict[Tuple, List[Any]] = {}
+        self._buffer = ""
+        self._cover_seen = False
+
+    def feed(self, chunk: str) -> None:
+        """接收一段流式正文，扫描其中已完整的行"""
+        self._buffer += chunk
+        *lines, self._buffer = self._buffer.split("\n")
+        for line in lines:
+            self._scan(line)
+
+    def finish(self) -> None:
+        """流结束：扫描最后一行（没有换行结尾）"""
+        if self._buffer:
+            self._scan(self._buffer)
+            self._buffer = ""
+
+    def _submit(self, key: Tuple, fn, *args) -> None:
+        self._jobs.setdefault(key, []).append(self._pool.submit(fn, *args))
+
+    def _scan(self, line: str) -> None:
+        if self.illustrator is not None:
+            match = AUTO_IMG_LINE.search(line)
+            if match:
+                description = match.group(1).strip()
+                logger.info("\n⚡ 预取素材图: %s...", description[:40])
+                self._submit(("img", description), self.illustrator.generate_material, description)
+                return
+            match = COVER_PROMPT_LINE.search(line)
+            if match and not self._cover_seen:
+                # add_cover_image 只使用第一个 COVER_PROMPT
+                self._cover_seen = True
+                prompt = match.group(1).strip()
+                logger.info("\n⚡ 预取封面: %s...", prompt[:40])
+                self._submit(("cover", prompt), self.illustrator.generate_cover, prompt, True)
+                return
+        if self.screenshots:
+            for match in TODO_LINE.finditer(line):
+                url = _screenshot_url(match.group(2))
+                if url:
+                    logger.info("\n⚡ 预取截图: %s", url)
+                    self._submit(("shot", match.group(1), url), _capture_screenshot, url)
+
+    def take(self, key: Tuple) -> Any:
+        """
+        取出一个预取结果（等待其完成）。
+        未预取过返回 _MISSING，调用方应同步生成；任务异常视为生成失败返回 None。
+        """
+        futures = self._jobs.get(key)
+        if not futures:
+            return _MISSING
+        future = futures.pop(0)
+        try:
+            return future.result()
+        except Exception as e:
+            logger.warning("   ⚠️ 预取任务失败 %s: %s", key[0], e)
+            return None
+
+    def close(self) -> None:
+        """取消尚未开始的任务（如生成失败、占位符被改写）"""
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
 def read_notes(filepath):
     if not os.path.exists(filepath):
         logger.error("❌ 找不到 %s", filepath)
@@ -247,7 +367,8 @@ def read_notes(filepath):
     with open(filepath, "r", encoding="utf-8") as f:
         return f.read()
 
-def generate_draft(notes, topic: str = None, strategic_intent: str = None, visual_script: dict = None, mode: str = "expert", dry_run: bool = False):
+def generate_draft(notes, topic: str = None, strategic_intent: str = None, visual_script: dict = None, mode: str = "expert", dry_run: bool = False,
+                   prefetch: Optional[AssetPrefetcher] = None):
     logger.info("🚀 调用 DeepSeek Reasoner (Mode: %s)%s...", mode, " (🧪 DRY RUN)" if dry_run else "")
     
     if dry_run:
@@ -293,33 +414,34 @@ def generate_draft(notes, topic: str = None, strategic_intent: str = None, visua
         try:
             @retryable
             @track_cost(context="generate_draft")
-            def _chat_create():
-                return client.chat.completions.create(model="deepseek-reasoner", messages=messages, stream=True)
+            def _chat_create(request_messages):
+                return client.chat.completions.create(model="deepseek-reasoner", messages=request_messages, stream=True)
+
+            def _echo(text):
+                sys.stdout.write(text)
+                sys.stdout.flush()
+                if prefetch is not None:
+                    prefetch.feed(text)
 
-            response = _chat_create()
             logger.info("%s", "="*20 + " 生成中 " + "="*20)
-            collected = []
-            for chunk in response:
-                if chunk.choices[0].delta.content:
-                    c = chunk.choices[0].delta.content
-                    sys.stdout.write(c)
-                    sys.stdout.flush()
-                    collected.append(c)
+            # v5.1: 边生成边写 .partial，流中断时基于已生成部分续写；占位符行到达即预取配图/截图
+            draft = stream_chat("draft", _chat_create, messages, echo=_echo)
             sys.stdout.write("\n\n" + "="*50 + "\n")
             sys.stdout.flush()
-            return "".join(collected)
+            return draft
         except Exception as e:
             logger.error("❌ 生成失败: %s", e)
             return None
 
 
-def process_auto_images(content: str, illustrator: IllustratorAgent) -> str:
+def process_auto_images(content: str, illustrator: "IllustratorAgent", prefetch: Optional[AssetPrefetcher] = None) -> str:
     """
     v4.1: 后处理逻辑 - 扫描并替换 AUTO_IMG 占位符
     
     Args:
         content: 文章 Markdown 内容
         illustrator: IllustratorAgent 实例
+        prefetch: v5.1 生成期间已派发的预取任务（可选）
     
     Returns:
         替换后的文章内容
@@ -342,8 +464,10 @@ def process_auto_images(content: str, illustrator: IllustratorAgent) -> str:
         description = description.strip()
         logger.info(f"   [{i}/{len(matches)}] 生成: {description[:40]}...")
         
-        # 生成素材图
-        image_path = illustrator.generate_material(description)
+        # 生成素材图（v5.1: 优先取流式预取结果）
+        image_path = prefetch.take(("img", description)) if prefetch else _MISSING
+        if image_path is _MISSING:
+            image_path = illustrator.generate_material(description)
         
         if image_path:
             # 替换占位符为真实图片
@@ -357,7 +481,7 @@ def process_auto_images(content: str, illustrator: IllustratorAgent) -> str:
     return content
 
 
-def process_screenshots(content: str) -> str:
+def process_screenshots(content: str, prefetch: Optional[AssetPrefetcher] = None) -> str:
     """
     v4.3: 扫描 TODO 标签，自动处理网页截图
     格式: > TODO: [...] (type="screenshot", url="...")
@@ -381,41 +505,21 @@ def process_screenshots(content: str) -> str:
         params_str = match.group(2)
         
         # 检查是否包含 type="screenshot" 和 url
-        if 'type="screenshot"' in params_str or "type='screenshot'" in params_str:
-            # 提取 URL
-            url_match = re.search(r'url=["\'](.*?)["\']', params_str)
-            if url_match:
-                url = url_match.group(1)
-                logger.info(f"   🔭 发现截图任务: {desc} -> {url}")
-                
-                # 定义保存路径
-                filename = f"screenshot_{int(time.time())}_{abs(hash(url)) % 10000}.png"
-                assets_dir = get_stage_dir('assets')
-                output_path = os.path.join(assets_dir, filename)
-                
-                # 相对路径用于 Markdown
-                # 假设运行目录是项目根目录，图片在 5_assets
-                # 但最终 md 可能在 3_drafts 或 4_publish，引用 5_assets 需要 ../5_assets 或者绝对路径
-                # 为了兼容性，通常使用相对路径。
-                # 如果 draft.md 在 3_drafts/draft.md, assets 在 5_assets/
-                # 引用应该是 ../5_assets/xxx.png
-                # 但这里我们简单起见，假设 draft.md 和 assets 都在 working date 目录下
-                # 我们使用相对路径 "5_assets/xxx.png" 如果最终发布是把所有东西打包
-                # 或者使用 "../5_assets/filename"
-                
-                # 修正：get_stage_dir 返回的是 absolute path
-                # 我们需要生成 markdown 中使用的路径
-                # 简单处理：使用相对路径 "../5_assets/" (因为 draft 在 3_drafts)
-                md_rel_path = f"../5_assets/{filename}"
-                
-                # 执行截图
-                if screenshotter.capture_homepage(url, output_path):
-                    replacement = f"![官网截图]({md_rel_path})\n> *自动截图: {desc}*"
-                    new_content = new_content.replace(full_match, replacement, 1)
-                else:
-                    logger.warning(f"   ⚠️ 截图失败，将标注为需要人工截图")
-                    failure_note = f"> ⚠️ AUTO-SCREENSHOT FAILED: {desc}. Please capture manually."
-                    new_content = new_content.replace(full_match, failure_note, 1)
+        url = _screenshot_url(params_str)
+        if url:
+            logger.info(f"   🔭 发现截图任务: {desc} -> {url}")
+            
+            # 执行截图（v5.1: 优先取流式预取结果）
+            md_rel_path = prefetch.take(("shot", desc, url)) if prefetch else _MISSING
+            if md_rel_path is _MISSING:
+                md_rel_path = _capture_screenshot(url)
+            if md_rel_path:
+                replacement = f"![官网截图]({md_rel_path})\n> *自动截图: {desc}*"
+                new_content = new_content.replace(full_match, replacement, 1)
+            else:
+                logger.warning(f"   ⚠️ 截图失败，将标注为需要人工截图")
+                failure_note = f"> ⚠️ AUTO-SCREENSHOT FAILED: {desc}. Please capture manually."
+                new_content = new_content.replace(full_match, failure_note, 1)
     
     return new_content
 
@@ -443,7 +547,7 @@ def extract_cover_prompt(content: str) -> tuple[str, str]:
     return None, content
 
 
-def add_cover_image(content: str, topic: str, illustrator: IllustratorAgent) -> str:
+def add_cover_image(content: str, topic: str, illustrator: "IllustratorAgent", prefetch: Optional[AssetPrefetcher] = None) -> str:
     """
     v4.2: 在文章开头插入 AI 生成的封面图
     优先使用 COVER_PROMPT 英文描述，降级使用中文标题
@@ -452,6 +556,7 @@ def add_cover_image(content: str, topic: str, illustrator: IllustratorAgent) ->
         content: 文章 Markdown 内容
         topic: 文章主题/标题
         illustrator: IllustratorAgent 实例
+        prefetch: v5.1 生成期间已派发的预取任务（可选）
     
     Returns:
         带封面图的文章内容
@@ -467,7 +572,9 @@ def add_cover_image(content: str, topic: str, illustrator: IllustratorAgent) ->
     
     if cover_prompt:
         logger.info(f"   🎨 使用英文 COVER_PROMPT 生成封面")
-        cover_path = illustrator.generate_cover(cover_prompt, use_raw_prompt=True)
+        cover_path = prefetch.take(("cover", cover_prompt)) if prefetch else _MISSING
+        if cover_path is _MISSING:
+            cover_path = illustrator.generate_cover(cover_prompt, use_raw_prompt=True)
     else:
         logger.warning(f"   ⚠️ 未找到 COVER_PROMPT，降级使用中文标题")
         cover_path = illustrator.generate_cover(topic or "AI 技术文章")
@@ -482,6 +589,54 @@ def add_cover_image(content: str, topic: str, illustrator: IllustratorAgent) ->
     
     return content
 
+def _compose_draft(notes, topic, strategic_intent, visual_script, mode, auto_illustrate, dry_run, checkpoint) -> Optional[str]:
+    """
+    Step 1 ~ 2.5：生成初稿、配图、截图。
+    v5.1: 流式生成期间由 AssetPrefetcher 逐行扫描，占位符行一完整就派发配图/截图任务，
+          后处理阶段直接取用已完成的结果（未预取到的仍按原逻辑同步生成）
+    """
+    illustrator = None
+    if auto_illustrate:
+        from agents.illustrator import IllustratorAgent
+        illustrator = IllustratorAgent()
+    # dry_run 的 Mock 初稿不走流式，无需预取
+    prefetch = None if dry_run else AssetPrefetcher(illustrator if illustrator and illustrator.is_enabled() else None)
+
+    try:
+        # Step 1: 生成初稿
+        if dry_run:
+            draft = generate_draft(notes, topic=topic, strategic_intent=strategic_intent, visual_script=visual_script, mode=mode, dry_run=dry_run)
+        else:
+            draft = checkpoint.step("draft", lambda: generate_draft(
+                notes, topic=topic, strategic_intent=strategic_intent, visual_script=visual_script, mode=mode, prefetch=prefetch))
+            prefetch.finish()
+        if not draft:
+            return None
+
+        # Step 2: v4.1 自动配图处理
+        if auto_illustrate:
+            logger.info("\n" + "="*40)
+            logger.info("🎨 v4.2 智能配图系统 (光影质感流)")
+            logger.info("="*40)
+
+            if illustrator.is_enabled():
+                def _illustrate(text):
+                    # 2a. 生成封面图并插入开头
+                    text = add_cover_image(text, topic, illustrator, prefetch=prefetch)
+                    # 2b. 处理文中的 AUTO_IMG 占位符
+                    return process_auto_images(text, illustrator, prefetch=prefetch)
+
+                draft = _illustrate(draft) if dry_run else checkpoint.step("illustrated", lambda: _illustrate(draft))
+            else:
+                logger.info("⏭️ 配图功能未启用，跳过自动配图")
+                logger.info("   💡 如需启用，请配置 REPLICATE_API_TOKEN")
+
+        # Step 2.5: v4.3 自动截图处理
+        return process_screenshots(draft, prefetch=prefetch)
+    finally:
+        if prefetch is not None:
+            prefetch.close()
+
 def main(topic: str = None, strategic_intent: str = None, visual_script: dict = None, auto_illustrate: bool = False, mode: str = "expert", dry_run: bool = False):
     """
     写作智能体主入口
@@ -494,6 +649,7 @@ def main(topic: str = None, strategic_intent: str = None, visual_script: dict =
         mode: 写作模式 (expert/traffic)
         dry_run: 节流模式
     """
+    started = time.perf_counter()
     logger.info("%s", "="*60)
     logger.info("✍️ 写作智能体 v4.2 - 王往AI (Mode: %s)%s", mode, " (🧪 DRY RUN)" if dry_run else "")
     logger.info("%s", "="*60)
@@ -510,38 +666,23 @@ def main(topic: str = None, strategic_intent: str = None, visual_script: dict =
         logger.warning("💡 请先在以下位置创建研究笔记：%s", notes_file)
         return
     
-    # Step 1: 生成初稿
-    draft = generate_draft(notes, topic=topic, strategic_intent=strategic_intent, visual_script=visual_script, mode=mode, dry_run=dry_run)
+    # v5.1: 初稿与配图结果写入当日检查点，后续步骤中断后 resume 不再重新推理/配图（笔记或选题变化则作废）
+    checkpoint = Checkpoint("draft", fingerprint(topic, strategic_intent, visual_script, mode, notes, auto_illustrate))
+
+    draft = _compose_draft(notes, topic, strategic_intent, visual_script, mode, auto_illustrate, dry_run, checkpoint)
     if not draft:
         return
     
-    # Step 2: v4.1 自动配图处理
-    if auto_illustrate:
-        logger.info("\n" + "="*40)
-        logger.info("🎨 v4.2 智能配图系统 (光影质感流)")
-        logger.info("="*40)
-        
-        illustrator = IllustratorAgent()
-        
-        if illustrator.is_enabled():
-            # 2a. 生成封面图并插入开头
-            draft = add_cover_image(draft, topic, illustrator)
-            
-            # 2b. 处理文中的 AUTO_IMG 占位符
-            draft = process_auto_images(draft, illustrator)
-        else:
-            logger.info("⏭️ 配图功能未启用，跳过自动配图")
-            logger.info("   💡 如需启用，请配置 REPLICATE_API_TOKEN")
-
-    # Step 2.5: v4.3 自动截图处理
-    draft = process_screenshots(draft)
-    
     # Step 3: 保存最终草稿
     draft_file = get_draft_file()
     _backup_file(draft_file)
     with open(draft_file, "w", encoding="utf-8") as f:
         f.write(draft)
     logger.info("✅ 初稿已保存: %s", draft_file)
+    # 生成耗时（含配图/截图）
+    duration_ms = (time.perf_counter() - started) * 1000
+    record_artifact(draft_file, duration_ms=duration_ms)
+    checkpoint.clear()
     
     # Step 4 (v4.2 新增): 自动同步到 final.md (草稿即定稿)
     final_file = get_final_file()
@@ -549,6 +690,7 @@ def main(topic: str = None, strategic_intent: str = None, visual_script: dict =
     with open(final_file, "w", encoding="utf-8") as f:
         f.write(draft)
     logger.info("✅ 已同步生成 Final 版本: %s", final_file)
+    record_artifact(final_file, duration_ms=duration_ms)
     
     # Step 5: 下一步提示
     logger.info("\n📌 下一步：")
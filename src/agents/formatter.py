@@ -5,7 +5,12 @@
 import sys, os, re
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import glob
+import json
+import hashlib
+import time
 import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
 
 # 静音 cssutils 日志 (必须在 premailer 导入前设置)
@@ -19,7 +24,8 @@ from pygments.lexers import get_lexer_by_name, TextLexer
 from pygments.formatters import HtmlFormatter
 from premailer import transform
 import pyperclip
-from config import get_final_file, get_html_file, get_today_dir, get_stage_dir, get_logger
+from config import get_final_file, get_html_file, get_today_dir, get_stage_dir, get_logger, ARCHIVE_DIR, STAGE_DIRS
+from agents.archive_catalog import record_artifact
 
 
 logger = get_logger(__name__)
@@ -197,6 +203,15 @@ def get_style_css(style_name: str = "green") -> str:
 # 保持向后兼容
 WECHAT_CSS = get_style_css("green")
 
+# 渲染逻辑修订号：修改 convert_md_to_html / inline_css 的输出结构时手动 +1，
+# 使 reformat 批量重建能识别“CSS 没变但渲染逻辑变了”的情况
+RENDER_REVISION = 1
+
+def get_template_version(style_name: str = "green") -> str:
+    """样式模板版本指纹 = 渲染修订号 + 完整 CSS 的哈希"""
+    css = get_style_css(style_name)
+    return hashlib.sha1(f"{RENDER_REVISION}\n{css}".encode("utf-8")).hexdigest()[:12]
+
 def highlight_code(code, lang):
     try:
         lexer = get_lexer_by_name(lang, stripall=True)
@@ -280,6 +295,7 @@ def main(style: str = "green"):
         style = "green"
     
     style_info = STYLE_TEMPLATES[style]
+    started = time.perf_counter()
     
     logger.info("%s", "="*60)
     logger.info("🎨 排版智能体 v4.2 - %s风格", style_info["name"])
@@ -314,6 +330,10 @@ def main(style: str = "green"):
     with open(html_file, "w", encoding="utf-8") as f:
         f.write(final)
     logger.info("📄 已保存: %s", html_file)
+    record_artifact(html_file, duration_ms=(time.perf_counter() - started) * 1000)
+    # 同步更新 reformat 指纹，避免之后换风格批量重建时误判为“未变化”
+    _write_stamp(os.path.join(os.path.dirname(html_file), STAMP_FILENAME),
+                 _file_sha1(final_file), style, get_template_version(style))
     
     try:
         pyperclip.copy(final)
@@ -332,6 +352,137 @@ def main(style: str = "green"):
     logger.info("%s", "="*60)
     logger.info("💡 其他风格: %s", ", ".join(STYLE_TEMPLATES.keys()))
 
+# ============================================================================
+# 批量重建 (reformat)：样式调整后重新渲染归档中所有 final.md
+# ============================================================================
+
+STAMP_FILENAME = "output.stamp.json"
+
+def _file_sha1(path: str) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(65536), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def _load_stamp(stamp_path: str) -> dict:
+    try:
+        with open(stamp_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+def _write_stamp(stamp_path: str, final_sha1: str, style: str, template_version: str) -> None:
+    """记录 output.html 由哪个 final.md / 风格 / 模板版本渲染而来（format 与 reformat 共用）"""
+    with open(stamp_path, "w", encoding="utf-8") as f:
+        json.dump({
+            "final_sha1": final_sha1,
+            "style": style,
+            "template_version": template_version,
+            "rendered_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        }, f, ensure_ascii=False, indent=2)
+
+def _render_archived_day(job: dict) -> tuple:
+    """
+    子进程任务：渲染单日 final.md -> output.html，并写入指纹文件。
+    不触碰剪贴板，返回 (日期, 错误, 渲染耗时 ms)，异常返回给主进程汇总。
+    """
+    started = time.perf_counter()
+    try:
+        with open(job["final_file"], "r", encoding="utf-8") as f:
+            md = f.read()
+        html = inline_css(convert_md_to_html(md), style_name=job["style"])
+        tmp_file = job["html_file"] + ".tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            f.write(html)
+        os.replace(tmp_file, job["html_file"])
+        _write_stamp(job["stamp_file"], job["final_sha1"], job["style"], job["template_version"])
+        return job["date"], None, (time.perf_counter() - started) * 1000
+    except Exception as e:
+        return job["date"], str(e), None
+
+def collect_reformat_jobs(style: str = "green", force: bool = False) -> tuple:
+    """
+    扫描 data/archive/*/4_publish/final.md，返回 (待渲染任务列表, 跳过天数)。
+    (final.md 哈希, 风格, 模板版本) 与上次渲染一致且 output.html 存在时跳过。
+    """
+    template_version = get_template_version(style)
+    publish_dir = STAGE_DIRS.get("publish", "4_publish")
+    pattern = os.path.join(ARCHIVE_DIR, "*", publish_dir, "final.md")
+
+    jobs, skipped = [], 0
+    for final_file in sorted(glob.glob(pattern)):
+        day_dir = os.path.dirname(final_file)
+        html_file = os.path.join(day_dir, "output.html")
+        stamp_file = os.path.join(day_dir, STAMP_FILENAME)
+        final_sha1 = _file_sha1(final_file)
+
+        stamp = _load_stamp(stamp_file)
+        unchanged = (
+            stamp.get("final_sha1") == final_sha1
+            and stamp.get("style") == style
+            and stamp.get("template_version") == template_version
+            and os.path.exists(html_file)
+        )
+        if unchanged and not force:
+            skipped += 1
+            continue
+
+        jobs.append({
+            "date": os.path.basename(os.path.dirname(day_dir)),
+            "final_file": final_file,
+            "html_file": html_file,
+            "stamp_file": stamp_file,
+            "final_sha1": final_sha1,
+            "style": style,
+            "template_version": template_version,
+        })
+    return jobs, skipped
+
+def batch_format(style: str = "green", force: bool = False, workers: int = None) -> dict:
+    """
+    批量重建归档中所有日期的 output.html（多进程并行，不复制到剪贴板）
+
+    Args:
+        style: 排版风格
+        force: 忽略指纹，全部重新渲染
+        workers: 进程数，默认 CPU 核数
+
+    Returns:
+        {"rendered": [...], "skipped": int, "failed": {date: error}}
+    """
+    if style not in STYLE_TEMPLATES:
+        logger.warning(f"未知风格 '{style}'，可用风格: {', '.join(STYLE_TEMPLATES.keys())}")
+        style = "green"
+
+    logger.info("%s", "="*60)
+    logger.info("🗂️ 批量重建排版 - %s风格 (模板版本 %s)", STYLE_TEMPLATES[style]["name"], get_template_version(style))
+    logger.info("%s", "="*60)
+
+    jobs, skipped = collect_reformat_jobs(style=style, force=force)
+    summary = {"rendered": [], "skipped": skipped, "failed": {}}
+    logger.info("📊 待渲染 %s 天，未变化跳过 %s 天", len(jobs), skipped)
+    if not jobs:
+        logger.info("✅ 所有归档均为最新，无需重建")
+        return summary
+
+    max_workers = max(1, min(workers or os.cpu_count() or 1, len(jobs)))
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(_render_archived_day, job): job for job in jobs}
+        for future in as_completed(futures):
+            date, error, duration_ms = future.result()
+            if error:
+                summary["failed"][date] = error
+                logger.warning("   ⚠️ %s 渲染失败: %s", date, error)
+            else:
+                summary["rendered"].append(date)
+                # 归档目录在主进程登记（SQLite 连接不跨进程）
+                record_artifact(futures[future]["html_file"], duration_ms=duration_ms)
+
+    logger.info("✅ 重建完成：成功 %s 天，失败 %s 天，跳过 %s 天 (进程数 %s)",
+                len(summary["rendered"]), len(summary["failed"]), skipped, max_workers)
+    return summary
+
 if __name__ == "__main__":
     import argparse
     parser = argparse.ArgumentParser(description="微信公众号排版智能体")
@@ -339,9 +490,14 @@ if __name__ == "__main__":
                         choices=list(STYLE_TEMPLATES.keys()),
                         help="排版风格 (默认: green)")
     parser.add_argument("--list", action="store_true", help="列出所有可用风格")
+    parser.add_argument("--all", action="store_true", help="批量重建归档中所有日期的 output.html")
+    parser.add_argument("--force", action="store_true", help="[--all] 忽略指纹，全部重新渲染")
+    parser.add_argument("--workers", type=int, help="[--all] 并行进程数 (默认 CPU 核数)")
     args = parser.parse_args()
     
     if args.list:
         list_styles()
+    elif args.all:
+        batch_format(style=args.style, force=args.force, workers=args.workers)
     else:
         main(style=args.style)
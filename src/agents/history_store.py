@@ -0,0 +1,169 @@
+"""
+📜 选题历史存储 (History Store)
+
+data/history.jsonl：每行一条 {"date", "topic", "angle"}，只追加不重写。
+- 追加：单次 O_APPEND 写入整行，并在支持的平台上加文件锁，CLI 与 Streamlit 同时写入也不会交错；
+- 缓存：进程内按 (mtime, size) 缓存，文件增长时只读取新增尾部，未变化时零解析；
+- 日期索引：ISO 日期字符串可直接排序比较，按日期有序列表二分查找做范围查询，无需 strptime 全量扫描；
+- 迁移：首次使用时把旧版 history.json 转写为 JSONL（旧文件保留不动）。
+"""
+import os
+import json
+import bisect
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from config import get_history_file, get_logger
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = get_logger(__name__)
+
+
+def get_history_log_file() -> str:
+    return os.path.splitext(get_history_file())[0] + ".jsonl"
+
+
+class HistoryStore:
+    def __init__(self, path: Optional[str] = None, legacy_path: Optional[str] = None):
+        self.path = path or get_history_log_file()
+        self.legacy_path = legacy_path if legacy_path is not None else get_history_file()
+        self._entries: List[Dict[str, str]] = []
+        self._dates: List[str] = []      # 有序日期
+        self._order: List[int] = []      # 与 _dates 对齐的条目下标
+        self._offset = 0
+        self._stamp = None
+        self._lock = threading.RLock()
+
+    # ---------- 迁移 ----------
+
+    def _migrate_legacy(self) -> None:
+        if os.path.exists(self.path) or not self.legacy_path or not os.path.exists(self.legacy_path):
+            return
+        try:
+            with open(self.legacy_path, "r", encoding="utf-8") as f:
+                legacy = json.load(f)
+        except Exception as e:
+            logger.warning("⚠️ 旧版 history.json 读取失败，跳过迁移: %s", e)
+            return
+        if not isinstance(legacy, list):
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for item in legacy:
+                if isinstance(item, dict):
+                    f.write(json.dumps(item, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, self.path)
+        logger.info("📜 已将 %d 条历史选题迁移到 %s", len(legacy), os.path.basename(self.path))
+
+    # ---------- 读取 ----------
+
+    def _reset(self) -> None:
+        self._entries, self._dates, self._order = [], [], []
+        self._offset = 0
+
+    def _index(self, entry: Dict[str, str]) -> None:
+        idx = len(self._entries)
+        self._entries.append(entry)
+        date = entry.get("date") or ""
+        pos = bisect.bisect_right(self._dates, date)
+        self._dates.insert(pos, date)
+        self._order.insert(pos, idx)
+
+    def refresh(self) -> None:
+        """文件未变则直接返回；增长则只读新增部分；被截断/替换则全量重载"""
+        with self._lock:
+            self._migrate_legacy()
+            try:
+                st = os.stat(self.path)
+            except FileNotFoundError:
+                self._reset()
+                self._stamp = None
+                return
+            stamp = (st.st_mtime_ns, st.st_size)
+            if stamp == self._stamp:
+                return
+            if st.st_size < self._offset:
+                self._reset()
+            with open(self.path, "rb") as f:
+                f.seek(self._offset)
+                chunk = f.read()
+            # 只消费完整行，写了一半的尾行留给下次
+            end = chunk.rfind(b"\n") + 1
+            for line in chunk[:end].splitlines():
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(entry, dict):
+                    self._index(entry)
+            self._offset += end
+            self._stamp = stamp if end == len(chunk) else None
+
+    @property
+    def stamp(self) -> Optional[tuple]:
+        """当前已读入内容对应的 (mtime_ns, size)；文件有变化即不同，供依赖历史的缓存判断是否过期"""
+        self.refresh()
+        return self._stamp
+
+    def all(self) -> List[Dict[str, str]]:
+        """全部历史（按写入顺序）"""
+        self.refresh()
+        return list(self._entries)
+
+    def range(self, start: str = "", end: str = "9999-99-99") -> List[Dict[str, str]]:
+        """日期闭区间 [start, end] 内的条目（YYYY-MM-DD，按日期升序）"""
+        self.refresh()
+        with self._lock:
+            lo = bisect.bisect_left(self._dates, start)
+            hi = bisect.bisect_right(self._dates, end)
+            return [self._entries[i] for i in self._order[lo:hi]]
+
+    def recent(self, days: int = 7, today: Optional[datetime] = None) -> List[Dict[str, str]]:
+        """最近 N 天（含今天）的条目"""
+        today = today or datetime.now()
+        start = (today - timedelta(days=days)).strftime("%Y-%m-%d")
+        return self.range(start, today.strftime("%Y-%m-%d"))
+
+    def __len__(self) -> int:
+        self.refresh()
+        return len(self._entries)
+
+    # ---------- 写入 ----------
+
+    def append(self, entry: Dict[str, str]) -> None:
+        """原子追加一行（O_APPEND + 文件锁），随后增量刷新缓存"""
+        with self._lock:
+            self._migrate_legacy()
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            line = (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                os.write(fd, line)
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+                os.close(fd)
+            self.refresh()
+
+
+_STORE: Optional[HistoryStore] = None
+_STORE_LOCK = threading.Lock()
+
+
+def get_history_store() -> HistoryStore:
+    """进程级单例：Streamlit rerun 与 CLI 多次调用共享同一份缓存"""
+    global _STORE
+    with _STORE_LOCK:
+        if _STORE is None or _STORE.path != get_history_log_file():
+            _STORE = HistoryStore()
+        return _STORE
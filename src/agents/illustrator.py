@@ -15,10 +15,13 @@ import sys, os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import httpx
+import uuid
 from datetime import datetime
 from typing import Optional
 from openai import OpenAI
 
+from agents.latency_tracker import provider_timeout
+from agents.rate_limiter import rate_limited
 from config import get_logger, get_assets_dir
 
 logger = get_logger(__name__)
@@ -67,7 +70,8 @@ class IllustratorAgent:
         else:
             self.client = OpenAI(
                 api_key=SILICONFLOW_API_KEY,
-                base_url=SILICONFLOW_BASE_URL
+                base_url=SILICONFLOW_BASE_URL,
+                timeout=provider_timeout("siliconflow", 120)
             )
             logger.info("✅ IllustratorAgent 已启用 (SiliconFlow Flux.1-schnell)")
     
@@ -92,9 +96,9 @@ class IllustratorAgent:
             logger.warning(f"⏭️ 跳过配图生成: {prompt[:30]}...")
             return None
         
-        # 生成唯一文件名
+        # 生成唯一文件名（v5.1: 流式预取时多张图并发生成，同一秒内需加随机后缀防止覆盖）
         timestamp = datetime.now().strftime("%H%M%S")
-        filename = f"{filename_prefix}_{timestamp}.png"
+        filename = f"{filename_prefix}_{timestamp}_{uuid.uuid4().hex[:6]}.png"
         
         # 获取保存目录
         assets_dir = get_assets_dir()
@@ -112,12 +116,13 @@ class IllustratorAgent:
         
         try:
             # 调用 SiliconFlow Flux 模型 (OpenAI 兼容接口)
-            response = self.client.images.generate(
+            # 与其他调用方共享 SiliconFlow 限流（429 时按 Retry-After 冷却后重发）
+            response = rate_limited("siliconflow", lambda: self.client.images.generate(
                 model=FLUX_MODEL,
                 prompt=enhanced_prompt,
                 size=size,
                 response_format="url"
-            )
+            ))
             
             # 提取图片 URL
             image_url = response.data[0].url
@@ -0,0 +1,221 @@
+"""
+🔤 关键词多模式匹配 (Aho–Corasick Keyword Automaton)
+
+把 settings.yaml 中所有分类的关键词编译成一个 Aho–Corasick 自动机：
+- 一次线性扫描统计全部关键词，成本与关键词数量基本无关（上千个也不变慢）；
+- 重叠匹配全部计入（如“割韭菜”同时命中“割韭菜”和“韭菜”），中英混排与 CJK 无需分词；
+- 大小写不敏感；结果是与关键词列表对齐的计数向量，可直接乘权重向量。
+
+settings.yaml 配置（缺省时使用内置默认分类）：
+    keyword_categories:
+      tech:
+        weight: 2.0
+        label: "🔧 硬核技术"
+        keywords: ["DeepSeek", "Cursor", ...]
+"""
+import os
+import glob
+import threading
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import config
+from config import ARCHIVE_DIR, STAGE_DIRS, get_logger
+
+logger = get_logger(__name__)
+
+# 旧版 _extract_topic_frequencies 内置的分类，settings.yaml 未配置时沿用
+DEFAULT_KEYWORD_CATEGORIES = {
+    # === 硬核技术类 (权重 2.0) ===
+    "tech": {
+        "weight": 2.0,
+        "label": "🔧 硬核技术",
+        "keywords": [
+            "DeepSeek", "Cursor", "Gemini", "Claude", "GPT", "Kimi", "Copilot",
+            "Windsurf", "Bolt", "Lovable", "秘塔", "豆包", "通义", "智谱", "AutoGLM",
+            "Coze", "Agent", "智能体", "MCP", "RAG", "Workflow", "工作流",
+            "本地部署", "Ollama", "vLLM", "Prompt", "提示词",
+            "架构图", "流程图", "思维导图", "文档分析", "代码生成",
+            "API", "SDK", "开源", "GitHub"
+        ]
+    },
+    # === 投资金融类 (权重 0.5) ===
+    "finance": {
+        "weight": 0.5,
+        "label": "💰 金融类(降权)",
+        "keywords": [
+            "股价", "上市", "财报", "暴涨", "暴跌", "市值", "融资", "IPO",
+            "投资", "股票", "韭菜", "割韭菜", "炒股"
+        ]
+    },
+    # === 通用场景类 (权重 1.0，但标记为修饰语) ===
+    "generic": {
+        "weight": 1.0,
+        "label": "📝 修饰语",
+        "keywords": [
+            "免费", "平替", "白嫖", "避坑", "翻车", "教程", "爆款",
+            "实时翻译", "AI 耳机", "手机助手"
+        ]
+    }
+}
+
+
+class KeywordAutomaton:
+    """Aho–Corasick 自动机。keywords[i] 的命中次数即 count() 返回向量的第 i 项"""
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords: List[str] = []
+        seen = {}
+        for kw in keywords:
+            key = (kw or "").strip().lower()
+            if key and key not in seen:
+                seen[key] = len(self.keywords)
+                self.keywords.append(kw.strip())
+        self.positions: Dict[str, int] = {kw: i for i, kw in enumerate(self.keywords)}
+
+        # 状态 0 为根；_goto[s][ch] -> 下一状态；_out[s] -> 该状态结束的关键词下标
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[int, ...]] = [()]
+        for key, idx in seen.items():
+            state = 0
+            for ch in key:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                state = nxt
+            self._out[state] = self._out[state] + (idx,)
+        self._build_fail_links()
+
+    def _build_fail_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                target = self._goto[f].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                # 合并后缀状态的输出，扫描时无需沿失败链回溯
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def __len__(self) -> int:
+        return len(self.keywords)
+
+    def new_counts(self) -> List[int]:
+        return [0] * len(self.keywords)
+
+    def feed(self, text: str, counts: List[int], state: int = 0) -> int:
+        """把 text 的命中累加进 counts，返回结束状态（分块扫描大文件时传回继续）"""
+        goto, fail, out = self._goto, self._fail, self._out
+        for ch in text.lower():
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for idx in out[state]:
+                counts[idx] += 1
+        return state
+
+    def count(self, text: str) -> List[int]:
+        counts = self.new_counts()
+        self.feed(text or "", counts)
+        return counts
+
+    def count_file(self, path: str, chunk_size: int = 1 << 16) -> List[int]:
+        counts = self.new_counts()
+        state = 0
+        with open(path, "r", encoding="utf-8", errors="ignore") as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                state = self.feed(chunk, counts, state)
+        return counts
+
+
+class KeywordCatalog:
+    """分类关键词 + 权重：automaton.keywords 与 categories / weights 一一对齐"""
+
+    def __init__(self, categories: Dict[str, dict]):
+        self.labels: Dict[str, str] = {}
+        self.category_weights: Dict[str, float] = {}
+        ordered, owners, weights = [], [], []
+        for name, spec in categories.items():
+            if not isinstance(spec, dict):
+                continue
+            self.labels[name] = spec.get("label", "")
+            self.category_weights[name] = float(spec.get("weight", 1.0))
+            for kw in spec.get("keywords") or []:
+                ordered.append(kw)
+                owners.append(name)
+                weights.append(float(spec.get("weight", 1.0)))
+        self.automaton = KeywordAutomaton(ordered)
+        # 同一关键词出现在多个分类时以第一次为准，与自动机去重规则一致
+        first = {}
+        for kw, owner, weight in zip(ordered, owners, weights):
+            first.setdefault((kw or "").strip().lower(), (owner, weight))
+        self.categories = [first[kw.lower()][0] for kw in self.automaton.keywords]
+        self.weights = [first[kw.lower()][1] for kw in self.automaton.keywords]
+
+    @property
+    def keywords(self) -> List[str]:
+        return self.automaton.keywords
+
+    def score(self, text: str, top: Optional[int] = 10) -> Dict[str, Tuple[int, float, str]]:
+        """返回 {keyword: (raw_count, weighted_score, category)}，按加权分数降序"""
+        return self.rank(self.automaton.count(text), top)
+
+    def rank(self, counts: List[int], top: Optional[int] = 10) -> Dict[str, Tuple[int, float, str]]:
+        results = {
+            kw: (c, c * w, cat)
+            for kw, c, w, cat in zip(self.keywords, counts, self.weights, self.categories)
+            if c > 0
+        }
+        ordered = sorted(results.items(), key=lambda x: x[1][1], reverse=True)
+        return dict(ordered[:top] if top else ordered)
+
+
+_CATALOG: Optional[KeywordCatalog] = None
+_CATALOG_LOCK = threading.Lock()
+
+
+def get_keyword_catalog() -> KeywordCatalog:
+    """进程级单例：首次调用时从 settings.yaml 编译自动机"""
+    global _CATALOG
+    with _CATALOG_LOCK:
+        if _CATALOG is None:
+            categories = config.SETTINGS.get("keyword_categories")
+            if not isinstance(categories, dict) or not categories:
+                categories = DEFAULT_KEYWORD_CATEGORIES
+            _CATALOG = KeywordCatalog(categories)
+        return _CATALOG
+
+
+def iter_archive_reports(pattern: str = "report_*.md") -> List[Tuple[str, str]]:
+    """列出归档中所有日期的选题报告 [(date, path)]，按日期、文件名排序"""
+    topics_stage = STAGE_DIRS.get("topics", "1_topics")
+    paths = glob.glob(os.path.join(ARCHIVE_DIR, "*", topics_stage, pattern))
+    return sorted((os.path.basename(os.path.dirname(os.path.dirname(p))), p) for p in paths)
+
+
+def count_archive(pattern: str = "report_*.md") -> Dict[str, List[int]]:
+    """按日期统计整个归档的关键词命中向量 {date: counts}"""
+    automaton = get_keyword_catalog().automaton
+    by_date: Dict[str, List[int]] = {}
+    for date, path in iter_archive_reports(pattern):
+        try:
+            counts = automaton.count_file(path)
+        except OSError as e:
+            logger.warning("⚠️ 跳过无法读取的报告 %s: %s", path, e)
+            continue
+        total = by_date.setdefault(date, automaton.new_counts())
+        for i, c in enumerate(counts):
+            if c:
+                total[i] += c
+    return by_date
@@ -0,0 +1,183 @@
+"""
+⏱️ 自适应超时 (Latency-adaptive Timeouts)
+
+各处超时原本写死（Perplexity 45s、Tavily/Exa 30s、Jina 15/30s、爬取 60s……）：
+服务商健康时卡住的请求要白等几十秒，服务商变慢但仍可用时又会误杀正常请求。
+这里为每个服务商维护一份耗时直方图（对数分桶，指数衰减，近期样本权重更高），
+持久化在 data/latency_histograms.json 跨运行累积：
+- 读超时 = clamp(p99 × multiplier, floor, ceiling)，样本不足 min_samples 时沿用调用方给的默认值；
+- 连接超时单独配置（建连慢通常是网络/代理问题，与服务商处理耗时无关）；
+- 超时的请求按“至少耗时 timeout × 1.5”计入，服务商变慢时超时会逐步放宽而不是反复误杀。
+
+settings.yaml 配置（均可选）：
+    timeouts:
+      connect: 10
+      floor: 5
+      ceiling: 120
+      multiplier: 1.5
+      min_samples: 20
+      providers:
+        perplexity: {floor: 15, ceiling: 90}
+"""
+import atexit
+import json
+import math
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+
+import config
+from config import get_logger
+
+logger = get_logger(__name__)
+
+HISTOGRAM_VERSION = 1
+# 对数分桶：0.05s 起，每桶 ×1.25，共 40 桶（上界约 300s）
+BUCKET_START = 0.05
+BUCKET_RATIO = 1.25
+BUCKET_COUNT = 40
+BUCKET_BOUNDS = [BUCKET_START * BUCKET_RATIO ** i for i in range(BUCKET_COUNT)]
+# 每次记录前旧样本乘以衰减系数，约 500 次请求后旧样本权重降到 1/e
+DECAY = 0.998
+TIMEOUT_INFLATION = 1.5
+SAVE_EVERY = 20
+
+DEFAULTS = {"connect": 10.0, "floor": 5.0, "ceiling": 120.0, "multiplier": 1.5, "min_samples": 20}
+
+
+def get_histogram_file() -> str:
+    return os.path.join(config.DATA_DIR, "latency_histograms.json")
+
+
+def get_timeout_settings(provider: Optional[str] = None) -> Dict[str, float]:
+    raw = config.SETTINGS.get("timeouts") or {}
+    raw = raw if isinstance(raw, dict) else {}
+    merged = dict(DEFAULTS)
+    merged.update({k: v for k, v in raw.items() if k in DEFAULTS})
+    per_provider = (raw.get("providers") or {}).get(provider) if provider else None
+    if isinstance(per_provider, dict):
+        merged.update({k: v for k, v in per_provider.items() if k in DEFAULTS})
+    return {k: float(v) for k, v in merged.items()}
+
+
+def _bucket(seconds: float) -> int:
+    if seconds <= BUCKET_START:
+        return 0
+    return min(int(math.ceil(math.log(seconds / BUCKET_START, BUCKET_RATIO))), BUCKET_COUNT - 1)
+
+
+class LatencyHistograms:
+    """provider -> 衰减计数直方图（与 BUCKET_BOUNDS 对齐）"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or get_histogram_file()
+        self.counts: Dict[str, List[float]] = {}
+        self._dirty = 0
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") != HISTOGRAM_VERSION or data.get("buckets") != BUCKET_COUNT:
+            return
+        self.counts = {p: [float(c) for c in counts] for p, counts in data.get("providers", {}).items()
+                       if isinstance(counts, list) and len(counts) == BUCKET_COUNT}
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            payload = {"version": HISTOGRAM_VERSION, "buckets": BUCKET_COUNT,
+                       "providers": {p: [round(c, 4) for c in counts] for p, counts in self.counts.items()}}
+            self._dirty = 0
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(payload, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning("⚠️ 耗时直方图保存失败: %s", e)
+
+    def record(self, provider: str, seconds: float) -> None:
+        with self._lock:
+            counts = self.counts.setdefault(provider, [0.0] * BUCKET_COUNT)
+            for i in range(BUCKET_COUNT):
+                counts[i] *= DECAY
+            counts[_bucket(seconds)] += 1.0
+            self._dirty += 1
+            flush = self._dirty >= SAVE_EVERY
+        if flush:
+            self.save()
+
+    def samples(self, provider: str) -> float:
+        with self._lock:
+            return sum(self.counts.get(provider, ()))
+
+    def percentile(self, provider: str, q: float) -> Optional[float]:
+        """返回第 q 分位所在桶的上界（秒）；无样本时返回 None"""
+        with self._lock:
+            counts = list(self.counts.get(provider, ()))
+        total = sum(counts)
+        if not total:
+            return None
+        target, cumulative = total * q, 0.0
+        for i, c in enumerate(counts):
+            cumulative += c
+            if cumulative >= target:
+                return BUCKET_BOUNDS[i]
+        return BUCKET_BOUNDS[-1]
+
+
+_HISTOGRAMS: Optional[LatencyHistograms] = None
+_HISTOGRAMS_LOCK = threading.Lock()
+
+
+def get_latency_histograms() -> LatencyHistograms:
+    """进程级单例，退出时写回磁盘"""
+    global _HISTOGRAMS
+    with _HISTOGRAMS_LOCK:
+        if _HISTOGRAMS is None:
+            _HISTOGRAMS = LatencyHistograms()
+            atexit.register(_HISTOGRAMS.save)
+        return _HISTOGRAMS
+
+
+def read_timeout(provider: str, default: float) -> float:
+    """由近期 p99 推导读超时；样本不足时用 default（同样受 floor/ceiling 约束）"""
+    settings = get_timeout_settings(provider)
+    histograms = get_latency_histograms()
+    value = float(default)
+    if histograms.samples(provider) >= settings["min_samples"]:
+        p99 = histograms.percentile(provider, 0.99)
+        if p99 is not None:
+            value = p99 * settings["multiplier"]
+    return max(settings["floor"], min(settings["ceiling"], value))
+
+
+def provider_timeout(provider: str, default: float) -> httpx.Timeout:
+    """httpx 超时：连接超时固定，读/写/连接池超时自适应"""
+    settings = get_timeout_settings(provider)
+    read = read_timeout(provider, default)
+    return httpx.Timeout(read, connect=min(settings["connect"], read))
+
+
+def timed(provider: str, fn: Callable[[], Any]) -> Any:
+    """执行 fn() 并记录耗时；超时按 timeout × 1.5 计入，让慢但可用的服务商逐步放宽超时"""
+    start = time.perf_counter()
+    try:
+        result = fn()
+    except httpx.TimeoutException:
+        elapsed = time.perf_counter() - start
+        get_latency_histograms().record(provider, elapsed * TIMEOUT_INFLATION)
+        raise
+    get_latency_histograms().record(provider, time.perf_counter() - start)
+    return result
+
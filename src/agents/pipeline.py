@@ -0,0 +1,260 @@
+"""
+🧩 阶段级产物缓存 + DAG 执行器 (Pipeline Runner)
+
+run_all 以前无条件依次执行 hunt → final → research → draft，改一句写作提示词也要重跑几分钟的选题和研究。
+这里每个阶段声明自己的输入与产出：
+- 输入：当日归档中的上游产物（glob，相对当日目录）、相关 settings 键、实现该阶段的模块源码
+  （提示词写在模块里，改提示词即改源码哈希）、以及额外参数（如写作模式）；
+- 产出：当日归档中的文件（glob）。
+
+输入哈希与上次成功运行一致且产出仍在时跳过该阶段；上游重跑后产物变化，下游的输入哈希随之变化而自动重跑。
+各阶段成功记录写在当日目录的 pipeline.stamp.json（与 reformat 的 output.stamp.json 同一思路）。
+
+    pipeline.run(start="draft")      # --from：从该阶段开始，上游视为已完成
+    pipeline.run(only=["research"])  # --only：只考虑这些阶段
+    pipeline.run(force=True)         # --force：忽略指纹，所选阶段全部重跑
+"""
+import glob
+import hashlib
+import importlib.util
+import json
+import os
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+import config
+from config import get_logger
+
+logger = get_logger(__name__)
+
+STAMP_FILENAME = "pipeline.stamp.json"
+STAMP_VERSION = 1
+
+# run() 返回的各阶段状态
+RAN, SKIPPED, FAILED, BLOCKED = "ran", "skipped", "failed", "blocked"
+
+
+class Stage:
+    """
+    一个流水线阶段。
+
+    Args:
+        name: 阶段名（--from / --only 使用）
+        run: 执行函数 run(dry_run: bool)；返回 False 表示失败
+        after: 依赖的上游阶段名
+        inputs: 输入文件 glob（相对当日归档目录）
+        outputs: 产出文件 glob（相对当日归档目录），全部存在且本次有写入才算成功
+        settings: 参与哈希的 settings.yaml 顶层键
+        sources: 参与哈希的模块名（如 "agents.drafter"），按源码内容计算
+        params: 返回额外参数字典的函数（如写作模式），参与哈希
+        label: 日志显示名
+    """
+
+    def __init__(
+        self,
+        name: str,
+        run: Callable[[bool], Any],
+        after: Sequence[str] = (),
+        inputs: Sequence[str] = (),
+        outputs: Sequence[str] = (),
+        settings: Sequence[str] = (),
+        sources: Sequence[str] = (),
+        params: Optional[Callable[[], Dict[str, Any]]] = None,
+        label: str = "",
+    ):
+        self.name = name
+        self.run = run
+        self.after = list(after)
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.settings = list(settings)
+        self.sources = list(sources)
+        self.params = params
+        self.label = label or name
+
+
+# ================= 指纹 =================
+
+def _file_sha1(path: str) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(65536), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _expand(day_dir: str, patterns: Iterable[str]) -> List[str]:
+    paths = []
+    for pattern in patterns:
+        paths.extend(sorted(glob.glob(os.path.join(day_dir, pattern))))
+    return paths
+
+
+def _module_file(module: str) -> Optional[str]:
+    """只定位源码文件，不导入模块"""
+    try:
+        spec = importlib.util.find_spec(module)
+    except (ImportError, ValueError):
+        return None
+    return spec.origin if spec and spec.origin and os.path.exists(spec.origin) else None
+
+
+def input_hash(stage: Stage, day_dir: str) -> str:
+    """阶段输入指纹：上游文件内容 + settings 片段 + 模块源码 + 额外参数"""
+    h = hashlib.sha1()
+    for path in _expand(day_dir, stage.inputs):
+        h.update(f"file:{os.path.relpath(path, day_dir)}:{_file_sha1(path)}\n".encode("utf-8"))
+    settings = {key: config.SETTINGS.get(key) for key in stage.settings}
+    h.update(b"settings:" + json.dumps(settings, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8"))
+    for module in stage.sources:
+        path = _module_file(module)
+        h.update(f"\nsource:{module}:{_file_sha1(path) if path else '-'}".encode("utf-8"))
+    if stage.params:
+        h.update(b"\nparams:" + json.dumps(stage.params(), sort_keys=True, ensure_ascii=False, default=str).encode("utf-8"))
+    return h.hexdigest()
+
+
+# ================= 执行器 =================
+
+class Pipeline:
+    def __init__(self, stages: Sequence[Stage], day_dir: Optional[str] = None):
+        self.stages = {s.name: s for s in stages}
+        for s in stages:
+            unknown = [d for d in s.after if d not in self.stages]
+            if unknown:
+                raise ValueError(f"阶段 {s.name} 依赖未知阶段: {unknown}")
+        self.order = self._toposort(stages)
+        self._day_dir = day_dir
+
+    @property
+    def day_dir(self) -> str:
+        # 工作日期可能在构建流水线之后才由 -d 设置，延迟取当日目录
+        return self._day_dir or config.get_today_dir()
+
+    @staticmethod
+    def _toposort(stages: Sequence[Stage]) -> List[str]:
+        """按依赖排序，同层保持声明顺序"""
+        pending = [s.name for s in stages]
+        deps = {s.name: set(s.after) for s in stages}
+        order: List[str] = []
+        while pending:
+            ready = [n for n in pending if deps[n] <= set(order)]
+            if not ready:
+                raise ValueError(f"阶段依赖存在环: {pending}")
+            order.append(ready[0])
+            pending.remove(ready[0])
+        return order
+
+    def descendants(self, name: str) -> List[str]:
+        """name 及其所有下游阶段（按执行顺序）"""
+        selected = {name}
+        for n in self.order:
+            if any(d in selected for d in self.stages[n].after):
+                selected.add(n)
+        return [n for n in self.order if n in selected]
+
+    def select(self, start: Optional[str] = None, only: Optional[Iterable[str]] = None) -> List[str]:
+        for name in ([start] if start else []) + list(only or []):
+            if name not in self.stages:
+                raise ValueError(f"未知阶段: {name}（可用: {', '.join(self.order)}）")
+        if only:
+            wanted = set(only)
+            return [n for n in self.order if n in wanted]
+        if start:
+            return self.descendants(start)
+        return list(self.order)
+
+    # ---------- 状态文件 ----------
+
+    def _stamp_path(self) -> str:
+        return os.path.join(self.day_dir, STAMP_FILENAME)
+
+    def load_stamps(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self._stamp_path(), "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if data.get("version") != STAMP_VERSION:
+            return {}
+        return data.get("stages", {})
+
+    def _save_stamp(self, name: str, stamp: Dict[str, Any]) -> None:
+        stamps = self.load_stamps()
+        stamps[name] = stamp
+        path = self._stamp_path()
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": STAMP_VERSION, "stages": stamps}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+
+    def is_fresh(self, name: str, digest: Optional[str] = None) -> bool:
+        """上次成功运行的输入指纹与当前一致，且产出仍全部存在"""
+        stage = self.stages[name]
+        stamp = self.load_stamps().get(name)
+        if not stamp:
+            return False
+        digest = digest or input_hash(stage, self.day_dir)
+        return stamp.get("input_hash") == digest and self._outputs_exist(stage)
+
+    def _outputs_exist(self, stage: Stage) -> bool:
+        return all(glob.glob(os.path.join(self.day_dir, pattern)) for pattern in stage.outputs)
+
+    def _outputs_written(self, stage: Stage, since: float) -> bool:
+        """本次执行确实写出了产出（旧产出仍在但本次失败时不算成功）"""
+        paths = _expand(self.day_dir, stage.outputs)
+        # mtime 精度因文件系统而异，留 1 秒余量
+        return self._outputs_exist(stage) and any(os.path.getmtime(p) >= since - 1 for p in paths)
+
+    # ---------- 执行 ----------
+
+    def run(
+        self,
+        start: Optional[str] = None,
+        only: Optional[Iterable[str]] = None,
+        force: bool = False,
+        dry_run: bool = False,
+    ) -> Dict[str, str]:
+        """
+        按依赖顺序执行所选阶段，返回 {阶段名: ran/skipped/failed/blocked}。
+        dry_run 时不读不写指纹（Mock 产物不作为缓存）。
+        """
+        selected = self.select(start, only)
+        statuses: Dict[str, str] = {}
+        for name in selected:
+            stage = self.stages[name]
+            if any(statuses.get(d) in (FAILED, BLOCKED) for d in stage.after):
+                statuses[name] = BLOCKED
+                logger.warning("⏭️ [%s] 上游失败，跳过", stage.label)
+                continue
+
+            digest = input_hash(stage, self.day_dir)
+            if not force and not dry_run and self.is_fresh(name, digest):
+                finished = self.load_stamps()[name].get("finished_at", "?")
+                statuses[name] = SKIPPED
+                logger.info("♻️ [%s] 输入未变化，复用上次产出 (%s)", stage.label, finished)
+                continue
+
+            logger.info("=" * 60)
+            logger.info("▶️ [%s] 开始执行%s", stage.label, " (--force)" if force else "")
+            logger.info("=" * 60)
+            t0, started_at = time.perf_counter(), time.time()
+            ok = stage.run(dry_run) is not False and self._outputs_written(stage, started_at)
+            elapsed = time.perf_counter() - t0
+            if not ok:
+                statuses[name] = FAILED
+                logger.warning("⚠️ [%s] 未生成预期产出 (%s)，下游阶段不再执行", stage.label, ", ".join(stage.outputs))
+                continue
+
+            statuses[name] = RAN
+            if not dry_run:
+                self._save_stamp(name, {
+                    "input_hash": digest,
+                    "outputs": {os.path.relpath(p, self.day_dir): _file_sha1(p)
+                                for p in _expand(self.day_dir, stage.outputs)},
+                    "duration_s": round(elapsed, 1),
+                    "finished_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                })
+            logger.info("✅ [%s] 完成 (%.1fs)", stage.label, elapsed)
+        return statuses
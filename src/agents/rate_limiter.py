@@ -0,0 +1,198 @@
+"""
+🚦 按服务商限流 (Per-provider Rate Limiter)
+
+Tavily 的 429/432 以前直接丢弃，Perplexity / Exa 靠 retryable 盲目重试；并发之后很容易把服务商打爆。
+这里为每个服务商维护一个令牌桶 + 并发上限，所有调用方（WebSearchTool、ResearcherAgent、
+Jina 读取、SiliconFlow 配图）共享同一个进程级实例：
+- 令牌桶：rate 个/秒匀速补充，最多攒 burst 个；concurrent 限制同时在途的请求数；
+- 自适应：收到 429（Tavily 另有 432）时按 Retry-After（没有则指数退避）暂停该服务商，
+  并把速率减半；之后每次成功逐步恢复到配置值 (AIMD)；
+- 被限流的请求在冷却后自动重发（最多 max_retries 次），不再浪费 retryable 的盲目重试。
+
+settings.yaml 配置（未配置的服务商使用内置默认值）：
+    rate_limits:
+      tavily: {rate: 2.0, burst: 4, concurrent: 3}
+      perplexity: {rate: 1.0, burst: 2, concurrent: 2}
+"""
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Iterator, Optional
+
+import config
+from config import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_LIMITS: Dict[str, Dict[str, float]] = {
+    "perplexity": {"rate": 1.0, "burst": 2, "concurrent": 2},
+    "tavily": {"rate": 2.0, "burst": 4, "concurrent": 3},
+    "exa": {"rate": 2.0, "burst": 4, "concurrent": 3},
+    "jina": {"rate": 3.0, "burst": 5, "concurrent": 5},
+    "siliconflow": {"rate": 0.5, "burst": 1, "concurrent": 1},
+}
+FALLBACK_LIMIT = {"rate": 2.0, "burst": 4, "concurrent": 4}
+THROTTLE_STATUS = {429, 432}
+# 没有 Retry-After 时的退避：首次 2 秒，连续限流翻倍，最长 60 秒
+BASE_BACKOFF = 2.0
+MAX_BACKOFF = 60.0
+MIN_RATE_FACTOR = 0.125
+RECOVERY_STEP = 0.1
+DEFAULT_MAX_RETRIES = 2
+
+
+def _retry_after_seconds(headers: Any) -> Optional[float]:
+    """解析 Retry-After（秒数或 HTTP 日期）"""
+    if not headers:
+        return None
+    value = headers.get("retry-after") or headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def _status_of(obj: Any) -> Optional[int]:
+    """从 httpx.Response / openai 异常 / 带 response 的异常中取状态码"""
+    for candidate in (obj, getattr(obj, "response", None)):
+        status = getattr(candidate, "status_code", None)
+        if isinstance(status, int):
+            return status
+    return None
+
+
+def _headers_of(obj: Any) -> Any:
+    for candidate in (obj, getattr(obj, "response", None)):
+        headers = getattr(candidate, "headers", None)
+        if headers is not None:
+            return headers
+    return None
+
+
+class RateLimiter:
+    """单个服务商的令牌桶 + 并发闸门"""
+
+    def __init__(self, name: str, rate: float, burst: float, concurrent: int, max_retries: int = DEFAULT_MAX_RETRIES):
+        self.name = name
+        self.base_rate = max(float(rate), 0.01)
+        self.rate = self.base_rate
+        self.burst = max(float(burst), 1.0)
+        self.max_retries = int(max_retries)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._strikes = 0
+        self._cond = threading.Condition()
+        self._slots = threading.BoundedSemaphore(max(int(concurrent), 1))
+        self.throttled = 0
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self) -> None:
+        """阻塞直到拿到令牌（冷却期内等待冷却结束）"""
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                if now < self._blocked_until:
+                    self._cond.wait(self._blocked_until - now)
+                    continue
+                self._refill(now)
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                self._cond.wait((1.0 - self._tokens) / self.rate)
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        self._slots.acquire()
+        try:
+            self.acquire()
+            yield
+        finally:
+            self._slots.release()
+
+    def on_throttled(self, retry_after: Optional[float] = None) -> float:
+        """收到限流响应：暂停并降速，返回本次冷却秒数"""
+        with self._cond:
+            self._strikes += 1
+            self.throttled += 1
+            wait = retry_after if retry_after is not None else min(BASE_BACKOFF * 2 ** (self._strikes - 1), MAX_BACKOFF)
+            self._blocked_until = max(self._blocked_until, time.monotonic() + wait)
+            self.rate = max(self.rate / 2, self.base_rate * MIN_RATE_FACTOR)
+            self._tokens = 0.0
+            self._cond.notify_all()
+        logger.warning("🚦 %s 限流，冷却 %.1fs，速率降至 %.2f/s", self.name, wait, self.rate)
+        return wait
+
+    def on_success(self) -> None:
+        with self._cond:
+            self._strikes = 0
+            if self.rate < self.base_rate:
+                self.rate = min(self.base_rate, self.rate + self.base_rate * RECOVERY_STEP)
+
+    def call(self, fn: Callable[[], Any]) -> Any:
+        """
+        在限流下执行 fn()。返回值或异常带 429/432 状态码时冷却后重发，
+        超过 max_retries 次仍被限流则返回最后一次响应（或抛出最后一次异常）。
+        """
+        from agents.latency_tracker import timed
+
+        for attempt in range(self.max_retries + 1):
+            with self.slot():
+                try:
+                    # 在途耗时同时计入该服务商的耗时直方图（自适应超时）
+                    result = timed(self.name, fn)
+                except Exception as e:
+                    if _status_of(e) in THROTTLE_STATUS and attempt < self.max_retries:
+                        self.on_throttled(_retry_after_seconds(_headers_of(e)))
+                        continue
+                    raise
+            if _status_of(result) in THROTTLE_STATUS:
+                self.on_throttled(_retry_after_seconds(_headers_of(result)))
+                if attempt < self.max_retries:
+                    continue
+                return result
+            self.on_success()
+            return result
+
+
+_LIMITERS: Dict[str, RateLimiter] = {}
+_LIMITERS_LOCK = threading.Lock()
+
+
+def get_rate_limits() -> Dict[str, dict]:
+    raw = config.SETTINGS.get("rate_limits") or {}
+    return raw if isinstance(raw, dict) else {}
+
+
+def get_rate_limiter(provider: str) -> RateLimiter:
+    """进程级单例：同一服务商的所有调用方共享一个限流器"""
+    with _LIMITERS_LOCK:
+        limiter = _LIMITERS.get(provider)
+        if limiter is None:
+            spec = dict(DEFAULT_LIMITS.get(provider, FALLBACK_LIMIT))
+            override = get_rate_limits().get(provider)
+            if isinstance(override, dict):
+                spec.update(override)
+            limiter = _LIMITERS[provider] = RateLimiter(
+                provider,
+                rate=spec.get("rate", FALLBACK_LIMIT["rate"]),
+                burst=spec.get("burst", FALLBACK_LIMIT["burst"]),
+                concurrent=spec.get("concurrent", FALLBACK_LIMIT["concurrent"]),
+                max_retries=spec.get("max_retries", DEFAULT_MAX_RETRIES),
+            )
+        return limiter
+
+
+def rate_limited(provider: str, fn: Callable[[], Any]) -> Any:
+    """便捷入口：rate_limited("tavily", lambda: client.post(...))"""
+    return get_rate_limiter(provider).call(fn)
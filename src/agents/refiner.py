@@ -25,6 +25,8 @@ import shutil
 from datetime import datetime
 from openai import OpenAI
 import config
+from agents.archive_catalog import record_artifact
+from agents.stream_sink import stream_chat
 
 
 logger = config.get_logger(__name__)
@@ -172,33 +174,19 @@ def refine_article(instruction: str, date: str = None):
         try:
             @config.retryable
             @config.track_cost(context="refine_article")
-            def _chat_create():
+            def _chat_create(request_messages):
                 return client.chat.completions.create(
                     model="deepseek-reasoner",
-                    messages=[
-                        {"role": "system", "content": SYSTEM_PROMPT},
-                        {"role": "user", "content": user_prompt}
-                    ],
+                    messages=request_messages,
                     stream=True
                 )
 
-            response = _chat_create()
-
-            # 流式输出
-            full_content = ""
-            for chunk in response:
-                # 跳过 reasoning_content
-                if hasattr(chunk.choices[0].delta, 'reasoning_content'):
-                    reasoning = chunk.choices[0].delta.reasoning_content
-                    if reasoning:
-                        continue  # 不显示推理过程，保持输出简洁
-
-                # 输出正文内容
-                if chunk.choices[0].delta.content:
-                    text = chunk.choices[0].delta.content
-                    sys.stdout.write(text)
-                    sys.stdout.flush()
-                    full_content += text
+            # 流式输出（只回显正文，不显示推理过程）
+            # v5.1: 边生成边写 .partial，流中断时基于已生成部分续写
+            full_content = stream_chat("refine", _chat_create, [
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": user_prompt}
+            ])
 
             sys.stdout.write("\n\n" + "=" * 50 + "\n")
             sys.stdout.flush()
@@ -210,6 +198,7 @@ def refine_article(instruction: str, date: str = None):
                 f.write(full_content)
 
             logger.info("✅ 定稿已保存: %s", final_file)
+            record_artifact(final_file)
             logger.info("📋 原稿保留在: %s", draft_file)
             logger.info("📌 下一步：")
             logger.info("   1. 检查 final.md，确认修改效果")
@@ -16,12 +16,21 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import httpx
 import json
+import queue
+import threading
+import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Callable
 from pathlib import Path
 from openai import OpenAI
-from tavily import TavilyClient
+from agents.archive_catalog import record_artifact
+from agents.cancellation import check_cancelled, is_cancelled
+from agents.checkpoints import Checkpoint, fingerprint
+from agents.stream_sink import stream_chat
+from agents.latency_tracker import provider_timeout, timed
+from agents.rate_limiter import rate_limited
+import config
 from config import (
     DEEPSEEK_API_KEY, DEEPSEEK_BASE_URL, 
     TAVILY_API_KEY, EXA_API_KEY, PERPLEXITY_API_KEY,
@@ -31,6 +40,27 @@ from config import (
 
 logger = get_logger(__name__)
 
+SCRAPE_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+}
+TAVILY_MAX_RESULTS = 8
+# 正文少于该长度视为缺失，需要补充爬取
+MIN_TEXT_LENGTH = 200
+# v5.1: 素材收集流水线默认参数（settings.yaml 的 research 段可覆盖）
+RESEARCH_DEFAULTS = {"deadline": 180, "enough_sources": 12, "scrape_workers": 4}
+
+
+def get_research_settings() -> Dict[str, Any]:
+    raw = config.SETTINGS.get("research") or {}
+    merged = dict(RESEARCH_DEFAULTS)
+    if isinstance(raw, dict):
+        merged.update({k: v for k, v in raw.items() if k in RESEARCH_DEFAULTS})
+    return merged
+
+
+def _has_text(item: Dict[str, Any]) -> bool:
+    return len(item.get("text") or "") >= MIN_TEXT_LENGTH
+
 
 class ResearcherAgent:
     """自动化研究智能体：Exa AI 搜索 + 内容聚合 + 笔记整理"""
@@ -54,7 +84,7 @@ class ResearcherAgent:
         self.tavily_enabled = bool(self.tavily_key and len(self.tavily_key) > 10)
         self.exa_enabled = bool(self.exa_key and len(self.exa_key) > 10)
         
-        logger.info("✅ ResearcherAgent v4.3 初始化完成 (Priority: Perplexity -> Tavily -> Exa)")
+        logger.info("✅ ResearcherAgent v4.3 初始化完成 (Perplexity + Tavily + Exa 并行搜索，边搜边爬)")
 
     def search_perplexity(self, query: str) -> List[Dict[str, Any]]:
         """Perplexity API: 获取模型生成的摘要作为核心研究素材"""
@@ -75,11 +105,11 @@ class ResearcherAgent:
             "Content-Type": "application/json"
         }
         try:
-            with httpx.Client(timeout=45, proxy=self.proxy_url) as client:
+            with httpx.Client(timeout=provider_timeout("perplexity", 45), proxy=self.proxy_url) as client:
                 @retryable
                 @track_cost(context="perplexity_research")
                 def _post():
-                    return client.post(url, json=payload, headers=headers)
+                    return rate_limited("perplexity", lambda: client.post(url, json=payload, headers=headers))
                 
                 resp = _post()
                 if resp.status_code != 200:
@@ -98,12 +128,13 @@ class ResearcherAgent:
             logger.error(f"Perplexity 调用失败: {e}")
             return []
 
-    def search_exa(self, topic: str, queries: List[str]) -> List[Dict[str, Any]]:
+    def search_exa(self, topic: str, queries: List[str], on_result: Optional[Callable[[Dict[str, Any]], None]] = None) -> List[Dict[str, Any]]:
         """
         使用 Exa AI 进行高级搜索 (自动包含内容)
         v4.2: 增强查询利用，使用 queries 进行多批次精准搜索
+        v5.1: 每条新结果立即回调 on_result（素材收集流水线）
         """
-        if not self.exa_api_key:
+        if not self.exa_key:
             logger.warning("未配置 EXA_API_KEY，跳过 Exa 搜索")
             return []
 
@@ -114,7 +145,7 @@ class ResearcherAgent:
         all_results = []
         seen_urls = set()  # 去重
         headers = {
-            "Authorization": f"Bearer {self.exa_api_key}",
+            "Authorization": f"Bearer {self.exa_key}",
             "Content-Type": "application/json"
         }
         
@@ -158,10 +189,11 @@ class ResearcherAgent:
         
         @retryable
         def _exa_post(client: httpx.Client, payload: dict, headers: dict):
-            return client.post(url, json=payload, headers=headers)
+            return rate_limited("exa", lambda: client.post(url, json=payload, headers=headers))
 
-        with httpx.Client(timeout=60, proxy=self.proxy_url) as client:
+        with httpx.Client(timeout=provider_timeout("exa", 60), proxy=self.proxy_url) as client:
             for i, payload in enumerate(batches):
+                check_cancelled()
                 try:
                     logger.info("🚀 Exa Batch %s 请求中 (query: %s)...", i + 1, payload.get('query', '')[:30])
                     resp = _exa_post(client, payload, headers)
@@ -182,6 +214,8 @@ class ResearcherAgent:
                             "text": res.get("text", ""),
                             "source": "Exa"
                         })
+                        if on_result is not None:
+                            on_result(all_results[-1])
                         logger.info("✓ [Exa] %s...", (res.get('title', 'Unknown') or '')[:40])
                         
                 except Exception as e:
@@ -190,15 +224,18 @@ class ResearcherAgent:
         logger.info("   📊 Exa 共获取 %d 条去重结果", len(all_results))
         return all_results
 
-    def search_tavily_fallback(self, queries: List[str]) -> List[Dict[str, Any]]:
+    def search_tavily_fallback(self, queries: List[str], on_result: Optional[Callable[[Dict[str, Any]], None]] = None) -> List[Dict[str, Any]]:
         """
         Tavily 备用搜索 (仅获取 URL，无正文)
+        v5.1: 每条新结果立即回调 on_result（入队后马上开始爬取），最多取前 8 条
         """
         if not self.tavily_enabled: return []
         logger.info("🔄 [Fallback] 切换至 Tavily 并发搜索...")
         
-        from tavily import TavilyClient
-        tavily_client = TavilyClient(api_key=self.tavily_key)
+        # v5.1: 直接调用 HTTP API（与 WebSearchTool._search_tavily 一致）：SDK 把 429/432 转成
+        # 不带状态码的异常，限流器识别不到限流，也就不会按 Retry-After 冷却、降速
+        tavily_url = "https://api.tavily.com/search"
+        tavily_http = httpx.Client(timeout=provider_timeout("tavily", 30), proxy=self.proxy_url or None, trust_env=False)
         
         all_results = []
         seen_urls = set()
@@ -211,15 +248,18 @@ class ResearcherAgent:
             extended_queries.append({"q": f"{q} site:xiaohongshu.com", "type": "xhs"})
         
         @retryable
-        def _tavily_search(query: str, limit: int):
-            return tavily_client.search(
-                query=query,
-                search_depth="advanced",
-                max_results=limit,
-                days=30
-            )
+        def _tavily_search(query: str, limit: int) -> Dict[str, Any]:
+            payload = {"api_key": self.tavily_key, "query": query, "search_depth": "advanced", "max_results": limit, "days": 30}
+            # 限流器按 Retry-After 冷却后自动重发；仍被限流则放弃本条，不交给 retryable 盲目重试
+            resp = rate_limited("tavily", lambda: tavily_http.post(tavily_url, json=payload))
+            if resp.status_code in (429, 432):
+                logger.warning("⚠️ Tavily 额度受限 (%s)，跳过: %s", resp.status_code, query)
+                return {}
+            resp.raise_for_status()
+            return resp.json()
 
         def do_search(item):
+            check_cancelled()
             try:
                 limit = 2 if item['type'] == "general" else 1
                 resp = _tavily_search(item['q'], limit)
@@ -228,10 +268,12 @@ class ResearcherAgent:
                 logger.warning("Tavily 搜索失败: %s", e)
                 return []
 
-        with ThreadPoolExecutor(max_workers=5) as executor:
+        with tavily_http, ThreadPoolExecutor(max_workers=5) as executor:
             futures = [executor.submit(do_search, item) for item in extended_queries]
             for future in as_completed(futures):
                 for res in future.result():
+                    if len(all_results) >= TAVILY_MAX_RESULTS:
+                        break
                     if res['url'] not in seen_urls and "pdf" not in res['url']:
                         seen_urls.add(res['url'])
                         all_results.append({
@@ -240,79 +282,220 @@ class ResearcherAgent:
                             "text": "", # Tavily 不含全文，需后续爬取
                             "source": "Tavily"
                         })
+                        if on_result is not None:
+                            on_result(all_results[-1])
                         logger.info("✓ [Tavily] %s...", (res.get('title', '') or '')[:40])
         
-        return all_results[:8]
+        return all_results
+
+    def _scrape_one(self, client: httpx.Client, item: Dict[str, Any]) -> bool:
+        """为单个条目补充正文：Jina → 直连 → Tavily 兜底，成功返回 True"""
+        url = item['url']
+        logger.info("🌐 爬取: %s...", (item.get('title', '') or '')[:30])
+
+        @retryable
+        def _http_get(url: str, timeout=None):
+            return client.get(url, headers=SCRAPE_HEADERS, timeout=timeout)
+
+        # Jina 与直连爬取分别统计耗时、各自推导超时
+        jina_timeout = provider_timeout("jina", 60)
+        scrape_timeout = provider_timeout("scrape", 60)
+        try:
+            # Jina
+            jina_resp = rate_limited("jina", lambda: _http_get(f"https://r.jina.ai/{url}", timeout=jina_timeout))
+            if jina_resp.status_code == 200 and len(jina_resp.text) > 500:
+                item['text'] = jina_resp.text
+                logger.info("✓ Jina 成功")
+                return True
+        except Exception:
+            pass
+
+        try:
+            # Direct Fallback
+            raw_resp = timed("scrape", lambda: _http_get(url, timeout=scrape_timeout))
+            if raw_resp.status_code == 200:
+                # 极其简陋的文本提取
+                from bs4 import BeautifulSoup
+                soup = BeautifulSoup(raw_resp.text, 'html.parser')
+                for s in soup(['script', 'style']): s.extract()
+                item['text'] = soup.get_text()[:10000]
+                logger.info("✓ 直连成功")
+                return True
+        except Exception as e:
+            pass
+
+        # 3. Tavily 兜底 (作为提取器)
+        try:
+            if self.tavily:
+                #以此 URL 为 query 进行搜索，并请求 raw_content
+                tavily_resp = self.tavily.search(
+                    query=url,
+                    include_raw_content=True,
+                    max_results=1
+                )
+                if tavily_resp and 'results' in tavily_resp and tavily_resp['results']:
+                    raw_content = tavily_resp['results'][0].get('raw_content')
+                    if raw_content:
+                        item['text'] = raw_content[:10000]
+                        logger.info("✓ Tavily 兜底成功 (Raw Content)")
+                        return True
+        except Exception as e:
+            logger.error("❌ Tavily 兜底失败: %s", e)
+
+        logger.error("❌ 所有获取手段均失败")
+        return False
+
+    def _scrape_client(self) -> httpx.Client:
+        return httpx.Client(timeout=provider_timeout("jina", 60), proxy=self.proxy_url, follow_redirects=True)
 
-    def scrape_missing_content(self, items: List[Dict[str, Any]]) -> None:
+    def scrape_missing_content(self, items: List[Dict[str, Any]], on_progress: Optional[Callable[[], None]] = None) -> None:
         """
         对缺少正文的条目 (如来自 Tavily) 进行补充爬取
         使用 Jina Reader + Fallback
+        v5.1: 每处理完一个页面调用 on_progress()（用于写检查点，中断后已爬正文不再重爬）
         """
-        missing_items = [i for i in items if not i.get("text") or len(i.get("text")) < 200]
+        missing_items = [i for i in items if not _has_text(i)]
         if not missing_items:
             return
             
         logger.info("📖 [Step 2] 补充爬取 %s 个页面 (Jina/Fallback)...", len(missing_items))
         
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-        }
-        
-        crawled_texts = []
-        
-        @retryable
-        def _http_get(client: httpx.Client, url: str, headers: Optional[dict] = None):
-            return client.get(url, headers=headers)
-
-        with httpx.Client(timeout=60, proxy=self.proxy_url, follow_redirects=True) as client:
+        with self._scrape_client() as client:
             for item in missing_items:
-                url = item['url']
-                logger.info("🌐 爬取: %s...", (item.get('title', '') or '')[:30])
-                
-                try:
-                    # Jina
-                    jina_resp = _http_get(client, f"https://r.jina.ai/{url}", headers=headers)
-                    if jina_resp.status_code == 200 and len(jina_resp.text) > 500:
-                        item['text'] = jina_resp.text
-                        logger.info("✓ Jina 成功")
-                        continue
-                except:
-                    pass
-                
-                try:
-                    # Direct Fallback
-                    raw_resp = _http_get(client, url, headers=headers)
-                    if raw_resp.status_code == 200:
-                        # 极其简陋的文本提取
-                        from bs4 import BeautifulSoup
-                        soup = BeautifulSoup(raw_resp.text, 'html.parser')
-                        for s in soup(['script', 'style']): s.extract()
-                        item['text'] = soup.get_text()[:10000]
-                        logger.info("✓ 直连成功")
-                        continue
-                except Exception as e:
-                    pass
+                check_cancelled()
+                self._scrape_one(client, item)
+                if on_progress is not None:
+                    on_progress()
 
-                # 3. Tavily 兜底 (作为提取器)
-                try:
-                    if self.tavily:
-                        #以此 URL 为 query 进行搜索，并请求 raw_content
-                        tavily_resp = self.tavily.search(
-                            query=url,
-                            include_raw_content=True,
-                            max_results=1
-                        )
-                        if tavily_resp and 'results' in tavily_resp and tavily_resp['results']:
-                            raw_content = tavily_resp['results'][0].get('raw_content')
-                            if raw_content:
-                                item['text'] = raw_content[:10000]
-                                logger.info("✓ Tavily 兜底成功 (Raw Content)")
-                                continue
-                except Exception as e:
-                    logger.error("❌ Tavily 兜底失败: %s", e)
-                
-                logger.error("❌ 所有获取手段均失败")
+    def collect_sources(self, topic: str, queries: List[str], checkpoint: Optional[Checkpoint] = None) -> List[Dict[str, Any]]:
+        """
+        v5.1: 流水线式收集素材（生产者/消费者）
+        - 生产者：Perplexity 摘要、Tavily 并发搜索、Exa 搜索同时进行，每条新结果（按 URL 去重）立即入队；
+        - 消费者：scrape_workers 个爬取线程从队列取出缺正文的条目立即补爬，不再等全部搜索返回；
+        - 全部完成、有效素材达到 enough_sources 条、或到达 deadline 时即返回，进入笔记整理。
+        耗时从 “搜索总和 + 爬取总和” 降到接近 “最慢的搜索 + 最慢的爬取”。
+        进度（已完成的搜索通道 + 已获取正文）写入检查点，中断后续跑不再重复搜索/爬取。
+        """
+        settings = get_research_settings()
+        t0 = time.monotonic()
+        deadline = t0 + settings["deadline"]
+        enough = int(settings["enough_sources"])
+        workers = max(int(settings["scrape_workers"]), 1)
+
+        cond = threading.Condition()
+        todo: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue()
+        stop = threading.Event()
+        items: List[Dict[str, Any]] = []
+        by_url: Dict[str, Dict[str, Any]] = {}
+        state = {"pending": 0, "producers": 0}
+        saved = (checkpoint.get("sources") if checkpoint else None) or {}
+        searched = set(saved.get("searched", []))
+
+        def _save_progress() -> None:
+            # 调用方持有 cond。收集结束后仍在后台完成的爬取/搜索不再落盘：
+            # 否则可能在 run() 清除检查点之后把 research.json 写回，下次同输入运行会跳过搜索、复用过期素材
+            if checkpoint is not None and not stop.is_set():
+                checkpoint.put("sources", {"searched": sorted(searched), "items": [dict(i) for i in items]})
+
+        def emit(item: Dict[str, Any]) -> None:
+            with cond:
+                url = item.get("url")
+                if stop.is_set():
+                    return
+                known = by_url.get(url)
+                if known is not None:
+                    # 同一页面另一通道带了正文（如 Exa），直接补上，排队中的爬取会被跳过
+                    if not _has_text(known) and _has_text(item):
+                        known["text"] = item["text"]
+                        cond.notify_all()
+                    return
+                by_url[url] = item
+                items.append(item)
+                if not _has_text(item):
+                    state["pending"] += 1
+                    todo.put(item)
+                cond.notify_all()
+
+        def scraper() -> None:
+            with self._scrape_client() as client:
+                while True:
+                    item = todo.get()
+                    if item is None:
+                        return
+                    try:
+                        if not stop.is_set() and not is_cancelled() and not _has_text(item):
+                            self._scrape_one(client, item)
+                    except Exception as e:
+                        logger.error("❌ 爬取异常: %s", e)
+                    finally:
+                        with cond:
+                            state["pending"] -= 1
+                            _save_progress()
+                            cond.notify_all()
+
+        def producer(name: str, search: Callable[[], List[Dict[str, Any]]]) -> None:
+            try:
+                for item in search() or []:
+                    emit(item)
+                ok = True
+            except Exception as e:
+                logger.error("❌ %s 搜索失败: %s", name, e)
+                ok = False
+            with cond:
+                state["producers"] -= 1
+                if ok:
+                    searched.add(name)
+                    _save_progress()
+                cond.notify_all()
+
+        if saved.get("items"):
+            logger.info("♻️ 从检查点恢复 %d 条素材（已完成: %s）", len(saved["items"]), ", ".join(sorted(searched)) or "无")
+        for item in saved.get("items", []):
+            emit(item)
+
+        searches = {
+            "perplexity": (self.pplx_enabled, lambda: self.search_perplexity(topic)),
+            "tavily": (self.tavily_enabled, lambda: self.search_tavily_fallback(queries, on_result=emit)),
+            "exa": (self.exa_enabled, lambda: self.search_exa(topic, queries, on_result=emit)),
+        }
+        threads = [threading.Thread(target=scraper, daemon=True, name=f"scrape-{i}") for i in range(workers)]
+        for name, (enabled, search) in searches.items():
+            if enabled and name not in searched:
+                state["producers"] += 1
+                threads.append(threading.Thread(target=producer, args=(name, search), daemon=True, name=f"search-{name}"))
+        logger.info("🚚 [Step 1-2] 搜索与爬取流水线启动: %d 路搜索 · %d 个爬取线程", state["producers"], workers)
+        for t in threads:
+            t.start()
+
+        try:
+            with cond:
+                while True:
+                    check_cancelled()
+                    ready = sum(1 for i in items if _has_text(i))
+                    if state["producers"] == 0 and state["pending"] == 0:
+                        break
+                    if ready >= enough:
+                        logger.info("   ✅ 有效素材已达 %d 条，提前进入笔记整理", ready)
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        logger.warning("   ⏰ 达到收集时限 (%ss)，以已获取的 %d 条素材进入笔记整理", settings["deadline"], ready)
+                        break
+                    cond.wait(min(remaining, 0.5))
+                stop.set()
+                collected = [dict(i) for i in items]
+        finally:
+            # 未开始的爬取任务直接丢弃；仍在进行的请求在后台结束，结果不再采用
+            with cond:
+                stop.set()
+            for _ in range(workers):
+                todo.put(None)
+
+        # Perplexity 摘要放在最前（整理时素材总长度有上限）
+        collected.sort(key=lambda i: i.get("source") != "Perplexity")
+        logger.info("   📦 素材收集完成: %d 条，其中 %d 条有正文 (%.1fs)",
+                    len(collected), sum(1 for i in collected if _has_text(i)), time.monotonic() - t0)
+        return collected
 
     def synthesize_notes(self, items: List[Dict[str, Any]], topic: str, strategic_intent: Optional[str] = None, imitation_source: str = "") -> str:
         """
@@ -380,35 +563,30 @@ class ResearcherAgent:
         """
 
         try:
+            messages = [
+                {"role": "system", "content": prompt},
+                {"role": "user", "content": f"素材内容：\n{combined_text[:60000]}"} # 控制总长度
+            ]
+
             @retryable
             @track_cost(context="synthesize_notes")
-            def _chat_create():
+            def _chat_create(request_messages):
                 return self.client.chat.completions.create(
                     model="deepseek-chat",
-                    messages=[
-                        {"role": "system", "content": prompt},
-                        {"role": "user", "content": f"素材内容：\n{combined_text[:60000]}"} # 控制总长度
-                    ],
+                    messages=request_messages,
                     temperature=0.3,
                     max_tokens=4000,
                     stream=True
                 )
 
-            response = _chat_create()
-
             logger.info("%s", "="*20 + " 笔记生成中 " + "="*20)
 
-            collected = []
-            for chunk in response:
-                content = chunk.choices[0].delta.content
-                if content:
-                    sys.stdout.write(content)
-                    sys.stdout.flush()
-                    collected.append(content)
+            # v5.1: 边生成边写 .partial，流中断或被 max_tokens 截断时续写
+            notes = stream_chat("notes", _chat_create, messages)
             sys.stdout.write("\n")
             sys.stdout.flush()
 
-            return "".join(collected)
+            return notes
 
         except Exception as e:
             logger.error("❌ 整理失败: %s", e)
@@ -463,6 +641,7 @@ class ResearcherAgent:
             return []
 
     def run(self, topic: str, queries: List[str], strategic_intent: Optional[str] = None, fast_research: Optional[str] = None, dry_run: bool = False) -> str:
+        started = time.perf_counter()
         logger.info("%s", "="*60)
         logger.info("🔬 ResearcherAgent v4.3 (Multi-Search)%s", " (🧪 DRY RUN)" if dry_run else "")
         logger.info("📌 选题: %s", topic)
@@ -498,43 +677,29 @@ class ResearcherAgent:
                 intent_section = f"\n\n## 🎯 战略意图摘要\n\n{strategic_intent.strip()}\n" if strategic_intent else ""
                 f.write(f"# 🔬 自动研究笔记 v4.3 (🧪 Mock)\n\n**选题**: {topic}\n**时间**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n{intent_section}\n---\n\n{mock_notes}")
             logger.info("📁 [Mock] 笔记已保存: %s", notes_file)
+            record_artifact(notes_file, title=topic, duration_ms=(time.perf_counter() - started) * 1000)
             return mock_notes
 
+        # v5.1: 中间结果写入当日检查点，中断后 `python run.py resume` 从断点继续（输入变化则作废）
+        checkpoint = Checkpoint("research", fingerprint(topic, queries, strategic_intent, fast_research))
+
         # v4.2: 如果有 Fast Research 指引，生成更精准的搜索查询
         if fast_research:
-            generated_queries = self._generate_search_queries_from_fast_research(fast_research, topic)
+            generated_queries = checkpoint.step(
+                "queries", lambda: self._generate_search_queries_from_fast_research(fast_research, topic))
             if generated_queries:
                 queries = generated_queries + queries  # 合并：精准查询优先
                 queries = list(dict.fromkeys(queries))[:10]  # 去重，限制数量
 
-        results = []
-        
-        # 1. 首选 Perplexity 获取摘要
-        pplx_results = self.search_perplexity(topic)
-        if pplx_results:
-            results.extend(pplx_results)
+        # 1-2. v5.1: Perplexity 摘要、Tavily、Exa 同时搜索，结果边到边爬（Perplexity 与 Exa 自带正文）
+        results = self.collect_sources(topic, queries, checkpoint=checkpoint)
+        if any(r.get("source") == "Perplexity" for r in results):
             logger.info("   ✅ 已获取 Perplexity 研究摘要")
 
-        # 2. 无论是否有 pplx，都通过 Tavily 或 Exa 获取更多参考链接和正文
-        # 优先 Tavily (因为快且稳)，Exa 作为兜底
-        search_results = []
-        if self.tavily_enabled:
-            search_results = self.search_tavily_fallback(queries)
-        
-        # 3. 如果 Tavily 失败或没结果，尝试 Exa 兜底
-        if not search_results and self.exa_enabled:
-            search_results = self.search_exa(topic, queries)
-            
-        results.extend(search_results)
-
         if not results:
             logger.warning("⚠️ 所有搜索通道均未找到有效内容")
             return ""
 
-        # 4. 补充爬取 (针对 Tavily 来源或 Exa 没抓到正文的)
-        # 注意：Perplexity 结果已经自带 content (text 字段)，不需要爬取
-        self.scrape_missing_content(results)
-
         # v5.2: 检查是否有仿写原文素材，如果有，将其加入研究背景
         imitation_source = ""
         from config import get_stage_dir
@@ -556,6 +721,8 @@ class ResearcherAgent:
             f.write(f"# 🔬 自动研究笔记 v4.3\n\n**选题**: {topic}\n**时间**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n{intent_section}\n---\n\n{notes}")
 
         logger.info("📁 笔记已保存: %s", notes_file)
+        record_artifact(notes_file, title=topic, duration_ms=(time.perf_counter() - started) * 1000)
+        checkpoint.clear()
         return notes
 
 def main():
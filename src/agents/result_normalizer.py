@@ -0,0 +1,195 @@
+"""
+🧹 搜索结果归一化与近重复合并 (Result Normalizer)
+
+同一篇文章经常被雷达、A 路“新功能”查询和 B 路 site: 查询各搜到一次，
+原样进入 Step 1 的规划情报和 Step 2 的报告。这里在拼 prompt 之前统一处理：
+- URL 规范化：去掉 utm_* / 点击 ID 与各站点已知的分享追踪参数和锚点，m. / mobile. / amp 变体归并到同一地址；
+  from / source / src 这类通用参数名在很多站点用于选择内容，只按站点剔除；
+- 近重复合并：标题 + 正文开头的字符 shingle（3-gram）Jaccard 相似度超过阈值即视为同一条；
+- 保留来源：合并后的结果记录所有搜到它的路线 (lanes) 与查询 (queries)，排序与报告可据此体现跨路共现。
+"""
+import re
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from config import get_logger
+
+logger = get_logger(__name__)
+
+SHINGLE_SIZE = 3
+DEFAULT_THRESHOLD = 0.8
+# 参与比对的正文长度：摘要前段足以区分，转载的尾部差异（版权声明等）不计入
+BODY_PREFIX = 200
+
+# 所有站点都剔除：广告/社交平台注入的点击 ID，从不用于选择内容
+_TRACKING_PARAMS = {"fbclid", "gclid", "mc_cid", "mc_eid", "igshid"}
+_TRACKING_PREFIXES = ("utm_",)
+# 按站点（含子域名）剔除的分享追踪参数
+_TRACKING_PARAMS_BY_HOST = {
+    "xiaohongshu.com": {"xsec_token", "xsec_source", "share_from_user_hidden", "app_platform", "app_version",
+                        "share_id", "apptime", "author_share", "type"},
+    "bilibili.com": {"spm_id_from", "vd_source", "share_source", "share_medium", "share_plat", "share_session_id",
+                     "share_tag", "share_from", "from_spmid", "timestamp", "unique_k", "bbid", "ts"},
+    "zhihu.com": {"share_code", "utm_psn", "utm_oi"},
+    "csdn.net": {"spm", "ops_request_misc", "request_id", "biz_id"},
+    "douyin.com": {"previous_page", "share_token", "from", "u_code", "did", "iid", "with_sec_did"},
+    "weibo.com": {"from", "wm", "sourcetype"},
+    "toutiao.com": {"app", "timestamp", "share_token", "tt_from", "wid"},
+    "x.com": {"s", "t", "ref_src"},
+    "twitter.com": {"s", "t", "ref_src"},
+    "youtube.com": {"si", "feature", "pp"},
+    "youtu.be": {"si", "feature"},
+}
+_MOBILE_PREFIXES = ("m.", "mobile.", "amp.", "wap.")
+# 微信文章以这些参数区分，其余（chksm / scene / srcid / mpshare …）都是分享追踪参数
+_KEEP_PARAMS_BY_HOST = {"mp.weixin.qq.com": {"__biz", "mid", "idx", "sn"}}
+_NORMALIZE_RE = re.compile(r"[\s\W_]+", re.UNICODE)
+
+
+def _host_params(table: Dict[str, set], host: str) -> Optional[set]:
+    for domain, params in table.items():
+        if host == domain or host.endswith("." + domain):
+            return params
+    return None
+
+
+def _is_tracking(key: str, host_params: Optional[set]) -> bool:
+    key = key.lower()
+    return key in _TRACKING_PARAMS or key.startswith(_TRACKING_PREFIXES) or (host_params is not None and key in host_params)
+
+
+def canonical_url(url: str) -> str:
+    """规范化 URL，用作去重键；无法解析时原样返回"""
+    if not url:
+        return ""
+    try:
+        parts = urlsplit(url.strip())
+    except ValueError:
+        return url.strip()
+    host = (parts.hostname or "").lower()
+    if not host:
+        return url.strip()
+    if host.startswith("www."):
+        host = host[4:]
+    for prefix in _MOBILE_PREFIXES:
+        if host.startswith(prefix) and host.count(".") >= 2:
+            host = host[len(prefix):]
+            break
+
+    path = re.sub(r"/+", "/", parts.path or "/")
+    path = re.sub(r"/amp/?$|\.amp$|/amp\.html$", "", path) or "/"
+    if len(path) > 1:
+        path = path.rstrip("/")
+
+    keep = _KEEP_PARAMS_BY_HOST.get(host)
+    host_params = _host_params(_TRACKING_PARAMS_BY_HOST, host)
+    query = [
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=False)
+        if (k in keep if keep else not _is_tracking(k, host_params))
+    ]
+    # 协议保持原样：部分站点的 http / https 并非同一内容
+    return urlunsplit(((parts.scheme or "https").lower(), host, path, urlencode(sorted(query)), ""))
+
+
+def _url_key(url: str) -> str:
+    """去重用的 URL 键；站点首页（如 Perplexity 摘要的占位链接）不是具体文章，不参与 URL 去重"""
+    key = canonical_url(url)
+    parts = urlsplit(key)
+    return key if (parts.path not in ("", "/") or parts.query) else ""
+
+
+def shingles(text: str, n: int = SHINGLE_SIZE) -> frozenset:
+    text = _NORMALIZE_RE.sub("", (text or "").lower())
+    if len(text) <= n:
+        return frozenset([text]) if text else frozenset()
+    return frozenset(text[i:i + n] for i in range(len(text) - n + 1))
+
+
+def _fingerprint(result: Dict[str, Any]) -> frozenset:
+    return shingles(f"{result.get('title') or ''} {(result.get('body') or '')[:BODY_PREFIX]}")
+
+
+class ResultDeduper:
+    """
+    增量去重器：add() 返回本批中首次出现的结果，重复项合并进已保留的那条
+    （lanes / queries / urls 追加），已保留结果对象原地更新。
+    """
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD):
+        self.threshold = threshold
+        self.kept: List[Dict[str, Any]] = []
+        self._by_url: Dict[str, int] = {}
+        self._grams: List[frozenset] = []
+        self._postings: Dict[str, List[int]] = {}
+        self.merged = 0
+
+    def _near_duplicate(self, grams: frozenset) -> Optional[int]:
+        if not grams:
+            return None
+        overlap = Counter()
+        for g in grams:
+            for idx in self._postings.get(g, ()):
+                overlap[idx] += 1
+        best: Tuple[float, int] = (0.0, -1)
+        for idx, inter in overlap.items():
+            union = len(grams) + len(self._grams[idx]) - inter
+            score = inter / union if union else 0.0
+            if score > best[0]:
+                best = (score, idx)
+        return best[1] if best[0] >= self.threshold else None
+
+    @staticmethod
+    def _merge(target: Dict[str, Any], dup: Dict[str, Any]) -> None:
+        for key, value in (("lanes", dup.get("lane")), ("queries", dup.get("query"))):
+            if value and value not in target.setdefault(key, []):
+                target[key].append(value)
+        url = dup.get("url")
+        if url and url not in target.setdefault("urls", []):
+            target["urls"].append(url)
+        # 保留信息更全的正文与更早的发布时间
+        if len(dup.get("body") or "") > len(target.get("body") or ""):
+            target["body"] = dup["body"]
+        if dup.get("published") and (not target.get("published") or dup["published"] < target["published"]):
+            target["published"] = dup["published"]
+
+    def add(self, results: Iterable[Dict[str, Any]], lane: Optional[str] = None, query: Optional[str] = None) -> List[Dict[str, Any]]:
+        fresh = []
+        for r in results or []:
+            if lane:
+                r.setdefault("lane", lane)
+            if query:
+                r.setdefault("query", query)
+            key = _url_key(r.get("url", ""))
+            grams = _fingerprint(r)
+            idx = self._by_url.get(key) if key else None
+            if idx is None:
+                idx = self._near_duplicate(grams)
+            if idx is not None:
+                self._merge(self.kept[idx], r)
+                self.merged += 1
+                continue
+
+            r["canonical_url"] = key or canonical_url(r.get("url", ""))
+            r["lanes"] = [r["lane"]] if r.get("lane") else []
+            r["queries"] = [r["query"]] if r.get("query") else []
+            r["urls"] = [r["url"]] if r.get("url") else []
+            idx = len(self.kept)
+            self.kept.append(r)
+            self._grams.append(grams)
+            for g in grams:
+                self._postings.setdefault(g, []).append(idx)
+            if key:
+                self._by_url[key] = idx
+            fresh.append(r)
+        return fresh
+
+
+def dedup_results(results: Iterable[Dict[str, Any]], threshold: float = DEFAULT_THRESHOLD) -> List[Dict[str, Any]]:
+    """一次性去重：返回保留的结果（保持首次出现的顺序），每条带 lanes / queries / urls 来源记录"""
+    results = list(results)
+    deduper = ResultDeduper(threshold)
+    kept = deduper.add(results)
+    if deduper.merged:
+        logger.info("🧹 结果去重: %d 条 -> %d 条 (合并 %d 条重复/近重复)", len(results), len(kept), deduper.merged)
+    return kept
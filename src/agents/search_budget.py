@@ -0,0 +1,219 @@
+"""
+💳 搜索额度预算 (Search Budget Planner)
+
+一次 hunt 的搜索额度分散在雷达、A/B/C 三路、TrendingDiscoverer 探测、热榜“终极救援”和 Step 2 深挖上，
+此前没有总预算，也不区分服务商成本（如 Tavily advanced 深度按 2 次计费）。这里在开跑前：
+1. 估算：按当前配置（雷达查询数、A 路目标数 × 3、B/C 抽样数、热榜源数、Step 2 方向数）
+   估算各路需要的请求数、额度和耗时（耗时取各服务商近期 p50，见 latency_tracker）；
+2. 分配：按各路期望价值 (lane_weights) 做“注水”分配 —— 每路先保底 1 次，
+   剩余额度按权重分给仍有缺口的路线，单路不超过其需求；
+3. 降级：额度不足时减少 A 路目标数、B/C 抽样数，跳过低价值的救援/探测，Tavily 改用 basic 深度；
+4. 结算：WebSearchTool 每次真实请求按服务商成本记账（合并/复用的请求不计），结束时输出计划 vs 实际。
+
+settings.yaml 配置（均可选）：
+    search_budget:
+      credits: 100        # 0 = 不限额，只记账
+      costs: {perplexity: 1, tavily_basic: 1, tavily_advanced: 2, exa: 1}
+      lane_weights: {step2: 1.0, A: 1.0, radar: 0.9, B: 0.6, C: 0.6, discover: 0.5, rescue: 0.3}
+"""
+import contextvars
+import math
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+import config
+from config import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_CREDITS = 100
+DEFAULT_COSTS = {"perplexity": 1.0, "tavily_basic": 1.0, "tavily_advanced": 2.0, "exa": 1.0}
+DEFAULT_LANE_WEIGHTS = {"step2": 1.0, "A": 1.0, "radar": 0.9, "B": 0.6, "C": 0.6, "discover": 0.5, "rescue": 0.3}
+LANE_LABELS = {
+    "radar": "雷达", "A": "A路-锚点", "B": "B路-收益", "C": "C路-损失",
+    "discover": "外部探测", "rescue": "热榜救援", "step2": "Step2 深挖", "other": "未规划",
+}
+# 未进入任何 lane 上下文的请求（如仿写模式）记在这里
+UNPLANNED = "other"
+QUERIES_PER_TARGET = 3
+QUERIES_PER_EVENT = 2
+EXPECTED_EVENTS = 3
+DISCOVER_QUERIES = 4
+MAX_EXPANSIONS = 4
+DEFAULT_LATENCY = 5.0
+
+_CURRENT_LANE: contextvars.ContextVar = contextvars.ContextVar("search_lane", default=UNPLANNED)
+
+
+def get_budget_settings() -> dict:
+    raw = config.SETTINGS.get("search_budget") or {}
+    return raw if isinstance(raw, dict) else {}
+
+
+class SearchBudget:
+    def __init__(self, needs: Dict[str, int], provider: str, credits: Optional[float] = None):
+        settings = get_budget_settings()
+        self.costs = dict(DEFAULT_COSTS)
+        self.costs.update({k: float(v) for k, v in (settings.get("costs") or {}).items()})
+        self.weights = dict(DEFAULT_LANE_WEIGHTS)
+        self.weights.update({k: float(v) for k, v in (settings.get("lane_weights") or {}).items()})
+        self.credits = float(credits if credits is not None else settings.get("credits", DEFAULT_CREDITS))
+        self.provider = provider
+        self.needs = {lane: max(int(n), 0) for lane, n in needs.items()}
+
+        full_cost = sum(self.needs.values()) * self._unit_cost("advanced")
+        if self.credits <= 0:
+            # credits: 0 表示不限额，只做记账
+            self.credits = full_cost
+        # 全量高级深度放不下时，Tavily 先降到 basic 深度，再按请求数削减
+        self.tavily_depth = "advanced" if full_cost <= self.credits else "basic"
+        self.allocation = self._allocate(self.credits / self._unit_cost(self.tavily_depth))
+        self.spent: Dict[str, float] = {}
+        self.calls: Dict[str, int] = {}
+        self._reserved: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _unit_cost(self, depth: str) -> float:
+        if self.provider == "tavily":
+            return self.costs.get(f"tavily_{depth}", 1.0)
+        return self.costs.get(self.provider, 1.0)
+
+    def _allocate(self, capacity: float) -> Dict[str, int]:
+        """注水分配：每路先保底 1 次（需求为 0 的除外），剩余按权重分给仍有缺口的路线"""
+        lanes = sorted(self.needs, key=lambda l: -self.weights.get(l, 0.5))
+        alloc = {lane: 0 for lane in lanes}
+        remaining = int(math.floor(capacity))
+        for lane in lanes:
+            if remaining > 0 and self.needs[lane] > 0:
+                alloc[lane] = 1
+                remaining -= 1
+        while remaining > 0:
+            open_lanes = [l for l in lanes if alloc[l] < self.needs[l]]
+            if not open_lanes:
+                break
+            total_w = sum(self.weights.get(l, 0.5) for l in open_lanes)
+            granted = 0
+            for lane in open_lanes:
+                share = int(remaining * self.weights.get(lane, 0.5) / total_w)
+                share = min(share, self.needs[lane] - alloc[lane])
+                alloc[lane] += share
+                granted += share
+            if granted == 0:
+                # 余数不足以按比例分配时，逐个给权重最高的缺口路线
+                alloc[open_lanes[0]] += 1
+                granted = 1
+            remaining -= granted
+        return alloc
+
+    # ---------- 计划查询 ----------
+
+    def allowed(self, lane: str) -> int:
+        """该路线计划内可发出的请求数"""
+        return self.allocation.get(lane, 0)
+
+    def targets_for(self, lane: str, per_item: int) -> int:
+        """每个目标需要 per_item 次请求时，可覆盖的目标数（至少 1 个，只要该路线有额度）"""
+        n = self.allowed(lane)
+        return max(1, n // per_item) if n else 0
+
+    @property
+    def degraded(self) -> bool:
+        return self.tavily_depth != "advanced" or any(self.allocation[l] < n for l, n in self.needs.items())
+
+    def estimate_seconds(self, concurrency: int = 1) -> float:
+        from agents.latency_tracker import get_latency_histograms
+        p50 = get_latency_histograms().percentile(self.provider, 0.5) or DEFAULT_LATENCY
+        return sum(self.allocation.values()) * p50 / max(concurrency, 1)
+
+    # ---------- 记账 ----------
+
+    def charge(self, provider: str, depth: str = "basic") -> None:
+        cost = self.costs.get(f"tavily_{depth}", 1.0) if provider == "tavily" else self.costs.get(provider, 1.0)
+        lane = _CURRENT_LANE.get()
+        with self._lock:
+            self.spent[lane] = self.spent.get(lane, 0.0) + cost
+            self.calls[lane] = self.calls.get(lane, 0) + 1
+
+    def try_reserve(self, lane: str) -> bool:
+        """动态路线（如热榜救援，并发触发）：占用一次该路线的请求额度，额度用完返回 False"""
+        with self._lock:
+            if self._reserved.get(lane, 0) >= self.allocation.get(lane, 0):
+                return False
+            self._reserved[lane] = self._reserved.get(lane, 0) + 1
+            return True
+
+    # ---------- 报告 ----------
+
+    def plan_summary(self) -> str:
+        unit = self._unit_cost(self.tavily_depth)
+        parts = [f"{LANE_LABELS.get(l, l)} {self.allocation[l]}/{self.needs[l]}" for l in self.needs]
+        planned = sum(self.allocation.values()) * unit
+        mode = "⚠️ 额度不足，已降级" if self.degraded else "额度充足"
+        return (f"💳 搜索预算 {self.credits:.0f} 额度 · 计划 {planned:.0f} ({self.provider}"
+                f"{'/' + self.tavily_depth if self.provider == 'tavily' else ''}) · {mode}\n"
+                f"      请求分配(计划/需求): {' · '.join(parts)} · 预计耗时 ~{self.estimate_seconds():.0f}s")
+
+    def report(self) -> str:
+        unit = self._unit_cost(self.tavily_depth)
+        lines = ["💳 搜索额度结算 (实际/计划):"]
+        for lane in list(self.needs) + [l for l in self.spent if l not in self.needs]:
+            planned = self.allocation.get(lane, 0) * unit
+            spent = self.spent.get(lane, 0.0)
+            if not planned and not spent:
+                continue
+            flag = " ⚠️超支" if spent > planned and lane != UNPLANNED else ""
+            lines.append(f"      {LANE_LABELS.get(lane, lane)}: {spent:.0f}/{planned:.0f} ({self.calls.get(lane, 0)} 次请求){flag}")
+        total_spent = sum(self.spent.values())
+        lines.append(f"      合计: {total_spent:.0f}/{sum(self.allocation.values()) * unit:.0f} · 预算 {self.credits:.0f}")
+        return "\n".join(lines)
+
+
+_BUDGET: Optional[SearchBudget] = None
+
+
+def plan_hunt_budget(search_tool, directed_topic: Optional[str] = None) -> SearchBudget:
+    """按当前配置估算本次 hunt 各路需求并生成预算（设为当前运行的预算）"""
+    global _BUDGET
+    from config import EFFICIENCY_KEYWORDS, PAIN_KEYWORDS, RADAR_QUERIES, TREND_SOURCES
+
+    extra = 1 if directed_topic else 0
+    needs = {
+        "radar": len(RADAR_QUERIES),
+        # 随机模式最多 6 个目标；定向模式最多 4 个目标 + 产品功能扩展查询
+        "A": (4 if directed_topic else 6) * QUERIES_PER_TARGET + (MAX_EXPANSIONS if directed_topic else 0),
+        "B": min(3, len(EFFICIENCY_KEYWORDS)) + extra,
+        "C": min(3, len(PAIN_KEYWORDS)) + extra,
+        "discover": DISCOVER_QUERIES,
+        "rescue": len(TREND_SOURCES),
+        "step2": EXPECTED_EVENTS * QUERIES_PER_EVENT,
+    }
+    if getattr(search_tool, "pplx_enabled", False):
+        provider = "perplexity"
+    elif getattr(search_tool, "tavily_enabled", False):
+        provider = "tavily"
+    else:
+        provider = "exa"
+    _BUDGET = SearchBudget(needs, provider)
+    return _BUDGET
+
+
+def get_search_budget() -> Optional[SearchBudget]:
+    """当前运行的预算；未规划（如仿写模式、单独调用）时返回 None，调用方按无限额度处理"""
+    return _BUDGET
+
+
+def end_search_budget() -> Optional[str]:
+    global _BUDGET
+    budget, _BUDGET = _BUDGET, None
+    return budget.report() if budget else None
+
+
+@contextmanager
+def lane(name: str) -> Iterator[None]:
+    """标记当前线程发出的搜索属于哪一路（线程池任务需在任务函数内部设置）"""
+    token = _CURRENT_LANE.set(name)
+    try:
+        yield
+    finally:
+        _CURRENT_LANE.reset(token)
@@ -0,0 +1,336 @@
+"""
+🧾 结构化旁路文件 (JSON Sidecars)
+
+Markdown 报告给人看，旁路 JSON 给程序读：
+- 每份 report_HHMM.md 旁边写一份 report_HHMM.digest.json（候选选题、评级、心理锚点、今日主推、关键来源、关键词计数）；
+- FINAL_DECISION.md 旁边写一份 FINAL_DECISION.json（标题、关键词、卖点、Fast Research、视觉脚本），
+  research / draft / all 直接读取，不再每次正则 + repair_json；
+- 下游（final_summary 等）直接读取摘要，不再把整份报告（含全部原始情报）塞进 prompt；
+- 旁路文件记录源文件的 mtime/size，报告被手工修改后自动判定过期并回退到重新解析 Markdown。
+"""
+import os
+import re
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from config import get_logger
+
+logger = get_logger(__name__)
+
+# v2: 来源标题不再在冒号处截断，旧摘要自动重新解析
+SIDECAR_VERSION = 2
+DIGEST_SUFFIX = ".digest.json"
+
+# 每份报告摘要保留的关键来源数量
+MAX_SOURCES_PER_EVENT = 3
+
+
+# ================= 通用读写 =================
+
+def sidecar_path(source_path: str, suffix: str = DIGEST_SUFFIX) -> str:
+    return os.path.splitext(source_path)[0] + suffix
+
+
+def _source_stamp(source_path: str) -> Optional[List[int]]:
+    try:
+        st = os.stat(source_path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+def write_sidecar(source_path: str, data: Dict[str, Any], suffix: str = DIGEST_SUFFIX) -> str:
+    """原子写入旁路文件，并记录源文件指纹用于过期判断"""
+    path = sidecar_path(source_path, suffix)
+    payload = dict(data)
+    payload["_meta"] = {
+        "version": SIDECAR_VERSION,
+        "source": os.path.basename(source_path),
+        "source_stamp": _source_stamp(source_path),
+        "written_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_sidecar(source_path: str, suffix: str = DIGEST_SUFFIX) -> Optional[Dict[str, Any]]:
+    """读取旁路文件；不存在、版本不符或源文件已被修改时返回 None"""
+    path = sidecar_path(source_path, suffix)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    meta = data.get("_meta") or {}
+    if meta.get("version") != SIDECAR_VERSION:
+        return None
+    if meta.get("source_stamp") != _source_stamp(source_path):
+        return None
+    return data
+
+
+# ================= 选题报告摘要 =================
+
+_HEADER_RE = re.compile(r"# 🚀 选题雷达报告 v[\d.]+ \((.*?)\)")
+_TIME_RE = re.compile(r"\*\*时间\*\*:\s*(.+)")
+_CANDIDATE_RE = re.compile(r"###\s*选题\s*(\d+)\s*[:：]\s*(.+)")
+_FIELD_RE = re.compile(r"\*\s*\*\*(心理锚点|核心价值|热度评级|推荐理由)\*\*\s*[:：]\s*(.+)")
+_RECOMMEND_RE = re.compile(r"## 今日主推\s*(.*?)(?:\n\n|\n##|$)", re.DOTALL)
+_EVENT_RE = re.compile(r"###\s*🎯\s*选题:\s*(.+?)\s*\(([^()]*)\)\s*$")
+# step2 的两种来源行：用户反馈 "- **标题**: 摘要 …"，官方信息 "- 标题 …"；只在加粗标题后的冒号处切分，标题内的冒号保留
+_SOURCE_RE = re.compile(
+    r"^-\s*(?:\*\*(.+?)\*\*:\s*.*?|(.+?))(?:\s*\(另见:[^()]*\))?\s*\[\[来源\]\((.+?)\)\]\s*$")
+
+_FIELD_KEYS = {"心理锚点": "anchor", "核心价值": "value", "热度评级": "rating", "推荐理由": "reason"}
+
+
+def parse_candidates(analysis: str) -> List[Dict[str, Any]]:
+    """从 step3 选题分析中提取候选选题（标题、心理锚点、核心价值、星级、推荐理由）"""
+    candidates: List[Dict[str, Any]] = []
+    current: Optional[Dict[str, Any]] = None
+    for line in (analysis or "").splitlines():
+        m = _CANDIDATE_RE.search(line)
+        if m:
+            current = {"rank": int(m.group(1)), "title": m.group(2).strip().strip("*").strip()}
+            candidates.append(current)
+            continue
+        if current is None:
+            continue
+        f = _FIELD_RE.search(line)
+        if f:
+            key = _FIELD_KEYS[f.group(1)]
+            value = f.group(2).strip()
+            current[key] = value
+            if key == "rating":
+                current["stars"] = value.count("⭐")
+    return candidates
+
+
+def parse_sources(raw_data: str, per_event: int = MAX_SOURCES_PER_EVENT) -> List[Dict[str, Any]]:
+    """从 step2 深度验证情报中提取每个方向的前几条来源 [{event, angle, sources: [{title, url}]}]"""
+    events: List[Dict[str, Any]] = []
+    current: Optional[Dict[str, Any]] = None
+    for line in (raw_data or "").splitlines():
+        line = line.strip()
+        m = _EVENT_RE.match(line)
+        if m:
+            current = {"event": m.group(1).strip(), "angle": m.group(2).strip(), "sources": []}
+            events.append(current)
+            continue
+        if current is None or len(current["sources"]) >= per_event:
+            continue
+        s = _SOURCE_RE.match(line)
+        if s:
+            current["sources"].append({"title": (s.group(1) or s.group(2)).strip(), "url": s.group(3).strip()})
+    return events
+
+
+def _keyword_counts(text: str) -> Dict[str, int]:
+    from agents.keyword_automaton import get_keyword_catalog
+    catalog = get_keyword_catalog()
+    counts = catalog.automaton.count(text)
+    return {kw: c for kw, c in zip(catalog.keywords, counts) if c}
+
+
+def build_report_digest(
+    raw_data: str,
+    analysis: str,
+    directed_topic: Optional[str] = None,
+    created: Optional[str] = None,
+    strategy: str = "",
+) -> Dict[str, Any]:
+    rec = _RECOMMEND_RE.search(analysis or "")
+    return {
+        "kind": "report_digest",
+        "created": created or datetime.now().strftime("%Y-%m-%d %H:%M"),
+        "directed_topic": directed_topic,
+        "strategy": strategy,
+        "candidates": parse_candidates(analysis),
+        "recommendation": rec.group(1).strip() if rec else "",
+        "events": parse_sources(raw_data),
+        "keyword_counts": _keyword_counts(f"{raw_data}\n{analysis}"),
+    }
+
+
+def parse_report_markdown(content: str) -> Dict[str, Any]:
+    """旧报告（无旁路文件）的回退解析：按固定章节拆出情报与分析后生成摘要"""
+    header = _HEADER_RE.search(content)
+    mode = header.group(1).strip() if header else ""
+    directed = mode[len("定向搜索:"):].strip() if mode.startswith("定向搜索:") else None
+    created = _TIME_RE.search(content)
+    raw_part, _, analysis = content.partition("## 选题分析")
+    raw_data = raw_part.split("## 深度验证情报", 1)[-1]
+    return build_report_digest(
+        raw_data, analysis, directed_topic=directed,
+        created=created.group(1).strip() if created else None,
+        strategy="" if directed else mode,
+    )
+
+
+def load_report_digest(report_path: str, backfill: bool = True) -> Dict[str, Any]:
+    """优先读取旁路摘要；缺失或过期时解析 Markdown，并（可选）回填旁路文件"""
+    digest = read_sidecar(report_path)
+    if digest is not None:
+        return digest
+    with open(report_path, "r", encoding="utf-8") as f:
+        digest = parse_report_markdown(f.read())
+    if backfill:
+        try:
+            write_sidecar(report_path, digest)
+        except OSError as e:
+            logger.warning("⚠️ 摘要回填失败 %s: %s", os.path.basename(report_path), e)
+    return digest
+
+
+def format_digest(name: str, digest: Dict[str, Any], candidates: List[Dict[str, Any]], max_sources: int = 2) -> str:
+    """把一份报告摘要渲染成紧凑的 prompt 片段（只含入选候选与少量来源）"""
+    mode = f"定向: {digest['directed_topic']}" if digest.get("directed_topic") else (digest.get("strategy") or "全网雷达")
+    lines = [f"=== {name} ({digest.get('created', '')}, {mode}) ==="]
+    for c in candidates:
+        lines.append(f"- 选题{c.get('rank', '?')}: {c.get('title', '')} | 锚点: {c.get('anchor', '-')} | 评级: {c.get('rating', '-')}")
+        for key, label in (("value", "价值"), ("reason", "理由")):
+            if c.get(key):
+                lines.append(f"    {label}: {c[key][:120]}")
+    if digest.get("recommendation"):
+        lines.append(f"- 今日主推: {digest['recommendation'][:200]}")
+    sources = [s for e in digest.get("events", []) for s in e.get("sources", [])][:max_sources]
+    if sources:
+        lines.append("- 关键来源: " + "；".join(f"{s['title']} ({s['url']})" for s in sources))
+    return "\n".join(lines)
+
+
+# ================= 最终选题决策 =================
+
+DECISION_SUFFIX = ".json"   # FINAL_DECISION.md -> FINAL_DECISION.json
+
+_DECISION_MEMO: Dict[str, Any] = {}
+
+
+def parse_final_decision(content: str) -> Dict[str, Any]:
+    """
+    v4.2: 智能解析 FINAL_DECISION.md，提取结构化信息
+
+    Returns:
+        dict: {
+            'topic': 文章标题,
+            'keywords': 关键词列表,
+            'hook': 一句话卖点,
+            'anchor': 心理锚点,
+            'fast_research': Fast Research 提示词 (用于精准搜索),
+            'visual_script': 视觉脚本 (JSON，可能缺失),
+            'strategic_summary': 精简的战略意图摘要 (不含视觉脚本)
+        }
+    """
+    result = {
+        'topic': None,
+        'keywords': [],
+        'hook': None,
+        'anchor': None,
+        'fast_research': None,
+        'strategic_summary': None
+    }
+
+    # 提取标题
+    title_match = re.search(r'\*\*标题\*\*[：:]\s*(.+)', content)
+    if title_match:
+        result['topic'] = title_match.group(1).strip()
+
+    # 提取关键词
+    keywords_match = re.search(r'\*\*关键词\*\*[：:]\s*(.+)', content)
+    if keywords_match:
+        keywords_str = keywords_match.group(1).strip()
+        result['keywords'] = [kw.strip() for kw in re.split(r'[,，、]', keywords_str) if kw.strip()]
+
+    # 提取一句话卖点
+    hook_match = re.search(r'\*\*一句话卖点\*\*[：:]\s*(.+)', content)
+    if hook_match:
+        result['hook'] = hook_match.group(1).strip()
+
+    # 提取心理锚点
+    anchor_match = re.search(r'\*\*心理锚点\*\*[：:]\s*(.+)', content)
+    if anchor_match:
+        result['anchor'] = anchor_match.group(1).strip()
+
+    # 提取 Fast Research 提示词（关键！用于精准搜索）
+    fast_research_match = re.search(
+        r'###\s*📡\s*提示词\s*1[：:]?\s*Fast Research.*?```\s*(.*?)```',
+        content, re.DOTALL | re.IGNORECASE
+    )
+    if fast_research_match:
+        result['fast_research'] = fast_research_match.group(1).strip()
+        logger.info("   ✅ 已提取 Fast Research 搜索指引")
+
+    # 提取 Visual Script (JSON)
+    visual_script_match = re.search(
+        r'###\s*🎨\s*视觉脚本.*?```json\s*(.*?)```',
+        content, re.DOTALL | re.IGNORECASE
+    )
+    if visual_script_match:
+        try:
+            from json_repair import repair_json
+            vs_json = repair_json(visual_script_match.group(1).strip(), return_objects=True)
+            if isinstance(vs_json, dict) and 'visual_script' in vs_json:
+                result['visual_script'] = vs_json['visual_script']
+                logger.info("   ✅ 已提取 Visual Script (JSON)")
+            else:
+                # 兼容直接返回 visual_script 内容的情况
+                result['visual_script'] = vs_json
+                logger.info("   ✅ 已提取 Visual Script (JSON - Direct)")
+        except Exception as e:
+            logger.warning(f"   ⚠️ Visual Script 解析失败: {e}")
+            result['visual_script'] = None
+
+    # 构建精简的战略意图摘要（不含视觉脚本）
+    strategic_parts = []
+    if result['topic']:
+        strategic_parts.append(f"**标题**: {result['topic']}")
+    if result['anchor']:
+        strategic_parts.append(f"**心理锚点**: {result['anchor']}")
+    if result['hook']:
+        strategic_parts.append(f"**一句话卖点**: {result['hook']}")
+    if result['keywords']:
+        strategic_parts.append(f"**关键词**: {', '.join(result['keywords'])}")
+
+    result['strategic_summary'] = '\n'.join(strategic_parts) if strategic_parts else None
+    return result
+
+
+def write_final_decision(decision_path: str, content: Optional[str] = None) -> Dict[str, Any]:
+    """在 FINAL_DECISION.md 写入后调用：解析一次并写出 FINAL_DECISION.json"""
+    if content is None:
+        with open(decision_path, "r", encoding="utf-8") as f:
+            content = f.read()
+    result = parse_final_decision(content)
+    result["kind"] = "final_decision"
+    write_sidecar(decision_path, result, DECISION_SUFFIX)
+    _DECISION_MEMO[decision_path] = (_source_stamp(decision_path), result)
+    return result
+
+
+def load_final_decision(decision_path: str) -> Optional[Dict[str, Any]]:
+    """
+    读取最终决策：进程内按 mtime 缓存 -> JSON 旁路文件 -> 正则解析 Markdown（旧文件，顺带回填旁路）。
+    文件不存在返回 None。
+    """
+    stamp = _source_stamp(decision_path)
+    if stamp is None:
+        return None
+    memo = _DECISION_MEMO.get(decision_path)
+    if memo and memo[0] == stamp:
+        return memo[1]
+    result = read_sidecar(decision_path, DECISION_SUFFIX)
+    if result is None:
+        logger.info(f"📄 正在解析: {decision_path}")
+        try:
+            result = write_final_decision(decision_path)
+        except OSError:
+            with open(decision_path, "r", encoding="utf-8") as f:
+                result = parse_final_decision(f.read())
+    _DECISION_MEMO[decision_path] = (stamp, result)
+    return result
@@ -0,0 +1,108 @@
+"""
+🛫 相同请求合并 (Singleflight)
+
+一次 hunt 里同一个请求常被发出多次：
+- TrendingDiscoverer 与热榜抓取都会经 Jina 读取 news.ycombinator.com；
+- 定向模式下 A 路查询与 PRODUCT_FEATURE_EXPANSIONS 可能生成相同的搜索词。
+
+同一 key 的并发调用只执行一次网络请求，其余调用方等待并拿到同一结果；
+本轮内已完成的成功结果也直接复用（per-run memo）。每次复用都计入 saved，
+hunt 结束时输出“节省了多少次调用”。调用方拿到的是结果的深拷贝，下游原地修改互不影响。
+"""
+import copy
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from config import get_logger
+
+logger = get_logger(__name__)
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight: Dict[Hashable, _Call] = {}
+        self._memo: Dict[Hashable, Any] = {}
+        self.calls = 0
+        self.saved = 0
+
+    def do(
+        self,
+        key: Hashable,
+        fn: Callable[[], Any],
+        memo: bool = True,
+        cacheable: Callable[[Any], bool] = bool,
+    ) -> Any:
+        """
+        执行 fn()，同 key 的并发调用共享一次执行。
+        memo=True 时本轮内复用已完成的结果；cacheable(result) 为假（如空结果、失败）时不缓存，下次重新请求。
+        """
+        with self._lock:
+            if memo and key in self._memo:
+                self.saved += 1
+                return copy.deepcopy(self._memo[key])
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = self._inflight[key] = _Call()
+                self.calls += 1
+            else:
+                self.saved += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+                if memo and call.error is None and cacheable(call.result):
+                    self._memo[key] = call.result
+            call.done.set()
+        return copy.deepcopy(call.result)
+
+    def reset(self) -> None:
+        """开始新一轮（如新的 hunt）：清空缓存与计数"""
+        with self._lock:
+            self._memo.clear()
+            self.calls = 0
+            self.saved = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"calls": self.calls, "saved": self.saved, "memo": len(self._memo)}
+
+
+_FLIGHT: Optional[SingleFlight] = None
+_FLIGHT_LOCK = threading.Lock()
+
+
+def get_singleflight() -> SingleFlight:
+    """进程级单例"""
+    global _FLIGHT
+    with _FLIGHT_LOCK:
+        if _FLIGHT is None:
+            _FLIGHT = SingleFlight()
+        return _FLIGHT
+
+
+def log_saved_calls(label: str = "本轮") -> None:
+    stats = get_singleflight().stats()
+    if stats["saved"]:
+        logger.info("🛫 %s合并/复用重复请求 %d 次（实际请求 %d 次）", label, stats["saved"], stats["calls"])
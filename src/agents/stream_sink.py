@@ -0,0 +1,138 @@
+"""
+📼 流式输出落盘与续写 (Stream Sinks)
+
+generate_draft / refine_article / synthesize_notes / final_summary / step3_final_decision / audit_article
+以前把流式 chunk 攒在内存里、结束才写文件；retryable 只包住 create()，流读到一半断开，已付费的输出全部丢失。
+stream_chat() 统一处理：
+- 每个 chunk 到达即追加写入当日 .checkpoints/<name>.<指纹>.partial（指纹 = 请求消息）；
+- 流中途异常或因 max_tokens 截断 (finish_reason=length) 时，把已生成部分作为 assistant 消息，
+  追加一条“从中断处继续”的指令发起续写请求，而不是从头重新生成（最多 max_continuations 次）；
+- 进程崩溃 / Ctrl+C 后 .partial 保留，下次相同请求（如 `python run.py resume`）直接从已生成部分续写；
+- 完整结束后删除该名称下的所有 .partial。
+"""
+import glob
+import os
+import sys
+from typing import Any, Callable, Dict, List, Optional
+
+from config import get_logger
+
+from agents.cancellation import iter_stream
+from agents.checkpoints import fingerprint, get_checkpoint_dir
+
+logger = get_logger(__name__)
+
+DEFAULT_MAX_CONTINUATIONS = 2
+CONTINUE_PROMPT = "你上一条回复在中途被截断了。请从断点处直接接着最后一个字继续输出，不要重复已输出的内容，不要加任何说明。"
+
+
+def _stdout_echo(text: str) -> None:
+    sys.stdout.write(text)
+    sys.stdout.flush()
+
+
+class StreamSink:
+    """把一次流式生成的输出追加写入 .partial 文件（首个 chunk 到达时才创建）"""
+
+    def __init__(self, name: str, key: str):
+        self.name = name
+        self.path = os.path.join(get_checkpoint_dir(), f"{name}.{key}.partial")
+        self._file = None
+
+    def read(self) -> str:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return f.read()
+        except OSError:
+            return ""
+
+    def append(self, text: str) -> None:
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(text)
+        self._file.flush()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def discard(self) -> None:
+        """生成完成：删除本名称下的所有 .partial（含请求已变化的旧残留）"""
+        self.close()
+        for path in glob.glob(os.path.join(os.path.dirname(self.path), f"{self.name}.*.partial")):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def continuation_messages(messages: List[Dict[str, str]], partial: str) -> List[Dict[str, str]]:
+    """原始消息 + 已生成部分（assistant）+ 续写指令"""
+    return list(messages) + [
+        {"role": "assistant", "content": partial},
+        {"role": "user", "content": CONTINUE_PROMPT},
+    ]
+
+
+def stream_chat(
+    name: str,
+    create: Callable[[List[Dict[str, str]]], Any],
+    messages: List[Dict[str, str]],
+    echo: Optional[Callable[[str], None]] = _stdout_echo,
+    max_continuations: int = DEFAULT_MAX_CONTINUATIONS,
+) -> str:
+    """
+    执行一次可续写的流式生成，返回完整正文。
+
+    Args:
+        name: 用于 .partial 文件名（如 "draft"）
+        create: create(messages) -> 流式响应；调用方自行套 retryable / track_cost
+        messages: 原始请求消息
+        echo: 每个正文 chunk 的回显函数，None 表示不回显
+        max_continuations: 中断/截断后最多续写次数
+
+    流中途失败且续写次数用完时抛出原异常，已生成部分保留在 .partial 中供下次续写。
+    """
+    sink = StreamSink(name, fingerprint(messages))
+    collected = [sink.read()]
+    if collected[0]:
+        logger.info("💾 [%s] 发现上次中断的生成 (%d 字)，从断点续写", name, len(collected[0]))
+
+    continuations = 0
+    try:
+        while True:
+            partial = "".join(collected)
+            request = continuation_messages(messages, partial) if partial else messages
+            finish_reason = None
+            try:
+                response = create(request)
+                for chunk in iter_stream(response):
+                    if not chunk.choices:
+                        continue
+                    choice = chunk.choices[0]
+                    content = choice.delta.content
+                    if content:
+                        sink.append(content)
+                        collected.append(content)
+                        if echo is not None:
+                            echo(content)
+                    finish_reason = getattr(choice, "finish_reason", None) or finish_reason
+            except Exception as e:
+                if not "".join(collected) or continuations >= max_continuations:
+                    raise
+                continuations += 1
+                logger.warning("⚠️ [%s] 流式输出中断 (%s)，已保存 %d 字，发起续写 (%d/%d)",
+                               name, e, len("".join(collected)), continuations, max_continuations)
+                continue
+            if finish_reason == "length" and continuations < max_continuations:
+                continuations += 1
+                logger.warning("⚠️ [%s] 输出达到长度上限被截断，发起续写 (%d/%d)", name, continuations, max_continuations)
+                continue
+            break
+    finally:
+        sink.close()
+
+    sink.discard()
+    return "".join(collected)
@@ -5,6 +5,7 @@ import sys, os, re
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from config import get_draft_file, get_todo_file, get_stage_dir, get_logger
+from agents.archive_catalog import record_artifact
 
 
 logger = get_logger(__name__)
@@ -51,6 +52,7 @@ def main():
         f.write(f"来源: {draft_path}\n\n")
         for i, todo in enumerate(todos, 1):
             f.write(f"[ ] {i}. {todo}\n")
+    record_artifact(todo_file)
     
     logger.info("💾 已保存到: %s", todo_file)
     logger.info("💡 下一步：")
@@ -0,0 +1,186 @@
+"""
+🧭 语义去重 (Topic Embeddings)
+
+字符相似度识别不了改写（"Cursor 隐藏设置" vs "Cursor 你不知道的 5 个开关"），
+这里用本地 CPU 向量模型把历史选题与候选选题编码，一次矩阵乘法完成余弦相似度比对，
+在 Step 2 深度扫描之前就过滤掉语义重复的方向。
+
+可选功能，settings.yaml 中开启：
+    semantic_dedup:
+      enabled: true
+      model: "BAAI/bge-small-zh-v1.5"
+      threshold: 0.85
+
+后端按顺序尝试 fastembed (ONNX) -> sentence-transformers (device=cpu)，都未安装时自动停用。
+历史选题向量缓存在 data/topic_embeddings.npz，只为新增选题计算向量。
+"""
+import os
+import threading
+from typing import Dict, Iterable, List, Optional
+
+import config
+from config import DATA_DIR, get_logger
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = get_logger(__name__)
+
+DEFAULT_MODEL = "BAAI/bge-small-zh-v1.5"
+DEFAULT_THRESHOLD = 0.85
+
+
+def get_cache_file() -> str:
+    return os.path.join(DATA_DIR, "topic_embeddings.npz")
+
+
+def get_semantic_settings() -> dict:
+    raw = config.SETTINGS.get("semantic_dedup") or {}
+    return raw if isinstance(raw, dict) else {}
+
+
+def get_semantic_threshold() -> float:
+    """重复判定阈值（余弦相似度），限定在 (0, 1]；去重得分按它归一化，0 或非法值回退默认"""
+    raw = get_semantic_settings().get("threshold", DEFAULT_THRESHOLD)
+    try:
+        threshold = float(raw)
+    except (TypeError, ValueError):
+        threshold = 0.0
+    if not 0.0 < threshold <= 1.0:
+        logger.warning("⚠️ semantic_dedup.threshold=%r 不在 (0, 1] 内，使用默认值 %.2f", raw, DEFAULT_THRESHOLD)
+        return DEFAULT_THRESHOLD
+    return threshold
+
+
+def _load_backend(model_name: str):
+    """返回 encode(texts) -> np.ndarray，后端不可用时返回 None"""
+    try:
+        from fastembed import TextEmbedding
+        model = TextEmbedding(model_name=model_name)
+        return lambda texts: np.asarray(list(model.embed(list(texts))), dtype=np.float32)
+    except ImportError:
+        pass
+    try:
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer(model_name, device="cpu")
+        return lambda texts: np.asarray(model.encode(list(texts), batch_size=32), dtype=np.float32)
+    except ImportError:
+        return None
+
+
+def _normalize_rows(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class TopicEmbeddings:
+    """历史选题向量库：texts[i] 对应 vectors[i]（已 L2 归一化）"""
+
+    def __init__(self, encode, model_name: str, path: Optional[str] = None):
+        self._encode = encode
+        self.model_name = model_name
+        self.path = path or get_cache_file()
+        self.texts: List[str] = []
+        self.vectors = None
+        self._positions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                if str(data["model"]) != self.model_name:
+                    logger.info("🔄 向量模型已变更，语义缓存将重建")
+                    return
+                self.texts = [str(t) for t in data["texts"]]
+                self.vectors = data["vectors"].astype(np.float32)
+        except Exception as e:
+            logger.warning("⚠️ 语义向量缓存读取失败，将重建: %s", e)
+            self.texts, self.vectors = [], None
+        self._positions = {t: i for i, t in enumerate(self.texts)}
+
+    def save(self) -> None:
+        if self.vectors is None:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp.npz"
+        np.savez(tmp_path, model=np.array(self.model_name), texts=np.array(self.texts), vectors=self.vectors)
+        os.replace(tmp_path, self.path)
+
+    def encode(self, texts: List[str]):
+        return _normalize_rows(self._encode(texts))
+
+    def sync(self, topics: Iterable[str]) -> int:
+        """为尚未缓存的历史选题计算向量并写回缓存，返回新增数量"""
+        with self._lock:
+            missing = list(dict.fromkeys(t.strip() for t in topics if t and t.strip() and t.strip() not in self._positions))
+            if not missing:
+                return 0
+            new_vectors = self.encode(missing)
+            self.vectors = new_vectors if self.vectors is None else np.vstack([self.vectors, new_vectors])
+            for text in missing:
+                self._positions[text] = len(self.texts)
+                self.texts.append(text)
+            self.save()
+            return len(missing)
+
+    def max_similarity(self, candidates: List[str]):
+        """候选 (k) × 历史 (n) 一次矩阵乘法，返回每个候选的最大余弦相似度 (k,)"""
+        if not candidates or self.vectors is None or not len(self.texts):
+            return np.zeros(len(candidates), dtype=np.float32)
+        sims = self.encode(candidates) @ self.vectors.T
+        return sims.max(axis=1)
+
+
+_EMBEDDINGS: Optional[TopicEmbeddings] = None
+_DISABLED = False
+_INIT_LOCK = threading.Lock()
+
+
+def get_topic_embeddings() -> Optional[TopicEmbeddings]:
+    """语义去重未开启或后端不可用时返回 None（只提示一次）"""
+    global _EMBEDDINGS, _DISABLED
+    with _INIT_LOCK:
+        if _EMBEDDINGS is not None or _DISABLED:
+            return _EMBEDDINGS
+        settings = get_semantic_settings()
+        if not settings.get("enabled"):
+            _DISABLED = True
+            return None
+        model_name = settings.get("model") or DEFAULT_MODEL
+        try:
+            encode = _load_backend(model_name) if np is not None else None
+            if encode is None:
+                logger.warning("⚠️ 语义去重已开启但未安装 fastembed / sentence-transformers，已跳过")
+                _DISABLED = True
+                return None
+            embeddings = TopicEmbeddings(encode, model_name)
+        except Exception as e:
+            # 模型下载失败、模型名不受支持等：本进程内停用，不再每次 hunt 重试
+            logger.warning("⚠️ 语义去重模型加载失败，已停用（回退到字符相似度）: %s", e)
+            _DISABLED = True
+            return None
+        logger.info("🧭 语义去重已启用 (模型: %s)", model_name)
+        _EMBEDDINGS = embeddings
+        return _EMBEDDINGS
+
+
+def semantic_similarities(candidates: List[str], history_topics: Iterable[str]) -> Optional[List[float]]:
+    """
+    返回每个候选与全部历史选题的最大语义相似度；功能不可用或出错时返回 None，
+    调用方回退到字符相似度。
+    """
+    try:
+        embeddings = get_topic_embeddings()
+        if embeddings is None:
+            return None
+        embeddings.sync(history_topics)
+        return [float(s) for s in embeddings.max_similarity(candidates)]
+    except Exception as e:
+        logger.warning("⚠️ 语义去重失败，回退到字符相似度: %s", e)
+        return None
@@ -0,0 +1,182 @@
+"""
+🗂️ 选题历史索引 (Topic Index)
+
+基于字符 n-gram 倒排索引 + Jaccard 相似度，覆盖全部历史选题（不再只看最近 30 条）：
+- 查询时只遍历与候选标题共享 n-gram 的历史条目，成本与历史总量无关；
+- 索引持久化到 data/topic_index.json，新增选题时增量追加；
+- 与 history_store 不一致时（旧版本遗留、手工编辑）自动补齐缺失条目。
+"""
+import os
+import json
+import re
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from config import DATA_DIR, get_logger
+
+logger = get_logger(__name__)
+
+INDEX_VERSION = 1
+NGRAM_SIZE = 2
+# 二元组 Jaccard 比 SequenceMatcher.ratio 更严格，0.6 大致对应旧阈值 0.82
+DEFAULT_THRESHOLD = 0.6
+
+_NORMALIZE_RE = re.compile(r"[\s\W_]+", re.UNICODE)
+
+
+def get_index_file() -> str:
+    return os.path.join(DATA_DIR, "topic_index.json")
+
+
+def normalize(text: str) -> str:
+    """小写并去掉空白与标点，避免“Cursor：技巧”和“cursor 技巧”被判为不同"""
+    return _NORMALIZE_RE.sub("", (text or "").lower())
+
+
+def ngrams(text: str, n: int = NGRAM_SIZE) -> frozenset:
+    norm = normalize(text)
+    if not norm:
+        return frozenset()
+    if len(norm) <= n:
+        return frozenset([norm])
+    return frozenset(norm[i:i + n] for i in range(len(norm) - n + 1))
+
+
+class TopicIndex:
+    """历史选题的倒排索引。docs[i] = {"topic", "date", "angle"}，postings: gram -> [doc_id]"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or get_index_file()
+        self.docs: List[Dict[str, str]] = []
+        self._grams: List[frozenset] = []
+        self._postings: Dict[str, List[int]] = {}
+        self._keys = set()
+        self._lock = threading.Lock()
+
+    # ---------- 构建 ----------
+
+    @staticmethod
+    def _key(item: Dict[str, str]) -> Tuple[str, str]:
+        return (item.get("date") or "", normalize(item.get("topic") or ""))
+
+    def _add(self, item: Dict[str, str]) -> bool:
+        topic = (item.get("topic") or "").strip()
+        key = self._key(item)
+        if not topic or key in self._keys:
+            return False
+        doc_id = len(self.docs)
+        grams = ngrams(topic)
+        self.docs.append({"topic": topic, "date": item.get("date") or "", "angle": item.get("angle") or ""})
+        self._grams.append(grams)
+        self._keys.add(key)
+        for g in grams:
+            self._postings.setdefault(g, []).append(doc_id)
+        return True
+
+    def add(self, item: Dict[str, str], persist: bool = True) -> bool:
+        """增量追加一条选题；已存在（同日期同标题）则忽略"""
+        with self._lock:
+            added = self._add(item)
+        if added and persist:
+            self.save()
+        return added
+
+    def sync(self, history: Iterable[Dict[str, str]]) -> int:
+        """补齐 history 中尚未入索引的条目，返回新增数量"""
+        with self._lock:
+            added = sum(1 for item in history if isinstance(item, dict) and self._add(item))
+        return added
+
+    # ---------- 查询 ----------
+
+    def query(self, title: str, limit: int = 1) -> List[Tuple[float, Dict[str, str]]]:
+        """返回与 title 最相似的历史选题 [(jaccard, doc)]，按相似度降序"""
+        grams = ngrams(title)
+        if not grams:
+            return []
+        overlap = Counter()
+        for g in grams:
+            for doc_id in self._postings.get(g, ()):
+                overlap[doc_id] += 1
+        scored = []
+        for doc_id, inter in overlap.items():
+            union = len(grams) + len(self._grams[doc_id]) - inter
+            scored.append((inter / union if union else 0.0, doc_id))
+        scored.sort(reverse=True)
+        return [(round(score, 4), self.docs[doc_id]) for score, doc_id in scored[:limit]]
+
+    def max_similarity(self, title: str) -> float:
+        hits = self.query(title, limit=1)
+        return hits[0][0] if hits else 0.0
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    # ---------- 持久化 ----------
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        payload = {"version": INDEX_VERSION, "ngram": NGRAM_SIZE, "docs": self.docs}
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> "TopicIndex":
+        index = cls(path)
+        if not os.path.exists(index.path):
+            return index
+        try:
+            with open(index.path, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+            if payload.get("version") != INDEX_VERSION or payload.get("ngram") != NGRAM_SIZE:
+                logger.info("🔄 选题索引版本变化，将从历史记录重建")
+                return index
+            index.sync(payload.get("docs", []))
+        except Exception as e:
+            logger.warning("⚠️ 选题索引读取失败，将从历史记录重建: %s", e)
+            return cls(path)
+        return index
+
+
+_INDEX: Optional[TopicIndex] = None
+_INDEX_LOCK = threading.Lock()
+# 上次对齐时 history_store 的 (mtime_ns, size)
+_SYNCED_STAMP: Optional[tuple] = None
+
+
+def _read_history(since_stamp: Optional[tuple]) -> Tuple[Optional[tuple], Optional[List[Dict[str, str]]]]:
+    """返回 (history_store 当前 stamp, 全部历史)；文件自 since_stamp 以来未变化时历史为 None"""
+    from agents.history_store import get_history_store
+    try:
+        store = get_history_store()
+        stamp = store.stamp
+        if stamp is not None and stamp == since_stamp:
+            return stamp, None
+        return stamp, store.all()
+    except Exception:
+        return None, []
+
+
+def get_topic_index(history: Optional[Iterable[Dict[str, str]]] = None) -> TopicIndex:
+    """
+    获取进程级索引单例：首次调用时加载持久化索引并与历史记录对齐，
+    有新增条目则写回磁盘。history 为空时读取 history_store。
+    常驻进程（Streamlit）中 CLI 可能已追加新选题：history_store 文件变化时重新对齐，
+    避免之后 add()/save() 用过期视图覆盖磁盘上的索引。
+    """
+    global _INDEX, _SYNCED_STAMP
+    with _INDEX_LOCK:
+        if _INDEX is None:
+            _INDEX = TopicIndex.load()
+            _SYNCED_STAMP = None
+        if history is None:
+            _SYNCED_STAMP, history = _read_history(_SYNCED_STAMP)
+        if history is not None:
+            added = _INDEX.sync(history)
+            if added:
+                logger.info("🗂️ 选题索引补齐 %d 条历史记录 (共 %d 条)", added, len(_INDEX))
+                _INDEX.save()
+        return _INDEX
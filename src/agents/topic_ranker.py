@@ -0,0 +1,229 @@
+"""
+🏅 候选选题本地预排序 (Topic Ranker)
+
+Step 1 收集的搜索结果不再整包塞给 DeepSeek，而是先在本地：
+1. 用实体词表（关注列表 + 突发热点 + 热榜词 + 关键词分类 + 标题中的英文产品名）构建 Aho–Corasick 自动机，
+   得到「结果 × 实体」命中矩阵，每条结果归入标题中最靠前的实体，形成实体簇；
+2. 对每个簇向量化提取特征：来源数（去重域名）、结果数、时效（搜索窗口 / 发布时间）、
+   关注列表重合、历史新颖度（近期未写过）、跨路共现（雷达 / A / B / C 几路同时命中）；
+3. 加权打分排序，只把前 N 个簇的紧凑摘要放进规划 prompt。
+
+排序是确定性的（同样的输入得到同样的顺序），可单独测试；权重可在 settings.yaml 调整：
+    topic_ranker:
+      top_n: 8
+      hits_per_cluster: 3
+      weights: {sources: 1.0, hits: 0.5, recency: 0.8, watchlist: 0.6, novelty: 1.0, lanes: 1.2}
+"""
+import re
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+import numpy as np
+
+import config
+from config import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_TOP_N = 8
+DEFAULT_HITS_PER_CLUSTER = 3
+DEFAULT_WEIGHTS = {
+    "sources": 1.0,    # 不同域名的报道数 (log)
+    "hits": 0.5,       # 命中结果数 (log)
+    "recency": 0.8,    # 时效：1 / (1 + 平均天数)
+    "watchlist": 0.6,  # 是否在关注列表 / 突发热点 / 热榜词中
+    "novelty": 1.0,    # 近期没写过
+    "lanes": 1.2,      # 跨路共现的路数
+}
+FEATURES = list(DEFAULT_WEIGHTS)
+# 近期写过的实体，新颖度打折而不是归零（换角度仍可能值得写）
+WRITTEN_NOVELTY = 0.3
+NOVELTY_LOOKBACK_DAYS = 30
+
+# 标题中的英文产品名 / 型号：DeepSeek V3.2、Claude 4.5、AutoGLM
+_PRODUCT_RE = re.compile(r"(?<![A-Za-z0-9])[A-Z][A-Za-z0-9]*(?:[-.][A-Za-z0-9]+)*(?: [A-Z0-9][A-Za-z0-9.]*)?(?![A-Za-z0-9])")
+# 过于宽泛的词不单独成簇
+_GENERIC_ENTITIES = {"ai", "llm", "the", "a", "an", "new", "how", "why", "what", "top", "best", "agi", "app", "api"}
+
+
+def get_ranker_settings() -> dict:
+    raw = config.SETTINGS.get("topic_ranker") or {}
+    return raw if isinstance(raw, dict) else {}
+
+
+def tag_lane(results: Optional[List[Dict[str, Any]]], lane: str, window_days: int) -> List[Dict[str, Any]]:
+    """给搜索结果打上来源路线与搜索时间窗，供排序特征使用"""
+    for r in results or []:
+        r.setdefault("lane", lane)
+        r.setdefault("window_days", window_days)
+    return results or []
+
+
+def _domain(url: str) -> str:
+    host = urlsplit(url or "").netloc.lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def _age_days(result: Dict[str, Any], now: datetime) -> float:
+    """优先用发布时间；没有时取搜索窗口的一半作为估计"""
+    published = result.get("published") or ""
+    if published:
+        try:
+            ts = datetime.fromisoformat(str(published)[:19].replace("Z", ""))
+            return max((now - ts).total_seconds() / 86400.0, 0.0)
+        except ValueError:
+            pass
+    return float(result.get("window_days") or 7) / 2.0
+
+
+def collect_entities(results: List[Dict[str, Any]], seeds: Iterable[str]) -> List[str]:
+    """实体词表：种子词（关注列表、热点、热榜、关键词分类）+ 至少出现两次的英文产品名"""
+    vocab: Dict[str, str] = {}
+    for s in seeds:
+        s = (s or "").strip()
+        if s and s.lower() not in _GENERIC_ENTITIES:
+            vocab.setdefault(s.lower(), s)
+    seen: Dict[str, int] = {}
+    for r in results:
+        # Perplexity / Tavily 的摘要结果标题是固定占位符，不含实体
+        if (r.get("title") or "").endswith("AI Summary"):
+            continue
+        for m in _PRODUCT_RE.findall(r.get("title") or ""):
+            key = m.strip().lower()
+            if len(key) > 2 and key not in _GENERIC_ENTITIES:
+                seen[key] = seen.get(key, 0) + 1
+                if seen[key] == 2:
+                    vocab.setdefault(key, m.strip())
+    return list(vocab.values())
+
+
+def rank_clusters(
+    results: List[Dict[str, Any]],
+    seeds: Iterable[str] = (),
+    priority: Iterable[str] = (),
+    history_topics: Iterable[str] = (),
+    now: Optional[datetime] = None,
+    weights: Optional[Dict[str, float]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    返回按得分降序的实体簇 [{entity, score, features, hits}]。
+    seeds 为实体种子词；priority 为关注列表 / 热点等“重点实体”；history_topics 为近期已写标题。
+    """
+    from agents.keyword_automaton import KeywordAutomaton
+
+    results = [r for r in results if r.get("title") or r.get("body")]
+    if not results:
+        return []
+    now = now or datetime.now()
+    entities = collect_entities(results, seeds)
+    automaton = KeywordAutomaton(entities)
+    entities = automaton.keywords
+    if not entities:
+        return []
+
+    # 每条结果归入标题中最早出现的实体（标题无命中时看正文开头）
+    n_hits, n_ent = len(results), len(entities)
+    assign = np.full(n_hits, -1, dtype=np.int64)
+    for i, r in enumerate(results):
+        for text in (r.get("title") or "", (r.get("body") or "")[:200]):
+            counts = automaton.count(text)
+            if any(counts):
+                lowered = text.lower()
+                hit_ids = [j for j, c in enumerate(counts) if c]
+                assign[i] = min(hit_ids, key=lambda j: (lowered.find(entities[j].lower()), -len(entities[j])))
+                break
+
+    mask = assign >= 0
+    if not mask.any():
+        return []
+    member = np.zeros((n_ent, n_hits), dtype=bool)
+    member[assign[mask], np.nonzero(mask)[0]] = True
+
+    # 结果级特征 -> 簇级特征（矩阵聚合）
+    # 去重合并后的结果带 lanes（所有搜到它的路线），跨路共现按全部来源计
+    hit_lanes = [set(r.get("lanes") or [r.get("lane", "")]) for r in results]
+    lanes = sorted(set().union(*hit_lanes))
+    lane_onehot = np.array([[lane in hl for lane in lanes] for hl in hit_lanes], dtype=bool)
+    domains = sorted({_domain(r.get("url", "")) for r in results} - {""})
+    dom_index = {d: k for k, d in enumerate(domains)}
+    dom_onehot = np.zeros((n_hits, max(len(domains), 1)), dtype=bool)
+    for i, r in enumerate(results):
+        d = _domain(r.get("url", ""))
+        if d:
+            dom_onehot[i, dom_index[d]] = True
+    recency = np.array([1.0 / (1.0 + _age_days(r, now)) for r in results], dtype=np.float64)
+
+    hit_count = member.sum(axis=1).astype(np.float64)
+    m = member.astype(np.float64)
+    source_count = ((m @ dom_onehot) > 0).sum(axis=1).astype(np.float64)
+    lane_count = ((m @ lane_onehot) > 0).sum(axis=1).astype(np.float64)
+    mean_recency = np.divide(m @ recency, hit_count, out=np.zeros(n_ent), where=hit_count > 0)
+
+    priority_set = {p.strip().lower() for p in priority if p}
+    watch = np.array([any(e.lower() in p or p in e.lower() for p in priority_set) for e in entities], dtype=np.float64)
+    history_text = " ".join(history_topics).lower()
+    novelty = np.array([WRITTEN_NOVELTY if e.lower() in history_text else 1.0 for e in entities], dtype=np.float64)
+
+    features = np.stack([
+        np.log1p(source_count),
+        np.log1p(hit_count),
+        mean_recency,
+        watch,
+        novelty,
+        lane_count / max(len(lanes), 1),
+    ], axis=1)
+    w = dict(DEFAULT_WEIGHTS)
+    w.update({k: float(v) for k, v in (weights or {}).items() if k in w})
+    scores = features @ np.array([w[f] for f in FEATURES])
+
+    # 得分相同按结果数、实体名排序，保证确定性
+    order = sorted(np.nonzero(hit_count > 0)[0], key=lambda j: (-scores[j], -hit_count[j], entities[j].lower()))
+    clusters = []
+    for j in order:
+        idx = np.nonzero(member[j])[0]
+        hits = sorted((results[i] for i in idx), key=lambda r: _age_days(r, now))
+        clusters.append({
+            "entity": entities[j],
+            "score": round(float(scores[j]), 3),
+            "features": {f: round(float(features[j, k]), 3) for k, f in enumerate(FEATURES)},
+            "sources": int(source_count[j]),
+            "lanes": sorted(set().union(*(hit_lanes[i] for i in idx)) - {""}),
+            "written": bool(novelty[j] < 1.0),
+            "hits": hits,
+        })
+    return clusters
+
+
+def format_clusters(clusters: List[Dict[str, Any]], top_n: int, hits_per_cluster: int, body_len: int = 80) -> str:
+    """把前 N 个簇渲染为紧凑的规划 prompt 片段"""
+    lines = []
+    for rank, c in enumerate(clusters[:top_n], 1):
+        written = " · 近期写过" if c["written"] else ""
+        lines.append(f"#{rank} {c['entity']} (得分 {c['score']:.2f} · {c['sources']} 个来源 · 路线 {'/'.join(c['lanes']) or '-'}{written})")
+        for r in c["hits"][:hits_per_cluster]:
+            body = re.sub(r"\s+", " ", r.get("body") or "").strip()[:body_len]
+            lines.append(f"- {r.get('title', '')}: {body}")
+    return "\n".join(lines)
+
+
+def build_planning_context(
+    results: List[Dict[str, Any]],
+    seeds: Iterable[str],
+    priority: Iterable[str],
+    history_topics: Iterable[str] = (),
+) -> Optional[str]:
+    """Step 1 入口：返回排序后的紧凑情报；没有可聚类的结果时返回 None，调用方回退到原始列表"""
+    settings = get_ranker_settings()
+    top_n = int(settings.get("top_n", DEFAULT_TOP_N))
+    per_cluster = int(settings.get("hits_per_cluster", DEFAULT_HITS_PER_CLUSTER))
+    since = (datetime.now() - timedelta(days=NOVELTY_LOOKBACK_DAYS)).strftime("%Y-%m-%d")
+    if not history_topics:
+        from agents.history_store import get_history_store
+        history_topics = [h.get("topic", "") for h in get_history_store().range(since)]
+    clusters = rank_clusters(results, seeds, priority, history_topics, weights=settings.get("weights"))
+    if not clusters:
+        return None
+    logger.info("🏅 本地预排序: %d 条结果 -> %d 个实体簇，取前 %d (%s)", len(results), len(clusters),
+                min(top_n, len(clusters)), ", ".join(c["entity"] for c in clusters[:top_n]))
+    return format_clusters(clusters, top_n, per_cluster)
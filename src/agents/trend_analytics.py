@@ -0,0 +1,226 @@
+"""
+📈 关键词趋势分析 (Trend Analytics)
+
+从归档目录 (archive_catalog) 汇总构建「关键词 × 日期」计数矩阵 (NumPy)：
+- 选题报告：读取 report_*.digest.json 中的关键词计数向量（无摘要的旧报告解析后回填）；
+- 热榜关键词：step1 每次抓取的热榜/突发热点，追加记录在 1_topics/hot_keywords.jsonl；
+- 已写选题：history_store 中的历史标题，用于判断“是否已经写过”。
+
+在矩阵上计算：
+- velocity     3 日滑动均值的最新一日增量（升温速度）；
+- acceleration 增量的变化量（是否在加速）；
+- novelty      升温且基线低、近期没写过的词（值得抢先写的新词）。
+
+`python run.py trends` 输出排行；final 阶段把排行注入预处理，辅助模型判断持续升温的方向。
+"""
+import os
+import json
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from config import get_logger, get_stage_dir
+
+logger = get_logger(__name__)
+
+HOTLIST_FILENAME = "hot_keywords.jsonl"
+# 热榜出现一次折算成报告中的几次命中
+HOTLIST_WEIGHT = 3.0
+SMOOTH_DAYS = 3
+BASELINE_DAYS = 28
+WRITTEN_LOOKBACK_DAYS = 30
+
+
+# ================= 热榜关键词持久化 =================
+
+def record_hot_keywords(keywords: Iterable[str], source: str) -> None:
+    """追加记录一次热榜抓取得到的关键词（当天 1_topics/hot_keywords.jsonl）"""
+    keywords = [k.strip() for k in keywords if k and k.strip()]
+    if not keywords:
+        return
+    path = os.path.join(get_stage_dir("topics"), HOTLIST_FILENAME)
+    entry = {"time": datetime.now().strftime("%Y-%m-%d %H:%M"), "source": source, "keywords": keywords}
+    try:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        from agents.archive_catalog import record_artifact
+        record_artifact(path)
+    except OSError as e:
+        logger.warning("⚠️ 热榜关键词记录失败: %s", e)
+
+
+# ================= 矩阵构建 =================
+
+class KeywordMatrix:
+    """counts[k, d] = 关键词 k 在第 d 天的加权热度；dates 连续覆盖整个窗口"""
+
+    def __init__(self, keywords: List[str], dates: List[str], counts: np.ndarray, written: np.ndarray):
+        self.keywords = keywords
+        self.dates = dates
+        self.counts = counts
+        self.written = written
+
+    def scores(self) -> Dict[str, np.ndarray]:
+        counts = self.counts
+        days = counts.shape[1]
+        # 3 日滑动均值（cumsum 实现，整列向量化）
+        window = min(SMOOTH_DAYS, days)
+        csum = np.cumsum(np.pad(counts, ((0, 0), (1, 0))), axis=1)
+        smooth = np.empty_like(counts)
+        smooth[:, window - 1:] = (csum[:, window:] - csum[:, :-window]) / window
+        for d in range(window - 1):
+            smooth[:, d] = csum[:, d + 1] / (d + 1)
+
+        diff = np.diff(smooth, axis=1) if days > 1 else np.zeros((counts.shape[0], 1))
+        velocity = diff[:, -1] if diff.shape[1] else np.zeros(counts.shape[0])
+        acceleration = diff[:, -1] - diff[:, -2] if diff.shape[1] > 1 else np.zeros(counts.shape[0])
+
+        baseline_slice = counts[:, max(0, days - SMOOTH_DAYS - BASELINE_DAYS):max(0, days - SMOOTH_DAYS)]
+        baseline = baseline_slice.mean(axis=1) if baseline_slice.shape[1] else np.zeros(counts.shape[0])
+        recent = smooth[:, -1]
+        novelty = np.clip(velocity, 0, None) * recent / (1.0 + baseline) * np.where(self.written, 0.2, 1.0)
+        return {
+            "recent": recent,
+            "total": counts.sum(axis=1),
+            "velocity": velocity,
+            "acceleration": acceleration,
+            "baseline": baseline,
+            "novelty": novelty,
+        }
+
+
+def _date_range(start: datetime, end: datetime) -> List[str]:
+    n = (end.date() - start.date()).days + 1
+    return [(start + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(max(n, 1))]
+
+
+def _merge_paths(rows: List[dict], scanned: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+    """目录记录 ∪ 磁盘扫描结果，按路径去重、按日期排序"""
+    merged = {os.path.abspath(r["abs_path"]): r["date"] for r in rows}
+    for date, path in scanned:
+        merged.setdefault(os.path.abspath(path), date)
+    return sorted(((d, p) for p, d in merged.items()), key=lambda item: (item[0], item[1]))
+
+
+def _report_paths(since: str) -> Tuple[List[Tuple[str, str]], List[Tuple[str, str]]]:
+    """
+    列出报告与热榜记录：SQLite 目录 ∪ glob 扫描。
+    目录可能只登记了部分归档（未 rebuild、旧版本生成的日期），只信目录会漏掉其余报告，因此始终与磁盘扫描合并。
+    """
+    from agents import archive_catalog
+    try:
+        rows = archive_catalog.list_artifacts("report", since=since)
+        hot_rows = archive_catalog.list_artifacts("hotlist", since=since)
+    except Exception as e:
+        logger.warning("⚠️ 归档目录不可用，回退扫描目录: %s", e)
+        rows, hot_rows = [], []
+
+    from agents.keyword_automaton import iter_archive_reports
+    reports = [(d, p) for d, p in iter_archive_reports() if d >= since]
+    hotlists = [(d, p) for d, p in iter_archive_reports(HOTLIST_FILENAME) if d >= since]
+    return _merge_paths(rows, reports), _merge_paths(hot_rows, hotlists)
+
+
+def build_keyword_matrix(days: int = 365, today: Optional[datetime] = None) -> KeywordMatrix:
+    from agents.keyword_automaton import get_keyword_catalog
+    from agents.sidecars import load_report_digest
+    from agents.history_store import get_history_store
+
+    today = today or datetime.now()
+    start = today - timedelta(days=days - 1)
+    dates = _date_range(start, today)
+    date_index = {d: i for i, d in enumerate(dates)}
+
+    keywords = list(get_keyword_catalog().keywords)
+    kw_index = {k.lower(): i for i, k in enumerate(keywords)}
+    cells: Dict[tuple, float] = {}
+
+    def _add(keyword: str, date: str, value: float) -> None:
+        key = keyword.strip().lower()
+        if not key or date not in date_index:
+            return
+        idx = kw_index.get(key)
+        if idx is None:
+            idx = kw_index[key] = len(keywords)
+            keywords.append(keyword.strip())
+        cell = (idx, date_index[date])
+        cells[cell] = cells.get(cell, 0.0) + value
+
+    reports, hotlists = _report_paths(dates[0])
+    for date, path in reports:
+        try:
+            digest = load_report_digest(path)
+        except OSError:
+            continue
+        for kw, c in digest.get("keyword_counts", {}).items():
+            _add(kw, date, c)
+
+    for date, path in hotlists:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    for kw in entry.get("keywords", []):
+                        _add(kw, date, HOTLIST_WEIGHT)
+        except OSError:
+            continue
+
+    counts = np.zeros((len(keywords), len(dates)), dtype=np.float32)
+    if cells:
+        idx = np.array(list(cells.keys()), dtype=np.int64)
+        np.add.at(counts, (idx[:, 0], idx[:, 1]), np.fromiter(cells.values(), dtype=np.float32, count=len(cells)))
+
+    # 近期写过的选题：关键词出现在历史标题中即视为已覆盖
+    since_written = (today - timedelta(days=WRITTEN_LOOKBACK_DAYS)).strftime("%Y-%m-%d")
+    titles = " ".join((h.get("topic") or "") for h in get_history_store().range(since_written)).lower()
+    written = np.array([k.lower() in titles for k in keywords], dtype=bool)
+    return KeywordMatrix(keywords, dates, counts, written)
+
+
+def rank_trends(days: int = 365, top: int = 10, today: Optional[datetime] = None) -> List[Dict]:
+    """返回按 novelty / velocity 排序的升温关键词"""
+    t0 = time.perf_counter()
+    matrix = build_keyword_matrix(days=days, today=today)
+    if not matrix.keywords:
+        return []
+    s = matrix.scores()
+    order = np.lexsort((-s["velocity"], -s["novelty"]))
+    rows = []
+    for i in order:
+        if s["velocity"][i] <= 0 and s["novelty"][i] <= 0:
+            continue
+        rows.append({
+            "keyword": matrix.keywords[i],
+            "recent": round(float(s["recent"][i]), 2),
+            "total": round(float(s["total"][i]), 1),
+            "velocity": round(float(s["velocity"][i]), 2),
+            "acceleration": round(float(s["acceleration"][i]), 2),
+            "baseline": round(float(s["baseline"][i]), 2),
+            "novelty": round(float(s["novelty"][i]), 2),
+            "written": bool(matrix.written[i]),
+        })
+        if len(rows) >= top:
+            break
+    logger.debug("trend ranking over %dx%d matrix in %.0fms", len(matrix.keywords), len(matrix.dates),
+                 (time.perf_counter() - t0) * 1000)
+    return rows
+
+
+def format_trend_insights(rows: List[Dict]) -> str:
+    """渲染为 final_summary 预处理段落"""
+    if not rows:
+        return "暂无持续升温的关键词（归档数据不足）。"
+    lines = ["📈 **关键词趋势 (近一年归档, 3日滑动)**：velocity=升温速度, accel=加速度, novelty=新词潜力(已写过的降权)"]
+    for r in rows:
+        tag = "（近期已写过）" if r["written"] else ""
+        flag = "🚀" if r["acceleration"] > 0 else "📈"
+        lines.append(
+            f"   {flag} **{r['keyword']}**{tag}: velocity {r['velocity']:+.2f} · accel {r['acceleration']:+.2f} · "
+            f"novelty {r['novelty']:.2f} · 基线 {r['baseline']:.2f}/天"
+        )
+    return "\n".join(lines)
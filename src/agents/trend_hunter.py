@@ -14,17 +14,32 @@ import re
 import httpx
 import random
 from pathlib import Path
-from difflib import SequenceMatcher
 from json_repair import repair_json
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from typing import List, Dict, Optional, Any, Tuple
 from bs4 import BeautifulSoup
 from openai import OpenAI
+from agents.archive_catalog import record_artifact
+from agents.cancellation import check_cancelled
+from agents.topic_index import DEFAULT_THRESHOLD, get_topic_index
+from agents.history_store import get_history_store
+from agents.sidecars import build_report_digest, write_final_decision, write_sidecar
+from agents.result_normalizer import ResultDeduper, dedup_results
+from agents.checkpoints import Checkpoint, fingerprint
+from agents.circuit_breaker import CircuitOpenError, get_circuit_breaker, skipped_summary
+from agents.latency_tracker import provider_timeout, timed
+from agents.rate_limiter import rate_limited
+from agents.search_budget import end_search_budget, get_search_budget, lane as search_lane, plan_hunt_budget
+from agents.stream_sink import stream_chat
+from agents.singleflight import get_singleflight, log_saved_calls
+from agents.topic_ranker import build_planning_context, tag_lane
+from agents.trend_analytics import format_trend_insights, rank_trends, record_hot_keywords
+from agents.topic_embeddings import get_semantic_threshold, semantic_similarities
 from config import (
     DEEPSEEK_API_KEY, DEEPSEEK_BASE_URL, PROXY_URL, REQUEST_TIMEOUT,
     TAVILY_API_KEY, PERPLEXITY_API_KEY, EXA_API_KEY, get_topic_report_file, get_today_dir,
-    get_stage_dir, get_research_notes_file, get_history_file, get_logger, retryable,
+    get_stage_dir, get_research_notes_file, get_logger, retryable,
     track_cost, WATCHLIST, TREND_SOURCES, OPERATIONAL_PHASE, PHASE_CONFIG,
     EFFICIENCY_KEYWORDS, PAIN_KEYWORDS, RADAR_QUERIES,
     MAX_CONCURRENT_FETCHES, FETCH_TIMEOUT_SECONDS
@@ -54,85 +69,58 @@ def log_print(*args, **kwargs):
 
 # ================= 历史记录管理 =================
 
-def load_history():
-    """加载最近 7 天的历史选题"""
-    history_file = get_history_file()
-    if not os.path.exists(history_file):
-        return []
-    
+def load_history(days: int = 7) -> List[Dict[str, str]]:
+    """加载最近 N 天的历史选题（history_store 按日期索引 + mtime 缓存，重复调用不重复解析）"""
     try:
-        with open(history_file, "r", encoding="utf-8") as f:
-            history = json.load(f)
-            
-        # 过滤出最近 7 天的
-        recent_history = []
-        today = datetime.now()
-        for item in history:
-            date_str = item.get("date")
-            try:
-                item_date = datetime.strptime(date_str, "%Y-%m-%d")
-                if (today - item_date).days <= 7:
-                    recent_history.append(item)
-            except:
-                continue
-        return recent_history
-    except Exception:
+        return get_history_store().recent(days)
+    except Exception as e:
+        log_print(f"   ⚠️ 历史记录读取失败: {e}")
         return []
 
 def save_topic_to_history(topic, angle):
-    """保存选中选题到历史记录"""
-    history_file = get_history_file()
-    history = []
-    if os.path.exists(history_file):
-        try:
-            with open(history_file, "r", encoding="utf-8") as f:
-                history = json.load(f)
-        except:
-            pass
-            
+    """保存选中选题到历史记录（追加写入，不再重写整个文件）"""
     new_entry = {
         "date": datetime.now().strftime("%Y-%m-%d"),
         "topic": topic,
         "angle": angle
     }
-    history.append(new_entry)
-    
-    # 只保留最近 30 条
-    if len(history) > 30:
-        history = history[-30:]
-        
-    with open(history_file, "w", encoding="utf-8") as f:
-        json.dump(history, f, ensure_ascii=False, indent=2)
+    # v4.5: 历史不再截断，去重由 topic_index 倒排索引负责，成本与历史长度无关
+    store = get_history_store()
+    store.append(new_entry)
+    get_topic_index(store.all()).add(new_entry)
     log_print(f"   💾 历史记录已更新: {topic}")
 
 # ================= 去重与相似度辅助 =================
 
-def _max_similarity_to_history(title: str, history_items: List[Dict[str, str]]) -> float:
-    """计算标题与历史记录的最大相似度"""
-    if not title or not history_items:
+def _max_similarity_to_history(title: str) -> float:
+    """计算标题与全部历史选题的最大相似度（字符二元组 Jaccard，倒排索引查询）"""
+    if not title:
         return 0.0
-    sims = []
-    for h in history_items:
-        hist_title = (h.get("topic") or "").strip()
-        if not hist_title:
-            continue
-        sims.append(SequenceMatcher(None, title.lower(), hist_title.lower()).ratio())
-    return max(sims) if sims else 0.0
-
-def _dedup_search_plan(search_plan: List[Dict[str, str]], history_items: List[Dict[str, str]], threshold: float = 0.82) -> List[Dict[str, str]]:
+    return get_topic_index().max_similarity(title)
+
+def _dedup_search_plan(search_plan: List[Dict[str, str]], threshold: float = DEFAULT_THRESHOLD) -> List[Dict[str, str]]:
     """
-    根据历史选题做简单去重，若全部被判定为重复，则强制保留相似度最低的一个，避免饥饿。
+    根据全部历史选题去重，若全部被判定为重复，则强制保留相似度最低的一个，避免饥饿。
+    v4.6: 开启 semantic_dedup 时同时比较语义相似度，两者按各自阈值归一化后取较大值（>=1 视为重复）。
     """
     if not search_plan:
         return search_plan
+    titles = [(item.get("event") or "").strip() for item in search_plan]
+    semantic = semantic_similarities(titles, (h.get("topic") or "" for h in get_history_store().all()))
+    # 只在语义去重可用时读取阈值，功能关闭时不对非法配置反复告警
+    sem_threshold = get_semantic_threshold() if semantic is not None else None
     scored = []
-    for item in search_plan:
-        title = (item.get("event") or "").strip()
-        max_sim = _max_similarity_to_history(title, history_items)
+    for idx, item in enumerate(search_plan):
+        max_sim = _max_similarity_to_history(titles[idx]) / threshold
+        if semantic is not None and titles[idx]:
+            max_sim = max(max_sim, semantic[idx] / sem_threshold)
         new_item = dict(item)
         new_item["_max_sim"] = max_sim
         scored.append(new_item)
-    deduped = [i for i in scored if i["_max_sim"] < threshold]
+    deduped = [i for i in scored if i["_max_sim"] < 1.0]
+    for i in scored:
+        if i["_max_sim"] >= 1.0:
+            log_print(f"   ♻️ 与历史选题重复，跳过: {i.get('event', '(unknown)')}")
     if not deduped and scored:
         fallback = min(scored, key=lambda x: x["_max_sim"])
         log_print(f"⚠️ All topics were flagged as duplicates. Force-keeping the least similar one: {fallback.get('event', '(unknown)')}")
@@ -145,6 +133,8 @@ def _dedup_search_plan(search_plan: List[Dict[str, str]], history_items: List[Di
 # ================= 配置区 =================
 
 CURRENT_CONFIG = PHASE_CONFIG[OPERATIONAL_PHASE]
+# v5.1: 中断后 resume 只复用 3 小时内的搜索结果，更早的热点重新扫描
+HUNT_CHECKPOINT_MAX_AGE = 3 * 3600
 
 # ================= 搜索工具 (多级降级) =================
 
@@ -167,26 +157,45 @@ class WebSearchTool:
     def search(self, query, max_results=5, include_answer=True, topic=None, days=3):
         """
         多级搜索降级逻辑: Perplexity -> Tavily -> Exa
+        v5.1: 同一轮内相同参数的搜索只请求一次（并发合并 + 结果复用）
         """
         if not self.enabled: return []
-
-        # 1. 首选 Perplexity
-        if self.pplx_enabled:
-            results = self._search_perplexity(query)
-            if results: return results
-
-        # 2. 备选 Tavily
-        if self.tavily_enabled:
-            results = self._search_tavily(query, max_results, include_answer, topic, days)
-            if results: return results
-
-        # 3. 兜底 Exa
-        if self.exa_enabled:
-            results = self._search_exa(query, max_results)
+        check_cancelled()
+        key = ("search", query, max_results, include_answer, topic, days)
+        return get_singleflight().do(key, lambda: self._search_uncached(query, max_results, include_answer, topic, days))
+
+    def _search_uncached(self, query, max_results=5, include_answer=True, topic=None, days=3):
+        # 1. 首选 Perplexity -> 2. 备选 Tavily -> 3. 兜底 Exa
+        # v5.1: 熔断中的服务商直接跳过；返回 None（报错/超时）计为失败，空列表不算
+        providers = (
+            ("perplexity", self.pplx_enabled, lambda: self._search_perplexity(query)),
+            ("tavily", self.tavily_enabled, lambda: self._search_tavily(query, max_results, include_answer, topic, days)),
+            ("exa", self.exa_enabled, lambda: self._search_exa(query, max_results)),
+        )
+        for name, enabled, search in providers:
+            if not enabled:
+                continue
+            breaker = get_circuit_breaker(name)
+            if not breaker.allow():
+                continue
+            try:
+                results = search()
+                breaker.record(results is not None)
+            finally:
+                breaker.release()
+            budget = get_search_budget()
+            if budget is not None and results is not None:
+                budget.charge(name, self._tavily_depth())
             if results: return results
 
         return []
 
+    @staticmethod
+    def _tavily_depth() -> str:
+        """v5.1: 预算不足时 Tavily 降为 basic 深度（advanced 按 2 次计费）"""
+        budget = get_search_budget()
+        return budget.tavily_depth if budget is not None else "advanced"
+
     def _search_perplexity(self, query):
         """Perplexity API: 获取模型生成的摘要作为核心研究素材"""
         log_print(f"   🔍 Perplexity 搜索: {query}")
@@ -215,11 +224,11 @@ class WebSearchTool:
         
         try:
             proxies = PROXY_URL if PROXY_URL else None
-            with httpx.Client(timeout=45, proxy=proxies, trust_env=False) as client:
+            with httpx.Client(timeout=provider_timeout("perplexity", 45), proxy=proxies, trust_env=False) as client:
                 @retryable
                 @track_cost(context="perplexity_search")
                 def _post():
-                    return client.post(url, json=payload, headers=headers)
+                    return rate_limited("perplexity", lambda: client.post(url, json=payload, headers=headers))
                 
                 resp = _post()
                 if resp.status_code != 200:
@@ -241,7 +250,7 @@ class WebSearchTool:
         payload = {
             "api_key": self.tavily_key,
             "query": query,
-            "search_depth": "advanced",
+            "search_depth": self._tavily_depth(),
             "max_results": max_results,
             "include_answer": include_answer,
             "days": days
@@ -250,10 +259,11 @@ class WebSearchTool:
             
         try:
             proxies = PROXY_URL if PROXY_URL else None
-            with httpx.Client(timeout=30, proxy=proxies, trust_env=False) as client:
+            with httpx.Client(timeout=provider_timeout("tavily", 30), proxy=proxies, trust_env=False) as client:
                 @retryable
                 def _post():
-                    resp = client.post(url, json=payload)
+                    # 限流器按 Retry-After 冷却后自动重发，仍被限流才放弃
+                    resp = rate_limited("tavily", lambda: client.post(url, json=payload))
                     if resp.status_code in [429, 432]:
                         log_print(f"      ⚠️ Tavily 额度受限 ({resp.status_code})")
                         return resp
@@ -271,7 +281,8 @@ class WebSearchTool:
                     results.append({
                         "title": r.get('title', ''),
                         "body": r.get('content', ''),
-                        "url": r.get('url', '')
+                        "url": r.get('url', ''),
+                        "published": r.get('published_date', '')
                     })
                 return results
         except Exception as e:
@@ -294,11 +305,11 @@ class WebSearchTool:
         }
         try:
             proxies = PROXY_URL if PROXY_URL else None
-            with httpx.Client(timeout=30, proxy=proxies, trust_env=False) as client:
+            with httpx.Client(timeout=provider_timeout("exa", 30), proxy=proxies, trust_env=False) as client:
                 @retryable
                 @track_cost(context="exa_search")
                 def _post():
-                    return client.post(url, json=payload, headers=headers)
+                    return rate_limited("exa", lambda: client.post(url, json=payload, headers=headers))
                 
                 resp = _post()
                 if resp.status_code != 200:
@@ -311,7 +322,8 @@ class WebSearchTool:
                     results.append({
                         "title": r.get('title', ''),
                         "body": r.get('text', '') or r.get('snippet', ''),
-                        "url": r.get('url', '')
+                        "url": r.get('url', ''),
+                        "published": r.get('publishedDate', '')
                     })
                 return results
         except Exception as e:
@@ -325,10 +337,10 @@ def get_github_trending():
     url = "https://github.com/trending?since=weekly" # 全语言 Weekly，范围更广
     headers = {"User-Agent": "Mozilla/5.0"}
     try:
-        with httpx.Client(proxy=PROXY_URL, timeout=15) as client:
+        with httpx.Client(proxy=PROXY_URL, timeout=provider_timeout("github", 15)) as client:
             @retryable
             def _get():
-                return client.get(url, headers=headers)
+                return timed("github", lambda: client.get(url, headers=headers))
 
             resp = _get()
         soup = BeautifulSoup(resp.text, 'html.parser')
@@ -355,6 +367,7 @@ def _fetch_single_source(
     抓取单个热榜源（供并发调用）。
     隔离异常，保证单源失败不影响整体。
     """
+    check_cancelled()
     try:
         return _fetch_with_fallback(
             source["primary"],
@@ -404,24 +417,29 @@ class TrendingDiscoverer:
         
         # 并发执行 Jina 抓取
         def fetch_jina(url):
+            check_cancelled()
             try:
-                headers = {"x-no-cache": "true"}
-                with httpx.Client(proxy=PROXY_URL, timeout=15) as client:
-                    resp = client.get(f"https://r.jina.ai/{url}", headers=headers)
-                    if resp.status_code == 200:
-                        text_clean = resp.text[:1000].replace('\n', ' ')
-                        return f"Source[{url}]: {text_clean}"
+                status, text = _jina_fetch(url, timeout=15)
+                if status == 200:
+                    text_clean = text[:1000].replace('\n', ' ')
+                    return f"Source[{url}]: {text_clean}"
             except:
                 pass
             return None
 
         # 并发执行搜索探测
         def fetch_search(q):
+            check_cancelled()
             if self.search_tool and self.search_tool.enabled:
-                res = self.search_tool.search(q, max_results=2, days=1)
+                with search_lane("discover"):
+                    res = self.search_tool.search(q, max_results=2, days=1)
                 return [f"{r['title']}: {r['body'][:100]}" for r in res]
             return []
 
+        budget = get_search_budget()
+        if budget is not None:
+            search_queries = search_queries[:budget.allowed("discover")]
+
         with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_FETCHES) as executor:
             # 提交 Jina 任务
             jina_futures = {executor.submit(fetch_jina, url): url for url in realtime_urls}
@@ -546,26 +564,28 @@ def _fetch_with_fallback(
     """
     三级获取策略：Jina Primary -> Jina Backup -> Tavily Search
     """
-    jina_base = "https://r.jina.ai/"
-    
     # 1. 尝试 Jina Primary
-    content = _fetch_via_jina(jina_base + primary_url, source_name, "primary")
+    content = _fetch_via_jina(primary_url, source_name, "primary")
     if content and len(content) >= 500:
         return content
     
     # 2. 尝试 Jina Backup (RSS)
     if backup_url:
         log_print(f"      🔄 [{source_name}] Primary 失败，尝试 Backup (RSS)...")
-        content = _fetch_via_jina(jina_base + backup_url, source_name, "backup")
+        content = _fetch_via_jina(backup_url, source_name, "backup")
         if content and len(content) >= 500:
             return content
 
-    # 3. 尝试 Tavily 终极救援
-    if search_tool and search_tool.enabled:
+    # 3. 尝试 Tavily 终极救援（v5.1: 受搜索预算约束，额度用完则放弃该源）
+    budget = get_search_budget()
+    if budget is not None and not budget.try_reserve("rescue"):
+        log_print(f"      💳 [{source_name}] 救援额度已用完，跳过")
+    elif search_tool and search_tool.enabled:
         log_print(f"      🛡️ [{source_name}] 启用 Tavily 终极救援...")
         # 构造搜索词
         query = f"{source_name} 热门 AI 科技内容 {datetime.now().strftime('%Y-%m-%d')}"
-        results = search_tool.search(query, max_results=3, days=3)
+        with search_lane("rescue"):
+            results = search_tool.search(query, max_results=3, days=3)
         if results:
             # 拼接 Tavily 的搜索结果作为伪造的"网页内容"
             combined_text = "\n".join([f"Title: {r['title']}\nSnippet: {r['body']}" for r in results])
@@ -576,35 +596,64 @@ def _fetch_with_fallback(
     return None
 
 
+def _jina_fetch(url: str, timeout: float = 30) -> Tuple[int, str]:
+    """
+    通过 Jina Reader 读取 url，返回 (状态码, 正文)。
+    v5.1: 同一轮内对同一 URL（原样，不做规范化）的读取只请求一次，成功结果复用
+    """
+    headers = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+        "x-no-cache": "true"  # 强制 Jina Reader 抓取最新页面，不返回缓存
+    }
+
+    def _request() -> Tuple[int, str]:
+        # v5.1: Jina 熔断中直接抛 CircuitOpenError，调用方立即走下一级
+        breaker = get_circuit_breaker("jina")
+        if not breaker.allow():
+            raise CircuitOpenError("jina")
+        try:
+            with httpx.Client(proxy=PROXY_URL, timeout=provider_timeout("jina", timeout)) as client:
+                @retryable
+                def _get():
+                    return rate_limited("jina", lambda: client.get(f"https://r.jina.ai/{url}", headers=headers))
+
+                resp = _get()
+        except Exception:
+            breaker.record_failure()
+            raise
+        else:
+            # 5xx 与限流算服务商故障；4xx（页面本身不存在等）不算
+            breaker.record(resp.status_code < 500 and resp.status_code not in (429, 432))
+        finally:
+            breaker.release()
+        return resp.status_code, resp.text
+
+    # 按原始 URL 合并：规范化会合并不同页面，缓存键不能有损
+    key = ("jina", url.strip())
+    return get_singleflight().do(key, _request, cacheable=lambda r: r[0] == 200)
+
+
 def _fetch_via_jina(url: str, source_name: str, url_type: str) -> Optional[str]:
     """
     通过 Jina Reader API 获取网页内容
     """
     try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-            "x-no-cache": "true"  # 强制 Jina Reader 抓取最新页面，不返回缓存
-        }
-        with httpx.Client(proxy=PROXY_URL, timeout=30) as client:
-            @retryable
-            def _get():
-                return client.get(url, headers=headers)
-
-            resp = _get()
-            
-            if resp.status_code != 200:
-                log_print(f"      ⚠️ [{source_name}] {url_type} 状态码: {resp.status_code}")
-                return None
-            
-            content = resp.text
-            if len(content) < 500:
-                log_print(f"      ⚠️ [{source_name}] {url_type} 内容过短: {len(content)} 字符")
-                return None
-            
-            log_print(f"      ✅ [{source_name}] {url_type} 成功: {len(content)} 字符")
-            return content[:8000]  # 限制长度，避免 token 过多
+        status, content = _jina_fetch(url)
+        if status != 200:
+            log_print(f"      ⚠️ [{source_name}] {url_type} 状态码: {status}")
+            return None
+        
+        if len(content) < 500:
+            log_print(f"      ⚠️ [{source_name}] {url_type} 内容过短: {len(content)} 字符")
+            return None
+        
+        log_print(f"      ✅ [{source_name}] {url_type} 成功: {len(content)} 字符")
+        return content[:8000]  # 限制长度，避免 token 过多
             
+    except CircuitOpenError:
+        log_print(f"      ⏭️ [{source_name}] Jina 熔断中，跳过 {url_type}")
+        return None
     except httpx.TimeoutException:
         log_print(f"      ⚠️ [{source_name}] {url_type} 超时")
         return None
@@ -826,11 +875,13 @@ PLAN_PROMPT = get_plan_prompt()
 def step1_broad_scan_and_plan(
     client: OpenAI,
     search_tool: "WebSearchTool",
-    directed_topic: Optional[str] = None
+    directed_topic: Optional[str] = None,
+    history: Optional[List[Dict[str, str]]] = None
 ) -> List[Dict[str, str]]:
     """
     Step 1: 广域价值扫描 (心理学三路策略 + 全网雷达)
     混合模式：如果传入 directed_topic，将其作为 A 路核心，同时保留 B/C 路随机探索
+    history: 调用方已加载的近期历史，避免重复读取
     """
     log_print(f"\n📡 [Step 1] 广域价值扫描 (策略: {CURRENT_CONFIG['name']})...")
     if directed_topic:
@@ -841,14 +892,19 @@ def step1_broad_scan_and_plan(
     # === Phase 0: 全网雷达 (Global Radar) ===
     # 破除信息茧房，主动嗅探不在 WATCHLIST 里的新黑马
     log_print(f"   🌑 [Phase 0] 全网雷达扫描 (发现新物种)...")
-    for q in RADAR_QUERIES:
-        res = search_tool.search(q, max_results=2, topic="news", days=1) # 只看24小时内
-        pre_scan_results.extend(res)
+    # v5.1: 各路请求数受搜索预算约束（额度不足时减少目标/抽样数）
+    budget = get_search_budget()
+    radar_queries = RADAR_QUERIES[:budget.allowed("radar")] if budget else RADAR_QUERIES
+    for q in radar_queries:
+        with search_lane("radar"):
+            res = search_tool.search(q, max_results=2, topic="news", days=1) # 只看24小时内
+        pre_scan_results.extend(tag_lane(res, "雷达", 1))
 
     # === Phase 0.5: 热点提取 ===
     hot_entities = extract_hot_entities(client, pre_scan_results)
     if hot_entities:
         log_print(f"   🔥 [雷达锁定] 突发热点: {hot_entities}")
+        record_hot_keywords(hot_entities, source="hot_entities")
 
     # === Phase 0.6: 热榜动态趋势 ===
     fresh_keywords = []
@@ -856,6 +912,7 @@ def step1_broad_scan_and_plan(
         fresh_keywords = fetch_dynamic_trends(client, search_tool)
     except Exception as e:
         log_print(f"      ⚠️ 热榜抓取异常，跳过: {e}")
+    record_hot_keywords(fresh_keywords, source="hotlist")
     
     # === A路: 顶流锚点 (Watchlist + Hotspots + Fresh) ===
     if directed_topic:
@@ -866,6 +923,8 @@ def step1_broad_scan_and_plan(
             if h.lower() not in directed_topic.lower():
                 targets.append(h)
         targets = targets[:4] # 保持聚焦
+        if budget:
+            targets = targets[:budget.targets_for("A", 3)]
         
         # === v4.9: 定向搜索增强 - 扩展最新功能关键词 ===
         log_print(f"   🔍 [定向增强] 扩展搜索: {directed_topic} + 最新功能/更新...")
@@ -879,10 +938,13 @@ def step1_broad_scan_and_plan(
         # 查找匹配的产品扩展
         for product, expansions in PRODUCT_FEATURE_EXPANSIONS.items():
             if product in directed_topic.lower():
+                if budget:
+                    expansions = expansions[:max(budget.allowed("A") - len(targets) * 3, 0)]
                 for exp in expansions:
                     exp_query = f"{exp} 最新 功能 更新 2025"
-                    res = search_tool.search(exp_query, max_results=2, topic="news", days=7)
-                    pre_scan_results.extend(res)
+                    with search_lane("A"):
+                        res = search_tool.search(exp_query, max_results=2, topic="news", days=7)
+                    pre_scan_results.extend(tag_lane(res, "A", 7))
                     log_print(f"      → 扩展搜索: {exp_query} ({len(res)} 结果)")
                 break
     else:
@@ -897,6 +959,8 @@ def step1_broad_scan_and_plan(
             if not any(h.lower() in t.lower() for t in targets):
                 targets.insert(0, h)
         targets = targets[:6]
+        if budget:
+            targets = targets[:budget.targets_for("A", 3)]
 
     log_print(f"   🎯 [A路-锚点] 扫描目标: {targets}")
     for t in targets:
@@ -907,8 +971,9 @@ def step1_broad_scan_and_plan(
             f"{t} 最新功能 上线 发布 2025"  # v4.9: 增加最新功能搜索
         ]
         for q in queries:
-            res = search_tool.search(q, max_results=2, topic="news", days=7)  # v4.9: 增加结果数和时间范围
-            pre_scan_results.extend(res)
+            with search_lane("A"):
+                res = search_tool.search(q, max_results=2, topic="news", days=7)  # v4.9: 增加结果数和时间范围
+            pre_scan_results.extend(tag_lane(res, "A", 7))
         
     # === B路: 随机收益场景 (Life Hack) ===
     log_print(f"   ⚡ [B路-收益] 扫描效率神器...")
@@ -916,13 +981,16 @@ def step1_broad_scan_and_plan(
     if directed_topic:
         # 混合模式：加入定向主题的效率场景
         selected_efficiency.insert(0, f"{directed_topic} 效率神器")
+    if budget:
+        selected_efficiency = selected_efficiency[:budget.allowed("B")]
         
     log_print(f"      🎲 随机抽取: {selected_efficiency}")
     for kw in selected_efficiency:
         # B路: 强制追加高质量信源，过滤 SEO 垃圾
         q = f"{kw} 推荐 site:sspai.com OR site:36kr.com OR site:v2ex.com OR site:mp.weixin.qq.com"
-        res = search_tool.search(q, max_results=2, days=3)
-        pre_scan_results.extend(res)
+        with search_lane("B"):
+            res = search_tool.search(q, max_results=2, days=3)
+        pre_scan_results.extend(tag_lane(res, "B", 3))
         
     # === C路: 随机避坑场景 (Pain Points) ===
     log_print(f"   🛡️ [C路-损失] 扫描避坑/吐槽...")
@@ -930,21 +998,35 @@ def step1_broad_scan_and_plan(
     if directed_topic:
         # 混合模式：加入定向主题的避坑场景
         selected_pain.insert(0, f"{directed_topic} 避坑 吐槽")
+    if budget:
+        selected_pain = selected_pain[:budget.allowed("C")]
         
     log_print(f"      🎲 随机抽取: {selected_pain}")
     for kw in selected_pain:
         # C路: 强制追加社区信源
         q = f"{kw} 吐槽 避坑 site:v2ex.com OR site:reddit.com OR site:mp.weixin.qq.com"
-        res = search_tool.search(q, max_results=2, days=3)
-        pre_scan_results.extend(res)
+        with search_lane("C"):
+            res = search_tool.search(q, max_results=2, days=3)
+        pre_scan_results.extend(tag_lane(res, "C", 3))
     
-    pre_scan_text = "\n".join([f"- {r['title']}: {r['body'][:80]}" for r in pre_scan_results])
+    # 加载历史记录
+    if history is None:
+        history = load_history()
+
+    # v5.1: 同一文章被多路搜到时合并为一条（保留全部来源路线），再本地预排序，
+    # 按实体聚类打分，只把前 N 个簇交给 LLM 规划
+    from agents.keyword_automaton import get_keyword_catalog
+    pre_scan_results = dedup_results(pre_scan_results)
+    priority = list(WATCHLIST) + hot_entities + fresh_keywords + ([directed_topic] if directed_topic else [])
+    seeds = priority + targets + list(get_keyword_catalog().keywords)
+    pre_scan_text = build_planning_context(
+        pre_scan_results, seeds, priority, history_topics=[h.get('topic', '') for h in history]
+    )
+    if not pre_scan_text:
+        pre_scan_text = "\n".join([f"- {r['title']}: {r['body'][:80]}" for r in pre_scan_results])
     
     # 2. 智能筛选与规划
     log_print(f"   📝 情报聚合完毕，DeepSeek 正在应用心理学策略选题...")
-    
-    # 加载历史记录
-    history = load_history()
     history_text = "\n".join([f"- {h['date']}: {h['topic']} ({h['angle']})" for h in history])
     if not history_text: history_text = "无（这是第一篇）"
 
@@ -971,8 +1053,8 @@ def step1_broad_scan_and_plan(
             search_plan = search_plan["events"]
         
         # v4.4: 去重并防饥饿，若全重复则强制保留相似度最低的一个
-        history_items = load_history()
-        search_plan = _dedup_search_plan(search_plan, history_items)
+        # v4.5: 对比范围从最近 7 天扩展到全部历史（倒排索引）
+        search_plan = _dedup_search_plan(search_plan)
         
         log_print(f"   🧠 选题方向已锁定: {[i['event'] + '-' + i['angle'] for i in search_plan]}\n")
         return search_plan
@@ -1004,9 +1086,16 @@ def step2_deep_scan(
     """
     log_print("📡 [Step 2] 启动深度价值验证...\n")
     all_results = []
+    # v5.1: 跨选题、跨查询去重；先收集再渲染，重复项只出现一次并标注所有来源选题
+    deduper = ResultDeduper()
+    sections: List[Tuple[str, List[Tuple[str, str, List[Dict[str, Any]]]]]] = []
     
     w_news = CURRENT_CONFIG['weights']['news']
     w_social = CURRENT_CONFIG['weights']['social']
+
+    # v5.1: 预算不足时每个方向保留社交搜索（核心），官方验证按顺序能给几个给几个
+    budget = get_search_budget()
+    news_quota = max(budget.allowed("step2") - len(search_plan), 0) if budget else None
     
     for item in search_plan:
         event = item.get("event", "未知")
@@ -1028,42 +1117,57 @@ def step2_deep_scan(
             news_max_results = 2 if is_core else 1
         
         log_print(f"   🔍 正在深挖: 【{event}】 ({angle}方向)")
-        event_data = [f"### 🎯 选题: {event} ({angle})"]
+        event_sections = []
         
         # 1. 社交/痛点搜索 (核心)
         if social_q:
             log_print(f"      💬 社交舆情 (权重 {w_social}): {social_q}")
             full_social_q = f"{social_q} site:mp.weixin.qq.com OR site:xiaohongshu.com OR site:bilibili.com"
-            res = search_tool.search(full_social_q, max_results=social_max_results)
-            if res:
-                event_data.append(f"\n**💬 用户反馈** ({social_q})")
-                for r in res:
-                    title = _clean_text(r.get('title', '无标题'), 50)
-                    body = _clean_text(r.get('body', ''), 100)
-                    url = r.get('url', '')
-                    if url:
-                        event_data.append(f"- **{title}**: {body} [[来源]({url})]")
-                    else:
-                        event_data.append(f"- **{title}**: {body}")
+            with search_lane("step2"):
+                res = search_tool.search(full_social_q, max_results=social_max_results)
+            event_sections.append(("social", social_q, deduper.add(res, lane=event, query=social_q)))
                 
         # 2. 官方验证 (辅助)
-        if news_q:
+        if news_q and news_quota == 0:
+            log_print(f"      💳 搜索额度不足，跳过官方验证: {news_q}")
+        elif news_q:
+            if news_quota is not None:
+                news_quota -= 1
             log_print(f"      🔥 官方验证 (权重 {w_news}): {news_q}")
-            res = search_tool.search(news_q, max_results=news_max_results)
-            if res:
-                event_data.append(f"\n**📰 官方信息** ({news_q})")
-                for r in res:
-                    title = _clean_text(r.get('title', '无标题'), 60)
-                    url = r.get('url', '')
-                    if url:
-                        event_data.append(f"- {title} [[来源]({url})]")
-                    else:
-                        event_data.append(f"- {title}")
+            with search_lane("step2"):
+                res = search_tool.search(news_q, max_results=news_max_results)
+            event_sections.append(("news", news_q, deduper.add(res, lane=event, query=news_q)))
         
-        all_results.append("\n".join(event_data))
+        sections.append((f"### 🎯 选题: {event} ({angle})", event_sections))
         log_print("")
         time.sleep(1)
 
+    if deduper.merged:
+        log_print(f"   🧹 合并重复/近重复结果 {deduper.merged} 条")
+
+    for header, event_sections in sections:
+        event_data = [header]
+        for kind, query, res in event_sections:
+            if not res:
+                continue
+            if kind == "social":
+                event_data.append(f"\n**💬 用户反馈** ({query})")
+            else:
+                event_data.append(f"\n**📰 官方信息** ({query})")
+            for r in res:
+                url = r.get('url', '')
+                source = f" [[来源]({url})]" if url else ""
+                also = r.get('lanes', [])[1:]
+                also_text = f" (另见: {', '.join(also)})" if also else ""
+                if kind == "social":
+                    title = _clean_text(r.get('title', '无标题'), 50)
+                    body = _clean_text(r.get('body', ''), 100)
+                    event_data.append(f"- **{title}**: {body}{also_text}{source}")
+                else:
+                    title = _clean_text(r.get('title', '无标题'), 60)
+                    event_data.append(f"- {title}{also_text}{source}")
+        all_results.append("\n".join(event_data))
+
     # GitHub 补充 (Weekly)
     log_print(f"   💻 GitHub Weekly Trending...")
     github_res = get_github_trending()
@@ -1111,26 +1215,19 @@ def step3_final_decision(
         # 单次扫描用 chat 模型（快、便宜），综合决策才用 reasoner
         @retryable
         @track_cost(context="step3_final_decision")
-        def _chat_create():
+        def _chat_create(request_messages):
             return client.chat.completions.create(
                 model="deepseek-chat",
-                messages=[
-                    {"role": "system", "content": prompt},
-                    {"role": "user", "content": f"【深度验证情报】\n{scan_data}"}
-                ],
+                messages=request_messages,
                 stream=True
             )
 
-        response = _chat_create()
-
         log_print("\n" + "="*20 + " 选题报告 " + "="*20 + "\n")
-        collected = []
-        for chunk in response:
-            if chunk.choices[0].delta.content:
-                c = chunk.choices[0].delta.content
-                log_print(c, end="", flush=True)
-                collected.append(c)
-        return "".join(collected)
+        # v5.1: 边生成边写 .partial，流中断时基于已生成部分续写
+        return stream_chat("hunt_decision", _chat_create, [
+            {"role": "system", "content": prompt},
+            {"role": "user", "content": f"【深度验证情报】\n{scan_data}"}
+        ])
     except Exception as e:
         log_print(f"❌ 决策失败: {e}")
         return f"失败: {e}"
@@ -1191,13 +1288,21 @@ def auto_init_workflow() -> None:
     log_print("   - 可继续运行 hunt 获取更多选题")
     log_print("   - 或运行 `python run.py final` 综合所有报告，获得 3 个提示词")
 
-def save_report(raw_data: str, analysis: str, directed_topic: Optional[str] = None) -> None:
+def save_report(raw_data: str, analysis: str, directed_topic: Optional[str] = None, duration_ms: Optional[float] = None) -> None:
     filename = get_topic_report_file()
     mode_info = f"定向搜索: {directed_topic}" if directed_topic else CURRENT_CONFIG['name']
     content = f"# 🚀 选题雷达报告 v4.0 ({mode_info})\n\n**时间**: {datetime.now().strftime('%Y-%m-%d %H:%M')}\n**策略**: {CURRENT_CONFIG['strategy']}\n\n## 深度验证情报\n\n{raw_data}\n\n---\n\n## 选题分析\n\n{analysis}"
     with open(filename, "w", encoding="utf-8") as f:
         f.write(content)
     log_print(f"\n\n📁 报告已保存: {filename}")
+    record_artifact(filename, duration_ms=duration_ms)
+
+    # v5.1: 旁路结构化摘要，final 阶段只读摘要，不再把整份报告塞进 prompt
+    try:
+        digest = build_report_digest(raw_data, analysis, directed_topic=directed_topic, strategy=CURRENT_CONFIG['name'])
+        write_sidecar(filename, digest)
+    except Exception as e:
+        log_print(f"   ⚠️ 报告摘要生成失败（final 将回退解析 Markdown）: {e}")
     
     # 保存后自动初始化工作流
     auto_init_workflow()
@@ -1209,6 +1314,7 @@ def main(topic=None, dry_run=False):
         topic: 可选，指定搜索主题。
         dry_run: 节流模式，不调用 API。
     """
+    started = time.perf_counter()
     mode_text = f"定向搜索: {topic}" if topic else "全网雷达"
     if dry_run:
         mode_text += " (🧪 DRY RUN)"
@@ -1229,32 +1335,52 @@ def main(topic=None, dry_run=False):
 ## 今日主推
 Google AI耳机评测，命中了锚点效应。
 """
-        save_report(raw_data, analysis, directed_topic=topic)
+        save_report(raw_data, analysis, directed_topic=topic, duration_ms=(time.perf_counter() - started) * 1000)
         log_print("\n✅ [Mock] 选题雷达完成！")
         return
 
     search_tool = WebSearchTool()
+    get_singleflight().reset()
+    log_print(plan_hunt_budget(search_tool, directed_topic=topic).plan_summary())
     
-    with httpx.Client(proxy=PROXY_URL, timeout=REQUEST_TIMEOUT) as http_client:
-        client = OpenAI(api_key=DEEPSEEK_API_KEY, base_url=DEEPSEEK_BASE_URL, http_client=http_client)
+    try:
+        with httpx.Client(proxy=PROXY_URL, timeout=REQUEST_TIMEOUT) as http_client:
+            client = OpenAI(api_key=DEEPSEEK_API_KEY, base_url=DEEPSEEK_BASE_URL, http_client=http_client)
         
-        # 加载历史记录用于去重
-        history = load_history()
-        history_text = "\n".join([f"- {h['date']}: {h['topic']} ({h['angle']})" for h in history])
-        if not history_text: history_text = "无（这是第一篇）"
+            # 加载历史记录用于去重
+            history = load_history()
+            history_text = "\n".join([f"- {h['date']}: {h['topic']} ({h['angle']})" for h in history])
+            if not history_text: history_text = "无（这是第一篇）"
         
-        # 1. 广域扫描 / 定向搜索
-        search_plan = step1_broad_scan_and_plan(client, search_tool, directed_topic=topic)
+            # v5.1: 各步结果写入当日检查点，中断后 resume 从断点继续（热点时效短，只复用 3 小时内的）
+            checkpoint = Checkpoint("hunt", fingerprint(topic), max_age=HUNT_CHECKPOINT_MAX_AGE)
+
+            # 1. 广域扫描 / 定向搜索
+            search_plan = checkpoint.step(
+                "search_plan", lambda: step1_broad_scan_and_plan(client, search_tool, directed_topic=topic, history=history))
         
-        # 2. 深度验证
-        raw_data = step2_deep_scan(search_plan, search_tool, directed_topic=topic)
+            # 2. 深度验证
+            raw_data = checkpoint.step("raw_data", lambda: step2_deep_scan(search_plan, search_tool, directed_topic=topic))
         
-        # 3. 决策（传入历史记录用于去重）
-        analysis = step3_final_decision(raw_data, client, history_text, directed_topic=topic)
+            # 3. 决策（传入历史记录用于去重）
+            analysis = checkpoint.step(
+                "analysis", lambda: step3_final_decision(raw_data, client, history_text, directed_topic=topic),
+                keep=lambda a: bool(a) and not a.startswith("失败"))
         
-        # 4. 保存
-        save_report(raw_data, analysis, directed_topic=topic)
-    
+            # 4. 保存
+            save_report(raw_data, analysis, directed_topic=topic, duration_ms=(time.perf_counter() - started) * 1000)
+            checkpoint.clear()
+    finally:
+        # 异常 / Ctrl+C 时同样结束本次预算：否则进程级预算（可能已降级的 Tavily 深度、用完的救援额度）
+        # 会残留给同进程（Streamlit / main.py）后续的仿写模式和单独搜索继续记账
+        budget_report = end_search_budget()
+    
+    log_saved_calls("本次雷达")
+    if budget_report:
+        log_print(budget_report)
+    skipped = skipped_summary()
+    if skipped:
+        log_print(f"   ⚡ 熔断跳过请求: {skipped}")
     log_print("\n✅ 选题雷达完成！")
 
 def _extract_topic_frequencies(reports_content: str) -> Dict[str, Tuple[int, float, str]]:
@@ -1266,55 +1392,14 @@ def _extract_topic_frequencies(reports_content: str) -> Dict[str, Tuple[int, flo
     - 硬核技术类: 2.0
     - 投资金融类: 0.5
     - 通用场景类: 1.0 (但在洞察中标记为"修饰语")
+
+    v5.1: 分类与权重移至 settings.yaml (keyword_categories)，
+    由 Aho–Corasick 自动机一次扫描完成全部关键词计数
     """
-    from collections import Counter
-    
-    # 分类关键词及其权重
-    KEYWORD_CATEGORIES = {
-        # === 硬核技术类 (权重 2.0) ===
-        "tech": {
-            "weight": 2.0,
-            "keywords": [
-                "DeepSeek", "Cursor", "Gemini", "Claude", "GPT", "Kimi", "Copilot",
-                "Windsurf", "Bolt", "Lovable", "秘塔", "豆包", "通义", "智谱", "AutoGLM",
-                "Coze", "Agent", "智能体", "MCP", "RAG", "Workflow", "工作流",
-                "本地部署", "Ollama", "vLLM", "Prompt", "提示词",
-                "架构图", "流程图", "思维导图", "文档分析", "代码生成",
-                "API", "SDK", "开源", "GitHub"
-            ]
-        },
-        # === 投资金融类 (权重 0.5) ===
-        "finance": {
-            "weight": 0.5,
-            "keywords": [
-                "股价", "上市", "财报", "暴涨", "暴跌", "市值", "融资", "IPO",
-                "投资", "股票", "韭菜", "割韭菜", "炒股"
-            ]
-        },
-        # === 通用场景类 (权重 1.0，但标记为修饰语) ===
-        "generic": {
-            "weight": 1.0,
-            "keywords": [
-                "免费", "平替", "白嫖", "避坑", "翻车", "教程", "爆款",
-                "实时翻译", "AI 耳机", "手机助手"
-            ]
-        }
-    }
-    
-    results = {}
-    content_lower = reports_content.lower()
-    
-    for category, config in KEYWORD_CATEGORIES.items():
-        weight = config["weight"]
-        for kw in config["keywords"]:
-            count = content_lower.count(kw.lower())
-            if count > 0:
-                weighted_score = count * weight
-                results[kw] = (count, weighted_score, category)
-    
+    from agents.keyword_automaton import get_keyword_catalog
+
     # 按加权分数排序，返回前10
-    sorted_results = dict(sorted(results.items(), key=lambda x: x[1][1], reverse=True)[:10])
-    return sorted_results
+    return get_keyword_catalog().score(reports_content, top=10)
 
 
 def _generate_topic_insights(freq: Dict[str, Tuple[int, float, str]], reports_count: int) -> str:
@@ -1325,15 +1410,14 @@ def _generate_topic_insights(freq: Dict[str, Tuple[int, float, str]], reports_co
     if not freq:
         return "暂无高频关键词统计。"
     
-    CATEGORY_LABELS = {
-        "tech": "🔧 硬核技术",
-        "finance": "💰 金融类(降权)",
-        "generic": "📝 修饰语"
-    }
+    from agents.keyword_automaton import get_keyword_catalog
+    catalog = get_keyword_catalog()
+    CATEGORY_LABELS = catalog.labels
+    weight_note = "，".join(f"{CATEGORY_LABELS.get(c) or c}×{w:g}" for c, w in catalog.category_weights.items())
     
     insights = []
     insights.append(f"📊 **关键词热度统计 v4.8** (来自 {reports_count} 份报告，已应用领域权重)：")
-    insights.append("   ⚠️ 注意：技术类关键词权重×2.0，金融类×0.5，修饰语仅供参考")
+    insights.append(f"   ⚠️ 注意：领域权重 {weight_note}，修饰语仅供参考")
     insights.append("")
     
     for kw, (raw_count, weighted_score, category) in freq.items():
@@ -1354,11 +1438,39 @@ def _generate_topic_insights(freq: Dict[str, Tuple[int, float, str]], reports_co
     return "\n".join(insights)
 
 
+# final 阶段 prompt 最多纳入的候选选题数（按星级、新近程度挑选）
+MAX_FINAL_CANDIDATES = 12
+
+def _build_digest_context(digests: List[Tuple[str, Dict[str, Any]]]) -> str:
+    """
+    从多份报告摘要中挑选候选：定向报告与最新报告的候选全部保留，
+    其余按 (星级, 报告新近程度) 取前 MAX_FINAL_CANDIDATES 个，总长度与 hunt 次数基本无关。
+    """
+    from agents.sidecars import format_digest
+
+    pool = []
+    for order, (name, digest) in enumerate(digests):
+        pinned = bool(digest.get("directed_topic")) or order == len(digests) - 1
+        for c in digest.get("candidates", []):
+            pool.append((pinned, c.get("stars", 0), order, id(c), c))
+    pool.sort(key=lambda x: x[:3], reverse=True)
+    chosen = {p[3] for p in pool[:MAX_FINAL_CANDIDATES]} | {p[3] for p in pool if p[0]}
+
+    sections = []
+    for name, digest in digests:
+        picked = [c for c in digest.get("candidates", []) if id(c) in chosen]
+        # 未解析出候选的报告（模型输出偏离格式）保留其主推摘要
+        if picked or digest.get("directed_topic") or not digest.get("candidates"):
+            sections.append(format_digest(name, digest, picked))
+    return "\n\n".join(sections)
+
+
 def final_summary(dry_run=False):
     """综合当天所有报告，给出最终选题推荐和三个提示词"""
     import glob
     from config import get_today_dir
     
+    started = time.perf_counter()
     title_text = "🎯 综合选题决策 v5.0 - 单选题确定模式"
     if dry_run:
         title_text += " (🧪 DRY RUN)"
@@ -1389,6 +1501,8 @@ def final_summary(dry_run=False):
 """
             with open(final_report, "w", encoding="utf-8") as f:
                 f.write(f"# 🏆 今日最终选题决策 (🧪 Mock)\n\n{mock_decision}")
+            write_final_decision(final_report)
+            record_artifact(final_report, duration_ms=(time.perf_counter() - started) * 1000)
             save_topic_to_history("Cursor 效率设置", "Mock 决策")
             log_print("\n✅ [Mock] 综合选题完成！")
             return
@@ -1401,41 +1515,51 @@ def final_summary(dry_run=False):
     
     log_print(f"📊 找到 {len(reports)} 份报告，最新报告为: {os.path.basename(latest_report_path)}")
     
-    all_content = []
+    # v5.1: 读取各报告的结构化摘要（旧报告无摘要时解析 Markdown 并回填），
+    # prompt 只包含入选候选与少量来源，长度不随 hunt 次数线性增长
+    from agents.sidecars import load_report_digest
+    from agents.keyword_automaton import get_keyword_catalog
+
+    digests = []
+    for r in sorted_reports:
+        try:
+            digests.append((os.path.basename(r), load_report_digest(r)))
+        except Exception as e:
+            log_print(f"   ⚠️ 跳过无法解析的报告 {os.path.basename(r)}: {e}")
+
     latest_recommendation = ""
     directed_topics = []  # {topic: recommendation}
     directed_recommendations = {}  # v4.9: 存储每个定向主题的主推内容
-    
-    for r in sorted_reports:
-        name = os.path.basename(r)
-        with open(r, "r", encoding="utf-8") as f:
-            content = f.read()
-            all_content.append(f"=== {name} ===\n{content}")
-            
-            # 提取报告中的定向搜索主题
-            directed_match = re.search(r'# 🚀 选题雷达报告 v4.0 \(定向搜索: (.*?)\)', content)
-            if directed_match:
-                d_topic = directed_match.group(1).strip()
-                if d_topic not in directed_topics:
-                    directed_topics.append(d_topic)
-                
-                # v4.9: 提取该定向报告的“今日主推”作为选题锚点
-                rec_match = re.search(r'## 今日主推\s*(.*?)(?:\n\n|\n##|$)', content, re.DOTALL)
-                if rec_match:
-                    directed_recommendations[d_topic] = rec_match.group(1).strip()
-            
-            # 如果是最新报告，尝试提取“今日主推”
-            if r == latest_report_path:
-                match = re.search(r'## 今日主推\s*(.*?)(?:\n\n|\n##|$)', content, re.DOTALL)
-                if match:
-                    latest_recommendation = match.group(1).strip()
-
-    combined = "\n\n".join(all_content)
+    keyword_totals = {}
+
+    for name, digest in digests:
+        d_topic = digest.get("directed_topic")
+        if d_topic:
+            if d_topic not in directed_topics:
+                directed_topics.append(d_topic)
+            # v4.9: 提取该定向报告的“今日主推”作为选题锚点
+            if digest.get("recommendation"):
+                directed_recommendations[d_topic] = digest["recommendation"]
+        for kw, c in digest.get("keyword_counts", {}).items():
+            keyword_totals[kw] = keyword_totals.get(kw, 0) + c
+    if digests and os.path.basename(latest_report_path) == digests[-1][0]:
+        latest_recommendation = digests[-1][1].get("recommendation", "")
+
+    combined = _build_digest_context(digests)
+    log_print(f"   🧾 摘要上下文 {len(combined)} 字（{len(digests)} 份报告）")
     
     # === v4.1: 预处理 - 关键词频率分析 ===
-    topic_freq = _extract_topic_frequencies(combined)
+    catalog = get_keyword_catalog()
+    topic_freq = catalog.rank([keyword_totals.get(kw, 0) for kw in catalog.keywords], top=10)
     topic_insights = _generate_topic_insights(topic_freq, len(reports))
 
+    # === v5.1: 跨日趋势 - 近一年归档的升温速度 / 新词潜力 ===
+    try:
+        trend_insights = format_trend_insights(rank_trends(days=365, top=8))
+    except Exception as e:
+        log_print(f"   ⚠️ 趋势分析失败，跳过: {e}")
+        trend_insights = "趋势分析不可用。"
+
     # === v4.9: 增强 Prompt - 定向锚点与发散策略 ===
     weighted_instruction = ""
     
@@ -1468,7 +1592,7 @@ def final_summary(dry_run=False):
     {weighted_instruction}
     
     你是"王往AI"，一个**专注硬核 AI 工作流与提效技巧**的技术博主，不是金融分析师，也不是新闻搬运工。
-    你的任务：综合分析今天的所有选题报告，选出【1个最终选题】，并输出3个结构化提示词。
+    你的任务：综合分析今天的所有选题报告（摘要），选出【1个最终选题】，并输出3个结构化提示词。
     
     ## 🧠 核心人设与价值观 (不可违背)
     1. **唯技术论**：即使是分析公司上市或大厂动作，落脚点也必须是**底层技术、工作流变革、Prompt 技巧**，而非股价、财报或八卦。
@@ -1477,6 +1601,9 @@ def final_summary(dry_run=False):
     
     ## 🔥 系统预处理：关键词热度分析
     {topic_insights}
+
+    {trend_insights}
+    （novelty 高 = 正在升温且我们近期没写过，可优先考虑；近期已写过的词要换角度）
     
     ⚠️ **重要决策原则**：
     1. **定向指令绝对优先**：如果用户指定了主题（见上文），必须优先以此为中心进行发散。
@@ -1552,53 +1679,44 @@ def final_summary(dry_run=False):
         try:
             @retryable
             @track_cost(context="final_summary")
-            def _chat_create():
+            def _chat_create(request_messages):
                 return client.chat.completions.create(
                     model="deepseek-reasoner",
-                    messages=[
-                        {"role": "system", "content": FINAL_PROMPT},
-                        {"role": "user", "content": f"以下是今日的所有选题报告，请综合分析后给出最终推荐：\n\n{combined}"}
-                    ],
+                    messages=request_messages,
                     stream=True
                 )
 
-            response = _chat_create()
-            
             log_print("\n" + "="*60)
             log_print("🏆 最终选题推荐")
             log_print("="*60 + "\n")
             
-            collected = []
-            for chunk in response:
-                if chunk.choices[0].delta.content:
-                    c = chunk.choices[0].delta.content
-                    log_print(c, end="", flush=True)
-                    collected.append(c)
+            # v5.1: 边生成边写 .partial，流中断时基于已生成部分续写
+            content_str = stream_chat("final_decision", _chat_create, [
+                {"role": "system", "content": FINAL_PROMPT},
+                {"role": "user", "content": f"以下是今日所有选题报告的结构化摘要，请综合分析后给出最终推荐：\n\n{combined}"}
+            ])
             
             # 保存综合报告
             final_report = os.path.join(topics_dir, "FINAL_DECISION.md")
-            content_str = ''.join(collected)
             with open(final_report, "w", encoding="utf-8") as f:
                 f.write(f"# 🏆 今日最终选题决策\n\n**生成时间**: {datetime.now().strftime('%Y-%m-%d %H:%M')}\n**综合报告数**: {len(reports)}\n\n{content_str}")
             
             log_print(f"\n\n📁 综合报告已保存: {final_report}")
 
+            # v5.1: 写入时解析一次，生成 FINAL_DECISION.json 供 research/draft 直接读取
+            decision = {}
+            try:
+                decision = write_final_decision(final_report)
+            except Exception as e:
+                log_print(f"⚠️ FINAL_DECISION.json 生成失败（下游将回退解析 Markdown）: {e}")
+            record_artifact(final_report, title=decision.get("topic"), duration_ms=(time.perf_counter() - started) * 1000)
+
             # === 自动更新历史记录 (Memory Update) ===
             try:
-                # 优化正则：兼容中英文冒号、忽略前后空格、多行匹配
-                # 模式1: **标题**: xxx
-                title_pattern1 = r'\*\*标题\*\*\s*[:：]\s*(.+)'
-                # 模式2: ### 选题 1：xxx
-                title_pattern2 = r'###\s*选题\s*\d+\s*[:：]\s*(.+)'
-                
-                final_topic = None
-                
-                # 尝试匹配
-                match1 = re.search(title_pattern1, content_str)
-                if match1:
-                    final_topic = match1.group(1).strip()
-                else:
-                    match2 = re.search(title_pattern2, content_str)
+                final_topic = decision.get("topic")
+                if not final_topic:
+                    # 兼容旧格式: ### 选题 1：xxx
+                    match2 = re.search(r'###\s*选题\s*\d+\s*[:：]\s*(.+)', content_str)
                     if match2:
                         final_topic = match2.group(1).strip()
                 
@@ -1666,8 +1784,8 @@ def _fetch_url_content(url: str) -> str:
     log_print(f"   🌐 正在通过 Jina Reader 抓取: {url}")
     
     try:
-        with httpx.Client(proxy=PROXY_URL, timeout=REQUEST_TIMEOUT) as client:
-            resp = client.get(jina_url)
+        with httpx.Client(proxy=PROXY_URL, timeout=provider_timeout("jina", REQUEST_TIMEOUT)) as client:
+            resp = rate_limited("jina", lambda: client.get(jina_url))
             resp.raise_for_status()
             content = resp.text
             
@@ -1697,6 +1815,7 @@ def imitate_mode(reference_input: str, dry_run: bool = False):
     3. 生成搜索计划
     4. 执行搜索并生成 report_*.md
     """
+    started = time.perf_counter()
     log_print("\n" + "="*60)
     log_print("📝 仿写模式 v1.1 - 爆款内容分析与创作")
     log_print("="*60 + "\n")
@@ -1858,6 +1977,8 @@ def imitate_mode(reference_input: str, dry_run: bool = False):
 """
             with open(final_report, "w", encoding="utf-8-sig") as f:
                 f.write(final_decision_content)
+            write_final_decision(str(final_report))
+            record_artifact(str(final_report), title=topic_title, duration_ms=(time.perf_counter() - started) * 1000)
             
             # 更新历史记录
             save_topic_to_history(topic_title, f"仿写: {psychology}")
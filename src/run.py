@@ -9,13 +9,21 @@
     python run.py draft             # 运行写作智能体
     python run.py refine "指令"     # 运行润色智能体 (定向修改)
     python run.py format            # 运行排版智能体
+    python run.py reformat -s blue  # 批量重建归档中所有日期的 HTML
+    python run.py catalog rebuild   # 扫描归档，补建 SQLite 目录与全文索引
+    python run.py catalog search Cursor --kind final --days 90   # 检索归档
+    python run.py trends --days 365 # 关键词趋势：升温速度 / 加速度 / 新词潜力
+    python run.py all --from draft  # 完整流程：输入未变化的阶段自动跳过 (--only research,draft / --force)
+    python run.py resume            # 从检查点恢复上次中断的 hunt / research / draft / all（resume -d 1204 指定日期）
     python run.py draft -d 1204     # 指定日期 (MMDD 或 YYYY-MM-DD)
+    python run.py --import-profile format   # 诊断：统计该命令的模块导入耗时
 ===============================================================================
 """
 
 import sys
 import argparse
-import re
+import subprocess
+import time
 from pathlib import Path
 
 # Ensure project root (parent of src) is on sys.path
@@ -24,10 +32,87 @@ PROJECT_ROOT = CURRENT_DIR.parent
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
-from config import get_logger, DEEPSEEK_API_KEY, EXA_API_KEY, TAVILY_API_KEY
+import config
+from config import get_logger
 
 logger = get_logger(__name__)
 
+# ================= 懒加载注册表 =================
+# 每个命令实际需要导入的智能体模块。命令处理函数内部按需 import，
+# 这里集中登记，供 --import-profile 诊断和启动预算检查使用。
+COMMAND_MODULES = {
+    "hunt": ["agents.trend_hunter"],
+    "final": ["agents.trend_hunter"],
+    "research": ["agents.researcher"],
+    "draft": ["agents.drafter"],
+    "refine": ["agents.refiner"],
+    "audit": ["agents.auditor"],
+    "format": ["agents.formatter"],
+    "reformat": ["agents.formatter"],
+    "catalog": ["agents.archive_catalog"],
+    "trends": ["agents.trend_analytics"],
+    "todo": ["agents.todo_extractor"],
+    "resume": ["agents.checkpoints"],
+    "all": ["agents.pipeline", "agents.trend_hunter", "agents.researcher", "agents.drafter", "agents.formatter"],
+    "help": [],
+}
+
+# 中断后可用 resume 续跑的命令（运行期间在当日 .checkpoints/run.json 留有标记）
+RESUMABLE_COMMANDS = {"hunt", "research", "draft", "all"}
+
+# 轻量命令的导入耗时预算 (秒)：超出时 --import-profile 以非零状态码退出，可直接挂到 CI 做回归检查
+IMPORT_BUDGET_SECONDS = {
+    "help": 0.5,
+    "todo": 0.5,
+}
+
+def profile_imports(command: str, top: int = 15) -> int:
+    """
+    在全新子解释器中以 `-X importtime` 导入 run.py 及该命令所需模块，
+    打印按累计耗时排序的模块列表，并与 IMPORT_BUDGET_SECONDS 比较。
+
+    Returns:
+        进程退出码：0 = 预算内 (或该命令无预算)，1 = 超出预算
+    """
+    modules = COMMAND_MODULES.get(command, [])
+    code = "; ".join(["import run"] + [f"import {m}" for m in modules])
+    t0 = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=str(CURRENT_DIR), capture_output=True, text=True, encoding="utf-8", errors="replace"
+    )
+    wall = time.perf_counter() - t0
+
+    # 行格式: "import time:  self_us | cumulative_us | <缩进>module"，缩进表示嵌套层级
+    entries = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        entries.append((fields[2][1:].rstrip(), int(fields[0]), int(fields[1])))
+
+    if proc.returncode != 0:
+        logger.error("❌ 导入失败 (command=%s)：\n%s", command, proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "")
+        return 1
+
+    # 顶层导入 (名称无缩进) 的累计耗时之和即为总导入耗时
+    total_us = sum(cum for name, _, cum in entries if not name.startswith(" "))
+    logger.info("⏱️ Import profile: %s (模块: %s)", command, ", ".join(modules) or "无")
+    logger.info("   %-48s %10s %12s", "module", "self(ms)", "cumulative(ms)")
+    for name, self_us, cum_us in sorted(entries, key=lambda e: e[2], reverse=True)[:top]:
+        logger.info("   %-48s %10.1f %12.1f", name[:48], self_us / 1000, cum_us / 1000)
+    logger.info("   总导入耗时: %.3fs | 子进程总耗时 (含解释器启动): %.3fs", total_us / 1e6, wall)
+
+    budget = IMPORT_BUDGET_SECONDS.get(command)
+    if budget is not None:
+        if total_us / 1e6 > budget:
+            logger.error("❌ 超出启动预算: %.3fs > %.2fs", total_us / 1e6, budget)
+            return 1
+        logger.info("   ✅ 启动预算内 (%.2fs)", budget)
+    return 0
+
 def print_help():
     logger.info("""
 ╔══════════════════════════════════════════════════════════════╗
@@ -47,8 +132,12 @@ def print_help():
 ║    refine  - ✨ 润色智能体 (定向修改: refine "指令")        ║
 ║    audit   - 🕵️ 审计智能体 (核查事实，防幻觉)                ║
 ║    format  - 🎨 排版智能体 (转换HTML，复制到剪贴板)          ║
+║    reformat- 🗂️ 批量重建 (归档全部 HTML，多进程，跳过未变化) ║
+║    catalog - 🗃️ 归档目录 (catalog rebuild / search "关键词")  ║
+║    trends  - 📈 关键词趋势 (升温速度/加速度/新词潜力)       ║
 ║    todo    - 📋 提取TODO (列出草稿中需补充的内容)            ║
-║    all     - 🔄 完整流程 (依次运行，需人工介入)              ║
+║    all     - 🔄 完整流程 (未变化阶段自动跳过)              ║
+║    resume  - ⏯️ 断点续跑 (可加 -d 指定中断日期)            ║
 ║    help    - 📖 显示帮助                                     ║
 ╠══════════════════════════════════════════════════════════════╣
 ║  推荐工作流程:                                               ║
@@ -67,11 +156,11 @@ def check_environment(command: str):
 
     llm_commands = {"hunt", "final", "research", "draft", "refine", "audit", "all"}
     if command in llm_commands:
-        if not DEEPSEEK_API_KEY:
+        if not config.DEEPSEEK_API_KEY:
             missing.append("DEEPSEEK_API_KEY")
 
     if command in {"research", "all"}:
-        if not EXA_API_KEY and not TAVILY_API_KEY:
+        if not config.EXA_API_KEY and not config.TAVILY_API_KEY:
             missing.append("EXA_API_KEY 或 TAVILY_API_KEY（至少配置一个）")
 
     if missing:
@@ -107,14 +196,64 @@ def run_formatter(style: str = "green"):
     from agents.formatter import main
     main(style=style)
 
+def run_batch_formatter(style: str = "green", force: bool = False, workers: int = None):
+    from agents.formatter import batch_format
+    return batch_format(style=style, force=force, workers=workers)
+
+def run_catalog(action_args, kind=None, days=None, full=False):
+    """归档目录：rebuild 补建 / search 全文检索 / recent 最近产物"""
+    from agents import archive_catalog
+
+    action = action_args[0] if action_args else "recent"
+    if action == "rebuild":
+        t0 = time.perf_counter()
+        stats = archive_catalog.rebuild(full=full)
+        logger.info("🗃️ 目录已更新 (%.2fs): 新增 %d · 更新 %d · 未变 %d · 移除 %d",
+                    time.perf_counter() - t0, stats["added"], stats["updated"], stats["unchanged"], stats["removed"])
+    elif action == "search":
+        query = " ".join(action_args[1:]).strip()
+        if not query:
+            logger.error("❌ 用法: python run.py catalog search \"关键词\" [--kind final] [--days 90]")
+            return
+        t0 = time.perf_counter()
+        rows = archive_catalog.search(query, kind=kind, days=days)
+        logger.info("🔎 「%s」命中 %d 条 (%.1fms)", query, len(rows), (time.perf_counter() - t0) * 1000)
+        for r in rows:
+            snippet = (r.get("snippet") or "").replace("\n", " ").strip()
+            logger.info("   %s [%s] %s — %s", r["date"], r["kind"], r["title"] or r["path"], snippet[:80])
+    elif action == "recent":
+        for r in archive_catalog.recent(kind=kind, limit=20):
+            logger.info("   %s [%s] %s (%s)", r["date"], r["kind"], r["title"] or "-", r["path"])
+    else:
+        logger.error("❌ 未知的 catalog 子命令: %s (可用: rebuild / search / recent)", action)
+
+def run_trends(days=None, top=20):
+    """关键词 × 日期矩阵上的升温排行"""
+    from agents.trend_analytics import rank_trends
+
+    days = days or 365
+    t0 = time.perf_counter()
+    rows = rank_trends(days=days, top=top)
+    logger.info("📈 近 %d 天关键词趋势 (%.0fms)", days, (time.perf_counter() - t0) * 1000)
+    if not rows:
+        logger.info("   暂无升温关键词（归档数据不足，可先运行 catalog rebuild）")
+        return
+    logger.info("   %-16s %8s %8s %8s %8s", "关键词", "velocity", "accel", "novelty", "基线")
+    for r in rows:
+        mark = " ✍️" if r["written"] else ""
+        logger.info("   %-16s %+8.2f %+8.2f %8.2f %8.2f%s", r["keyword"], r["velocity"], r["acceleration"],
+                    r["novelty"], r["baseline"], mark)
+
 def run_todo():
     from agents.todo_extractor import main
     main()
 
 def _load_final_decision():
     """
-    v4.2: 智能解析 FINAL_DECISION.md，提取结构化信息
-    
+    v4.2: 读取 FINAL_DECISION.md 的结构化信息
+    v5.1: 优先读取 final 阶段写出的 FINAL_DECISION.json，进程内按 mtime 缓存；
+          旧文件才回退正则解析（见 agents.sidecars.parse_final_decision）
+
     Returns:
         dict: {
             'topic': 文章标题,
@@ -125,92 +264,12 @@ def _load_final_decision():
             'strategic_summary': 精简的战略意图摘要 (不含视觉脚本)
         }
     """
-    from config import get_today_dir
     import os
+    from config import get_today_dir
+    from agents.sidecars import load_final_decision
 
-    topics_dir = os.path.join(get_today_dir(), "1_topics")
-    final_file = os.path.join(topics_dir, "FINAL_DECISION.md")
-
-    if not os.path.exists(final_file):
-        return None
-
-    logger.info(f"📄 正在解析: {final_file}")
-    with open(final_file, "r", encoding="utf-8") as f:
-        content = f.read()
-
-    result = {
-        'topic': None,
-        'keywords': [],
-        'hook': None,
-        'anchor': None,
-        'fast_research': None,
-        'strategic_summary': None
-    }
-
-    # 提取标题
-    title_match = re.search(r'\*\*标题\*\*[：:]\s*(.+)', content)
-    if title_match:
-        result['topic'] = title_match.group(1).strip()
-
-    # 提取关键词
-    keywords_match = re.search(r'\*\*关键词\*\*[：:]\s*(.+)', content)
-    if keywords_match:
-        keywords_str = keywords_match.group(1).strip()
-        result['keywords'] = [kw.strip() for kw in re.split(r'[,，、]', keywords_str) if kw.strip()]
-
-    # 提取一句话卖点
-    hook_match = re.search(r'\*\*一句话卖点\*\*[：:]\s*(.+)', content)
-    if hook_match:
-        result['hook'] = hook_match.group(1).strip()
-
-    # 提取心理锚点
-    anchor_match = re.search(r'\*\*心理锚点\*\*[：:]\s*(.+)', content)
-    if anchor_match:
-        result['anchor'] = anchor_match.group(1).strip()
-
-    # 提取 Fast Research 提示词（关键！用于精准搜索）
-    fast_research_match = re.search(
-        r'###\s*📡\s*提示词\s*1[：:]?\s*Fast Research.*?```\s*(.*?)```',
-        content, re.DOTALL | re.IGNORECASE
-    )
-    if fast_research_match:
-        result['fast_research'] = fast_research_match.group(1).strip()
-        logger.info("   ✅ 已提取 Fast Research 搜索指引")
-
-    # 提取 Visual Script (JSON)
-    visual_script_match = re.search(
-        r'###\s*🎨\s*视觉脚本.*?```json\s*(.*?)```',
-        content, re.DOTALL | re.IGNORECASE
-    )
-    if visual_script_match:
-        try:
-            from json_repair import repair_json
-            vs_json = repair_json(visual_script_match.group(1).strip(), return_objects=True)
-            if isinstance(vs_json, dict) and 'visual_script' in vs_json:
-                result['visual_script'] = vs_json['visual_script']
-                logger.info("   ✅ 已提取 Visual Script (JSON)")
-            else:
-                 # 兼容直接返回 visual_script 内容的情况
-                result['visual_script'] = vs_json
-                logger.info("   ✅ 已提取 Visual Script (JSON - Direct)")
-        except Exception as e:
-            logger.warning(f"   ⚠️ Visual Script 解析失败: {e}")
-            result['visual_script'] = None
-
-    # 构建精简的战略意图摘要（不含视觉脚本）
-    strategic_parts = []
-    if result['topic']:
-        strategic_parts.append(f"**标题**: {result['topic']}")
-    if result['anchor']:
-        strategic_parts.append(f"**心理锚点**: {result['anchor']}")
-    if result['hook']:
-        strategic_parts.append(f"**一句话卖点**: {result['hook']}")
-    if result['keywords']:
-        strategic_parts.append(f"**关键词**: {', '.join(result['keywords'])}")
-    
-    result['strategic_summary'] = '\n'.join(strategic_parts) if strategic_parts else None
-
-    return result
+    final_file = os.path.join(get_today_dir(), "1_topics", "FINAL_DECISION.md")
+    return load_final_decision(final_file)
 
 
 def _load_final_decision_legacy():
@@ -270,71 +329,92 @@ def run_researcher(topic=None, queries=None, strategic_intent=None):
         fast_research=fast_research  # v4.2: 传递搜索指引
     )
 
-def run_all(dry_run=False):
-    from config import get_today_dir
-    today = get_today_dir()
-    
-    logger.info("🔄 开始完整工作流 (自动化版)%s...", " (🧪 DRY RUN)" if dry_run else "")
-    logger.info(f"📁 今日工作目录: {today}")
-    
-    # ============ Phase 1: 选题雷达 ============
-    logger.info("="*60)
-    logger.info("📡 Phase 1: 选题雷达")
-    logger.info("="*60)
+# ================= run_all 流水线 =================
+# 各阶段声明输入/产出，输入指纹未变化时跳过（见 agents.pipeline）
+HUNT_SETTINGS = ["watchlist", "radar_queries", "efficiency_keywords", "pain_keywords", "trend_sources",
+                 "operational_phase", "phase_config", "topic_ranker", "search_budget"]
+PHASE_SETTINGS = ["operational_phase", "phase_config"]
+
+def _stage_hunt(dry_run):
     from agents.trend_hunter import main as hunt_main
     hunt_main(dry_run=dry_run)
-    
-    # ============ Phase 2: 综合决策 ============
-    logger.info("="*60)
-    logger.info("🏆 Phase 2: 综合决策")
-    logger.info("="*60)
+
+def _stage_final(dry_run):
     from agents.trend_hunter import final_summary
     final_summary(dry_run=dry_run)
-    
-    # ============ Phase 3: 自动化研究 ============
-    logger.info("="*60)
-    logger.info("🔬 Phase 3: 自动化研究 (Exa + Tavily)")
-    logger.info("="*60)
-    parsed = _load_final_decision()
-    if parsed:
-        topic = parsed.get('topic')
-        queries = parsed.get('keywords')
-        strategic_intent = parsed.get('strategic_summary')
-        fast_research = parsed.get('fast_research')
-    else:
-        topic, queries, strategic_intent, fast_research = None, None, None, None
-    
+
+def _stage_research(dry_run):
+    parsed = _load_final_decision() or {}
     from agents.researcher import ResearcherAgent
     researcher = ResearcherAgent()
     notes = researcher.run(
-        topic=topic, 
-        queries=queries or [], 
-        strategic_intent=strategic_intent,
-        fast_research=fast_research,
+        topic=parsed.get('topic'),
+        queries=parsed.get('keywords') or [],
+        strategic_intent=parsed.get('strategic_summary'),
+        fast_research=parsed.get('fast_research'),
         dry_run=dry_run
     )
-    
-    if not notes and not dry_run:
-        logger.warning("⚠️ 研究阶段失败，工作流中断")
-        return
-    
-    # ============ Phase 4: 写作智能体 ============
-    logger.info("="*60)
-    logger.info("✍️ Phase 4: 写作智能体")
-    logger.info("="*60)
-    
-    # 重新加载以获取 visual_script
-    if parsed:
-        visual_script = parsed.get('visual_script')
-    else:
-        visual_script = None
-        
+    return bool(notes)
+
+def _stage_draft(dry_run):
+    parsed = _load_final_decision() or {}
     from agents.drafter import main as draft_main
-    draft_main(topic=topic, strategic_intent=strategic_intent, visual_script=visual_script, dry_run=dry_run)
+    draft_main(topic=parsed.get('topic'), strategic_intent=parsed.get('strategic_summary'),
+               visual_script=parsed.get('visual_script'), dry_run=dry_run)
+
+def build_pipeline():
+    from agents.pipeline import Pipeline, Stage
+    return Pipeline([
+        Stage("hunt", _stage_hunt, label="📡 选题雷达",
+              outputs=["1_topics/report_*.md"],
+              settings=HUNT_SETTINGS, sources=["agents.trend_hunter"]),
+        Stage("final", _stage_final, after=["hunt"], label="🏆 综合决策",
+              inputs=["1_topics/report_*.md"], outputs=["1_topics/FINAL_DECISION.md"],
+              settings=PHASE_SETTINGS, sources=["agents.trend_hunter", "agents.sidecars"]),
+        Stage("research", _stage_research, after=["final"], label="🔬 自动化研究 (Exa + Tavily)",
+              inputs=["1_topics/FINAL_DECISION.md"], outputs=["2_research/notes.txt"],
+              sources=["agents.researcher"]),
+        Stage("draft", _stage_draft, after=["research"], label="✍️ 写作智能体",
+              inputs=["1_topics/FINAL_DECISION.md", "2_research/notes.txt"],
+              outputs=["3_drafts/draft.md", "4_publish/final.md"],
+              settings=PHASE_SETTINGS, sources=["agents.drafter", "agents.illustrator", "agents.screenshotter"]),
+    ])
+
+def run_all(dry_run=False, start=None, only=None, force=False):
+    """
+    v5.1: 完整工作流改由 DAG 流水线执行：输入未变化的阶段直接复用上次产出。
+        start: --from，从该阶段开始（上游视为已完成）
+        only: --only，只执行这些阶段
+        force: --force，忽略指纹重跑所选阶段
+    """
+    from config import get_today_dir
+    from agents.pipeline import FAILED, BLOCKED
+    today = get_today_dir()
     
+    logger.info("🔄 开始完整工作流 (自动化版)%s...", " (🧪 DRY RUN)" if dry_run else "")
+    logger.info(f"📁 今日工作目录: {today}")
+
+    pipeline = build_pipeline()
+    try:
+        selected = pipeline.select(start, only)
+    except ValueError as e:
+        logger.error("❌ %s", e)
+        return
+    statuses = pipeline.run(start=start, only=only, force=force, dry_run=dry_run)
+    summary = " · ".join(f"{name}={status}" for name, status in statuses.items())
+    logger.info("🧩 流水线: %s", summary)
+
+    if any(status in (FAILED, BLOCKED) for status in statuses.values()):
+        logger.warning("⚠️ 流水线未完成，工作流中断")
+        return
+
     if dry_run:
         logger.info("🧪 [Mock] 完整流程模拟成功。")
         return
+
+    # 只跑中间阶段时（如 --only research）不进入人工定稿与排版
+    if pipeline.order[-1] not in selected:
+        return
     
     # ============ 人工介入点 ============
     logger.info("="*60)
@@ -358,6 +438,26 @@ def run_all(dry_run=False):
     logger.info("1. 粘贴内容")
     logger.info("2. 手动上传并插入图片")
 
+def run_resume(date: str = None):
+    """
+    v5.1: 按原参数重跑上次中断的命令；各阶段从该日检查点续跑，已完成的流水线阶段直接跳过。
+    未指定 -d 时先查当前日期，再查最近一次运行所在的日期（-d 启动、跨零点中断的运行）。
+    """
+    from agents.checkpoints import load_interrupted_run
+
+    run = load_interrupted_run(follow_pointer=not date)
+    if not run:
+        logger.info("✅ %s没有中断的运行，无需恢复", f"{date} " if date else "")
+        return
+    # 续跑不应再强制重跑已完成的阶段
+    argv = [a for a in run["argv"] if a != "--force"]
+    if not {"-d", "--date"} & set(argv):
+        # 原命令按当时的“今天”运行（如跨零点中断），续跑时固定到检查点所在日期
+        argv += ["-d", Path(run["day_dir"]).name]
+    logger.info("⏯️ 恢复 %s 开始的运行: python run.py %s", run.get("started_at", "?"), " ".join(argv))
+    sys.argv = [sys.argv[0], *argv]
+    main()
+
 def run_refiner(instruction: str, date: str = None):
     """运行润色智能体"""
     from agents.refiner import refine_article
@@ -397,20 +497,39 @@ def main():
         return
     
     parser = argparse.ArgumentParser(description='王往AI 公众号工作流')
-    parser.add_argument('command', choices=['hunt', 'final', 'research', 'draft', 'refine', 'audit', 'format', 'todo', 'all', 'help'], help='执行的命令', nargs='?', default='help')
+    parser.add_argument('command', choices=['hunt', 'final', 'research', 'draft', 'refine', 'audit', 'format', 'reformat', 'catalog', 'trends', 'todo', 'all', 'resume', 'help'], help='执行的命令', nargs='?', default='help')
+    parser.add_argument('args', nargs='*', help='[catalog专用] 子命令与参数: rebuild | search <关键词> | recent')
     parser.add_argument('-d', '--date', help='指定工作日期 (MMDD 或 YYYY-MM-DD)，默认今天')
     parser.add_argument('-t', '--topic', help='[hunt专用] 指定搜索主题，启用混合优先级(命题作文+自由发挥)')
     parser.add_argument('-i', '--imitate', help='[hunt专用] 仿写模式：指定参考文章路径(支持 HTML/MD/TXT)或 URL(微信公众号等)')
-    parser.add_argument('-s', '--style', default='green', help='[format专用] 排版风格: green/blue/orange/minimal/purple')
+    parser.add_argument('-s', '--style', default='green', help='[format/reformat] 排版风格: green/blue/orange/minimal/purple')
+    parser.add_argument('--force', action='store_true', help='[reformat/catalog rebuild/all] 忽略指纹，全部重新处理')
+    parser.add_argument('--from', dest='from_stage', help='[all专用] 从该阶段开始: hunt/final/research/draft（上游视为已完成）')
+    parser.add_argument('--only', help='[all专用] 只执行这些阶段，逗号分隔: research,draft')
+    parser.add_argument('--kind', help='[catalog专用] 产物类型: report/decision/notes/draft/final/audit/html')
+    parser.add_argument('--days', type=int, help='[catalog/trends] 只检索/分析最近 N 天 (trends 默认 365)')
+    parser.add_argument('--workers', type=int, help='[reformat专用] 并行进程数，默认 CPU 核数')
     parser.add_argument('-m', '--mode', choices=['traffic', 'expert'], help='[draft专用] 写作模式: traffic (流量风暴) / expert (价值黑客)')
     parser.add_argument('--dry-run', action='store_true', help='节流模式：不调用真实 API，仅验证流程和生成 Mock 内容')
+    parser.add_argument('--import-profile', action='store_true', help='诊断：打印该命令的模块导入耗时，超出启动预算时返回非零状态码')
     args = parser.parse_args()
+
+    if args.import_profile:
+        raise SystemExit(profile_imports(args.command))
     
     # 设置工作日期
     if args.date:
         from config import set_working_date
         set_working_date(args.date)
 
+    # v5.1: 长流程命令记录运行标记，中断（崩溃/Ctrl+C）后可用 resume 从检查点续跑
+    resumable = args.command in RESUMABLE_COMMANDS and not args.dry_run and not args.imitate
+    if resumable:
+        # 先过环境检查：启动即退出的命令不应留下会被 resume 重放的标记
+        check_environment(args.command)
+        from agents.checkpoints import mark_running
+        run_day_dir = mark_running(args.command, sys.argv[1:])
+
     if args.command == 'hunt':
         check_environment("hunt")
         if args.imitate:
@@ -445,12 +564,20 @@ def main():
     elif args.command == 'format':
         check_environment("format")
         run_formatter(style=args.style)
+    elif args.command == 'reformat':
+        check_environment("reformat")
+        run_batch_formatter(style=args.style, force=args.force, workers=args.workers)
+    elif args.command == 'catalog':
+        run_catalog(args.args, kind=args.kind, days=args.days, full=args.force)
+    elif args.command == 'trends':
+        run_trends(days=args.days)
     elif args.command == 'todo':
         check_environment("todo")
         run_todo()
     elif args.command == 'all':
         check_environment("all")
-        run_all(dry_run=args.dry_run)
+        only = [s.strip() for s in args.only.split(",") if s.strip()] if args.only else None
+        run_all(dry_run=args.dry_run, start=args.from_stage, only=only, force=args.force)
     elif args.command == 'refine':
         # 如果通过 argparse 进入（无参数），交互式获取
         instruction = input("请输入修改意见: ").strip()
@@ -462,8 +589,42 @@ def main():
         check_environment("audit")
         from agents.auditor import audit_article
         audit_article()
+    elif args.command == 'resume':
+        run_resume(date=args.date)
     else:
         print_help()
 
+    if resumable:
+        from agents.checkpoints import mark_finished
+        mark_finished(run_day_dir)
+
+def init_runtime() -> None:
+    """
+    进程级运行时初始化（CLI / Streamlit 共用）。
+    config.py 由用户从 config.py.example 手工复制、不随仓库更新：旧版 config 在 import 时就已加载 .env、
+    导出代理并创建目录，没有 init_runtime()，此时沿用其导入期行为并提示重新复制。
+    """
+    init = getattr(config, "init_runtime", None)
+    if init is None:
+        logger.warning("⚠️ 当前 config.py 为旧版本（缺少 init_runtime），建议按 config.py.example 重新复制并填回 API Key")
+        return
+    init()
+
+def entrypoint() -> int:
+    """
+    CLI 入口：安装 Ctrl+C 协作式取消后执行 main()。
+    main.py 默认在进程内调用此函数，直接运行 run.py 时同样生效。
+    """
+    from agents import cancellation
+    cancellation.reset()
+    cancellation.install_sigint_handler()
+    try:
+        init_runtime()
+        main()
+    except KeyboardInterrupt:
+        logger.warning("🛑 已取消：正在进行的请求与流式生成已停止")
+        return 130
+    return 0
+
 if __name__ == "__main__":
-    main()
+    raise SystemExit(entrypoint())
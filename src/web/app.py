@@ -1,6 +1,5 @@
 import streamlit as st
 import os
-import json
 import glob
 import re
 from datetime import datetime
@@ -17,7 +16,11 @@ for p in (SRC_DIR, PROJECT_ROOT):
 
 import config
 import run as cli_run
-from agents import trend_hunter, formatter, refiner, auditor
+
+# 加载 .env、导出代理、创建归档目录（init_runtime 自身带缓存，Streamlit 每次 rerun 只做一次；兼容旧版 config.py）
+cli_run.init_runtime()
+# 智能体按需懒加载：agents.<name> 首次访问时才导入，避免启动时拖入全部重依赖
+import agents
 
 # Set page config
 st.set_page_config(
@@ -30,19 +33,25 @@ st.set_page_config(
 # ================= Helper Functions =================
 
 def load_history():
-    history_file = config.get_history_file()
-    if os.path.exists(history_file):
-        try:
-            with open(history_file, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except Exception:
-            return []
-    return []
+    # history_store 按 mtime 缓存，Streamlit 每次 rerun 不再重新解析整个文件
+    from agents.history_store import get_history_store
+    try:
+        return get_history_store().all()
+    except Exception:
+        return []
 
 def get_recent_reports(limit=5):
-    """Get recent hunt reports (sorted by mtime desc)"""
-    topics_dir = Path(config.get_stage_dir("topics"))
-    reports = sorted(topics_dir.glob("report_*.md"), key=lambda p: p.stat().st_mtime, reverse=True)
+    """Get recent hunt reports (sorted by mtime desc; SQLite catalog first, glob as fallback)"""
+    reports = []
+    try:
+        from agents import archive_catalog
+        rows = archive_catalog.recent(kind="report", date=config.get_working_date(), limit=limit)
+        reports = [Path(r["abs_path"]) for r in rows if os.path.exists(r["abs_path"])]
+    except Exception:
+        pass
+    if not reports:
+        topics_dir = Path(config.get_stage_dir("topics"))
+        reports = sorted(topics_dir.glob("report_*.md"), key=lambda p: p.stat().st_mtime, reverse=True)
     recent = []
     for p in reports[:limit]:
         try:
@@ -56,8 +65,24 @@ def get_recent_reports(limit=5):
             continue
     return recent
 
-def parse_topics_from_report(content):
-    """Parse topics from the report markdown content"""
+def parse_topics_from_report(content, path=None):
+    """Parse topics from the report (JSON digest sidecar first, markdown regex as fallback)"""
+    if path is not None:
+        try:
+            from agents.sidecars import load_report_digest
+            candidates = load_report_digest(str(path)).get("candidates", [])
+            if candidates:
+                return [{
+                    "title": c.get("title", ""),
+                    "body": "",
+                    "anchor": c.get("anchor", "N/A"),
+                    "value": c.get("value", "N/A"),
+                    "rating": c.get("rating", "N/A"),
+                    "reason": c.get("reason", "N/A"),
+                } for c in candidates]
+        except Exception:
+            pass
+
     if not content:
         return []
     
@@ -91,7 +116,7 @@ def save_selection(topic):
     """Save selected topic to history and potentially trigger next steps"""
     # For now, just save to history to mark as 'selected'
     # In a real app, this might trigger the Research agent
-    trend_hunter.save_topic_to_history(topic['title'], topic['anchor'])
+    agents.trend_hunter.save_topic_to_history(topic['title'], topic['anchor'])
     st.success(f"Selected: {topic['title']}")
 
 
@@ -213,7 +238,7 @@ with st.sidebar.expander("✨ Refine (润色)", expanded=False):
             with st.spinner("Refining..."):
                 try:
                     config.set_working_date(date_str)
-                    refiner.refine_article(toolkit_refine_instruction.strip())
+                    agents.refiner.refine_article(toolkit_refine_instruction.strip())
                     st.success("Refine 完成：final.md 已更新")
                 except Exception as e:
                     st.error(f"Refine failed: {e}")
@@ -238,7 +263,7 @@ with st.sidebar.expander("🕵️ Audit (事实核查)", expanded=False):
         with st.spinner("Auditing..."):
             try:
                 config.set_working_date(date_str)
-                report = auditor.audit_article()
+                report = agents.auditor.audit_article()
                 if isinstance(report, str) and report.strip().startswith("## ⚠️ Audit Skipped"):
                     st.warning("Audit skipped（缺少输入或为空）。")
                 else:
@@ -347,7 +372,7 @@ with tab1:
             st.session_state.processing = True
             try:
                 config.set_working_date(date_str)
-                trend_hunter.main(topic=directed_topic if directed_topic else None)
+                agents.trend_hunter.main(topic=directed_topic if directed_topic else None)
                 status.update(label="Scan Complete!", state="complete", expanded=False)
             except Exception as e:
                 status.update(label="Scan Failed", state="error")
@@ -365,7 +390,7 @@ with tab1:
                 st.markdown("**Raw Report**")
                 st.markdown(r["content"])
                 
-                topics = parse_topics_from_report(r["content"])
+                topics = parse_topics_from_report(r["content"], r["path"])
                 if topics:
                     st.markdown("**Detected Topics**")
                     for i, t in enumerate(topics):
@@ -412,7 +437,7 @@ with tab1:
             with st.spinner("Generating FINAL_DECISION..."):
                 try:
                     config.set_working_date(date_str)
-                    trend_hunter.final_summary()
+                    agents.trend_hunter.final_summary()
                     st.success("FINAL_DECISION.md generated!")
                 except Exception as e:
                     st.error(f"Failed: {e}")
@@ -440,7 +465,7 @@ with tab1:
                 with st.spinner("Refining..."):
                     try:
                         config.set_working_date(date_str)
-                        refiner.refine_article(refine_instruction.strip())
+                        agents.refiner.refine_article(refine_instruction.strip())
                         st.success("Refine 完成，已写入 final.md")
                     except Exception as e:
                         st.error(f"Failed: {e}")
@@ -455,7 +480,7 @@ with tab1:
             st.session_state.processing = True
             with st.spinner("Auditing..."):
                 try:
-                    report = auditor.audit_article()
+                    report = agents.auditor.audit_article()
                     if isinstance(report, str) and report.strip().startswith("## ⚠️ Audit Skipped"):
                         st.warning(report)
                     elif isinstance(report, str):
@@ -522,11 +547,11 @@ if st.session_state.get("processing", False):
             
             if hunt_mode == "imitate":
                 logger.info(f"UI: 启动仿写模式 -> {imitate_input}")
-                trend_hunter.imitate_mode(imitate_input)
+                agents.trend_hunter.imitate_mode(imitate_input)
                 st.success("✅ 极速仿写完成！已直接生成最终决策，可立即开始深度研究。")
             else:
                 logger.info(f"UI: 启动扫描模式 -> {hunt_topic}")
-                trend_hunter.main(topic=hunt_topic if hunt_topic else None)
+                agents.trend_hunter.main(topic=hunt_topic if hunt_topic else None)
                 st.success("✅ 选题扫描完成！")
         except Exception as e:
             st.error(f"❌ 运行失败: {e}")
@@ -598,8 +623,8 @@ with tab2:
         # Render HTML
         if st.session_state.editor_content:
             try:
-                html_content = formatter.convert_md_to_html(st.session_state.editor_content)
-                final_html = formatter.inline_css(html_content, style_name=selected_style)
+                html_content = agents.formatter.convert_md_to_html(st.session_state.editor_content)
+                final_html = agents.formatter.inline_css(html_content, style_name=selected_style)
                 
                 # Display in iframe
                 st.components.v1.html(final_html, height=600, scrolling=True)